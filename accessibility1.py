@@ -1,14 +1,32 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import subprocess
 import json
 import os
 import tempfile
+import threading
 from pathlib import Path
 from collections import Counter
-import matplotlib.pyplot as plt
-from typing import List, Dict, Tuple
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
+
+from audit_cache import AuditCache, cached_tools
+from audit_state import AuditState, fetch_content_hashes, tool_versions
+from canonicalizer import Canonicalizer
+from checkpoint import JOURNAL_FILE, RunJournal, atomic_write, write_json
+from issue_db import IssueDB, issue_db_path, open_issue_db
+from issues import CATEGORIES, TOOL_BITS, Issue, merge_issues
+from lighthouse_report import iter_lighthouse_entries, load_report, trim_report
+from crawler import DEFAULT_CONCURRENCY, DEFAULT_MAX_DEPTH, DEFAULT_MAX_PAGES, DEFAULT_TIMEOUT, crawl
+from node_daemon import AuditDaemon, DaemonError, DaemonTimeout
+from ratelimit import get_limiter, rate_limited_tools
+from result_store import ResultStore, index_path, iter_entries
+from scheduler import AuditScheduler
+from scoring import ScoringEngine
+from sitemap import discover
+from template_clusters import DEFAULT_REPRESENTATIVES, TemplateClusters, extrapolate_entries, limit_inferred
+from tool_metrics import TIMINGS_FILE, MetricsRecorder, instrumented_tools, track_process
+from url_canonical import canonicalize_url, canonicalize_urls
+from watchdog import ToolError, ToolTimeout, retrying_tools, run_command
+from weight_profiles import DEFAULT_PROFILE, WeightProfile
 
 """
 This module provides a set of functions to automatically crawl a website,
@@ -32,10 +50,17 @@ if os.name == "nt":
 else:
     NPX = "npx"
 
+# Raw tool results are stored as append-only JSON lines (see ``result_store``).
+PA11Y_RESULTS = "pa11y_result.jsonl"
+AXE_RESULTS = "axe_result.jsonl"
+LIGHTHOUSE_RESULTS = "lighthouse_results.jsonl"
+
 # ------------------------------------------------------------------------------
 # Definition of canonical issue messages and weighting factors used for
-# calculating accessibility scores.  See the documentation for each entry in
-# ``ISSUE_CATEGORIES`` for details.
+# calculating accessibility scores.  The mapping of tool messages is defined in
+# ``canonical_rules.json``, the weights in ``profiles/default.json``.
+
+CANONICALIZER = Canonicalizer.from_file()
 
 CANONICAL_MESSAGES = [
     "images must have alternative text",
@@ -67,154 +92,22 @@ CANONICAL_MESSAGES = [
     "element has an invalid aria role",
 ]
 
-DEFAULT_SEVERITY = 1
-DEFAULT_TYPE_FACTOR = 1.0
-
-ISSUE_CATEGORIES: Dict[str, Dict[str, object]] = {
-    msg: {"severity": DEFAULT_SEVERITY, "type_factor": DEFAULT_TYPE_FACTOR, "label": msg}
-    for msg in CANONICAL_MESSAGES
-}
-
-ISSUE_CATEGORIES.update(
-    {
-        "images must have alternative text": {
-            "severity": 4,
-            "type_factor": 1.5,
-            "label": "Fehlender Alternativtext",
-        },
-        "elements must meet minimum color contrast ratio thresholds": {
-            "severity": 3,
-            "type_factor": 1.3,
-            "label": "Geringer Farbkontrast",
-        },
-        "form elements must have labels": {
-            "severity": 4,
-            "type_factor": 1.5,
-            "label": "Unbeschriftetes Formularfeld",
-        },
-        "links must have discernible text": {
-            "severity": 4,
-            "type_factor": 1.3,
-            "label": "Nicht erkennbare Linktexte",
-        },
-        "element requires an accessible name": {
-            "severity": 4,
-            "type_factor": 1.3,
-            "label": "Fehlender Accessible Name",
-        },
-        "document should have one main landmark": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "Fehlende Haupt‑Landmarke",
-        },
-        "all page content should be contained by landmarks": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "Inhalt außerhalb von Landmarken",
-        },
-        "document must have a title element": {
-            "severity": 3,
-            "type_factor": 1.1,
-            "label": "Fehlender Seitentitel",
-        },
-        "document must have a language attribute": {
-            "severity": 2,
-            "type_factor": 1.0,
-            "label": "Fehlendes Sprachattribut",
-        },
-        "aria-hidden element must not be focusable": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "ARIA‑hidden ist fokussierbar",
-        },
-        "avoid positive tabindex values": {
-            "severity": 3,
-            "type_factor": 1.1,
-            "label": "Tabindex positiv gesetzt",
-        },
-        "frames must not remove focusable content": {
-            "severity": 4,
-            "type_factor": 1.3,
-            "label": "Frames entfernen fokussierbare Inhalte",
-        },
-        "links must be distinguishable without relying on color": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "Links nur durch Farbe unterscheidbar",
-        },
-        "interactive elements must have sufficient size": {
-            "severity": 3,
-            "type_factor": 1.3,
-            "label": "Kleine interaktive Elemente",
-        },
-        "fieldsets must contain a legend element": {
-            "severity": 2,
-            "type_factor": 1.0,
-            "label": "Fieldset ohne Legende",
-        },
-        "autocomplete attribute must be valid": {
-            "severity": 2,
-            "type_factor": 0.9,
-            "label": "Ungültiges Autocomplete‑Attribut",
-        },
-        "lists must only contain allowed children": {
-            "severity": 2,
-            "type_factor": 1.0,
-            "label": "Liste enthält ungültige Kinder",
-        },
-        "scrollable region must be focusable": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "Nicht fokussierbarer Scrollbereich",
-        },
-        "page should contain a level-one heading": {
-            "severity": 2,
-            "type_factor": 1.0,
-            "label": "Kein H1‑Element vorhanden",
-        },
-        "aria attributes must be valid": {
-            "severity": 2,
-            "type_factor": 1.1,
-            "label": "Ungültiges ARIA‑Attribut",
-        },
-        "interactive controls must not be nested": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "Verschachtelte interaktive Elemente",
-        },
-        "page must have a skip link or landmark": {
-            "severity": 3,
-            "type_factor": 1.3,
-            "label": "Kein Skip‑Link vorhanden",
-        },
-        "table cells must have headers": {
-            "severity": 4,
-            "type_factor": 1.2,
-            "label": "Tabellenzellen ohne Header",
-        },
-        "elements must have unique ids": {
-            "severity": 3,
-            "type_factor": 1.1,
-            "label": "Nicht eindeutige IDs",
-        },
-        "page must not use timed refresh": {
-            "severity": 3,
-            "type_factor": 1.2,
-            "label": "Zeitgesteuertes Refresh",
-        },
-        "page must allow zooming": {
-            "severity": 3,
-            "type_factor": 1.1,
-            "label": "Zoom‑Funktion deaktiviert",
-        },
-        "element has an invalid aria role": {
-            "severity": 2,
-            "type_factor": 1.2,
-            "label": "Ungültige ARIA‑Rolle",
-        },
-    }
+# Canonical messages added to the rules file without touching this list.
+CANONICAL_MESSAGES += [msg for msg in CANONICALIZER.canonical_messages if msg not in CANONICAL_MESSAGES]
+
+# Severity, type factor and label of each canonical message come from the
+# weight profile ``profiles/default.json``; other profiles can be applied to
+# stored results with ``rescore.py``.
+WEIGHT_PROFILE = WeightProfile.load(DEFAULT_PROFILE)
+DEFAULT_SEVERITY = WEIGHT_PROFILE.default_severity
+DEFAULT_TYPE_FACTOR = WEIGHT_PROFILE.default_type_factor
+ISSUE_CATEGORIES: Dict[str, Dict[str, object]] = WEIGHT_PROFILE.issue_categories(
+    CANONICAL_MESSAGES, CANONICALIZER.rules
 )
 
+# Weights and scaling of ``ISSUE_CATEGORIES``, computed once (see ``scoring``).
+SCORING_ENGINE = ScoringEngine(ISSUE_CATEGORIES, DEFAULT_SEVERITY, DEFAULT_TYPE_FACTOR)
+
 
 # ------------------------------------------------------------------------------
 # Utility functions
@@ -222,7 +115,7 @@ ISSUE_CATEGORIES.update(
 def _check_node_version() -> bool:
     """Return True if the installed Node.js version meets the minimum requirement."""
     try:
-        result = subprocess.run(["node", "-v"], capture_output=True, text=True)
+        result = subprocess.run(["node", "-v"], capture_output=True, text=True, timeout=30)
         if result.returncode != 0:
             print("Node.js konnte nicht gefunden werden. Bitte installieren Sie Node.js.")
             return False
@@ -246,112 +139,197 @@ def ist_internal_link(base_url: str, link: str) -> bool:
     return target_domain == "" or target_domain == base_domain
 
 
-def finde_interne_links(start_url: str) -> List[str]:
-    """Find all internal links on the starting page and return them as a list."""
-    visited: set = set()
+# Seed the crawl with the pages listed in the site's sitemaps and honour its
+# ``robots.txt`` (see ``sitemap``).  The ``lastmod`` dates of the sitemap
+# pages are kept in ``LASTMOD_FILE`` for the incremental audit.
+SITEMAP_DISCOVERY = True
+LASTMOD_FILE = "sitemap_lastmod.json"
+
+
+def discover_site(
+    start_url: str, max_pages: int = DEFAULT_MAX_PAGES, timeout: float = DEFAULT_TIMEOUT
+) -> Tuple[Callable[[str, str], bool], Dict[str, Optional[str]]]:
+    """Read the ``robots.txt`` and sitemaps of the site of ``start_url``.
+
+    Returns the scope check for the crawl, which also skips links disallowed
+    by ``robots.txt``, and up to ``max_pages`` sitemap pages with their
+    ``lastmod``.  The ``Crawl-delay`` is applied to the host by the shared
+    rate limiter, so every crawl of the site respects it.
+    """
+    robots, sitemap_pages = discover(start_url, ist_internal_link, max_pages, timeout=timeout)
+    if robots.crawl_delay:
+        get_limiter().configure(start_url, crawl_delay=robots.crawl_delay)
+
+    def in_scope(base_url: str, link: str) -> bool:
+        return ist_internal_link(base_url, link) and robots.can_fetch(link)
+
+    return in_scope, sitemap_pages
+
+
+def add_sitemap_pages(visited: List[str], sitemap_pages: Dict[str, Optional[str]], max_pages: int) -> List[str]:
+    """Append the sitemap pages the crawl did not reach, up to ``max_pages`` links."""
+    if not sitemap_pages:
+        return visited
+    known = set(visited)
+    extra = [url for url in sitemap_pages if url not in known]
+    print(f"{len(sitemap_pages)} Seiten aus Sitemaps gelesen, {len(extra)} davon nicht verlinkt.")
+    return visited + extra[: max(0, max_pages - len(visited))]
+
+
+def finde_interne_links(
+    start_url: str,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_page: Optional[Callable[[str, str], None]] = None,
+    use_sitemaps: bool = SITEMAP_DISCOVERY,
+) -> List[str]:
+    """Crawl the site starting at ``start_url`` and return its internal links.
+
+    The crawl follows internal links breadth-first up to ``max_depth`` levels
+    (``1`` only reads the start page) and stops after ``max_pages`` links.
+    Pages of one level are fetched concurrently over pooled connections.
+    ``on_page`` is called with ``(url, html)`` for every fetched page.
+
+    With ``use_sitemaps`` links disallowed by ``robots.txt`` are skipped, its
+    crawl delay is respected, and the sitemap pages the crawl did not reach
+    are appended, most recently modified first, without being fetched.
+    """
+    if use_sitemaps:
+        in_scope, sitemap_pages = discover_site(start_url, max_pages, timeout)
+    else:
+        in_scope, sitemap_pages = ist_internal_link, {}
+    visited = crawl(
+        start_url,
+        in_scope,
+        max_depth=max_depth,
+        max_pages=max_pages,
+        concurrency=concurrency,
+        timeout=timeout,
+        on_page=on_page,
+    )
+    visited = add_sitemap_pages(visited, sitemap_pages, max_pages)
+    if sitemap_pages:
+        write_json(LASTMOD_FILE, {canonicalize_url(url): value for url, value in sitemap_pages.items() if value})
+    with atomic_write("gefundene_urls.txt") as f:
+        for url in sorted(visited):
+            f.write(url + "\n")
+    print("\n Alle internen Links in 'gefundene_urls.txt' gespeichert.")
+    return visited
+
+
+def _append_entry(filename: str, entry: dict) -> None:
+    """Append ``entry`` to the results stored in ``filename``.
+
+    ``.jsonl`` files are written append-only via :class:`ResultStore`; other
+    files are treated as a legacy JSON list that is rewritten completely.
+    """
+    if filename.endswith(".jsonl"):
+        ResultStore(filename).append(entry)
+        return
     try:
-        response = requests.get(start_url)
-        soup = BeautifulSoup(response.text, "html.parser")
-        for a_tag in soup.find_all("a", href=True):
-            raw_link = a_tag["href"]
-            full_url = urljoin(start_url, raw_link)
-            if ist_internal_link(start_url, full_url):
-                visited.add(full_url)
-        with open("gefundene_urls.txt", "w", encoding="utf-8") as f:
-            for url in sorted(visited):
-                f.write(url + "\n")
-        print("\n Alle internen Links in 'gefundene_urls.txt' gespeichert.")
-    except requests.RequestException as e:
-        print(f"Fehler beim Abrufen der Seite {start_url}: {e}")
-        return []
-    return list(visited)
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = []
+    data.append(entry)
+    write_json(filename, data)
 
 
-def run_pa11y(url: str, filename: str = "pa11y_result.json") -> None:
-    """Run Pa11y and store the result in a JSON file."""
+# Options passed to each tool.  They are part of the audit cache key, since
+# they change what a tool reports.
+TOOL_OPTIONS: Dict[str, List[str]] = {
+    "pa11y": ["--reporter", "json", "--include-warnings"],
+    "axe": [],
+    "lighthouse": ["--only-categories=accessibility", "--output=json"],
+}
+
+# Wall-clock budget of one run of each tool in seconds.  A run that exceeds it
+# is killed together with its browser processes (see ``watchdog``).
+TOOL_TIMEOUTS: Dict[str, float] = {"pa11y": 120.0, "axe": 120.0, "lighthouse": 180.0}
+
+# Failed or timed-out runs are repeated up to ``TOOL_ATTEMPTS`` times in all,
+# waiting ``RETRY_BACKOFF`` seconds before the first retry and twice as long
+# before each further one.  Runs that fail for good are stored as failure
+# records with an ``error`` key.
+TOOL_ATTEMPTS = 3
+RETRY_BACKOFF = 2.0
+
+# Store Lighthouse reports only with the fields used for combining and rating
+# (see ``lighthouse_report``) instead of the full report of ~150 KB per page.
+TRIM_LIGHTHOUSE_REPORTS = True
+
+
+def _pa11y_entry(url: str) -> dict:
+    """Run Pa11y for ``url`` and return the result entry."""
     print(f"Pa11y: {url}")
-    result = subprocess.run([NPX, "pa11y", "--reporter", "json", "--include-warnings", url], capture_output=True, text=True)
+    result = run_command([NPX, "pa11y", *TOOL_OPTIONS["pa11y"], url], TOOL_TIMEOUTS["pa11y"], track_process)
     try:
         results_json = json.loads(result.stdout)
     except json.JSONDecodeError as e:
-        print(f"Fehler beim Parsen der pa11y Ausgabe für {url}: {e}")
-        results_json = []
-    entry = {
+        raise ToolError(f"Ausgabe von pa11y nicht lesbar: {e}") from e
+    return {
         "url": url,
         "results": results_json,
     }
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-    data.append(entry)
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
 
 
-def run_axe(url: str, filename: str = "axe_result.json") -> None:
-    """Run axe-core and append the result to a JSON file."""
+def _axe_entry(url: str) -> dict:
+    """Run axe-core for ``url`` and return the result entry."""
     print(f"axe-core: {url}")
-    result = subprocess.run(
-        [NPX, "@axe-core/cli", url, "--save", "axe_tmp.json"],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        print("Fehler bei axe-core:", result.stderr)
+    # Each run gets its own temporary file so that concurrent runs do not
+    # overwrite each other's output.
+    fd, tmp_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
     try:
-        with open("axe_tmp.json", "r", encoding="utf-8") as tmp:
+        result = run_command(
+            [NPX, "@axe-core/cli", url, *TOOL_OPTIONS["axe"], "--save", tmp_path], TOOL_TIMEOUTS["axe"], track_process
+        )
+        if result.returncode != 0:
+            print("Fehler bei axe-core:", result.stderr)
+        with open(tmp_path, "r", encoding="utf-8") as tmp:
             data = json.load(tmp)
-        os.remove("axe_tmp.json")
-    except Exception as e:
-        print(f"Fehler beim Lesen der axe-core Ausgabe: {e}")
-        data = {}
-    entry = {"url": url, "axe_result": data}
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            all_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        all_data = []
-    all_data.append(entry)
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, indent=2, ensure_ascii=False)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ToolError(f"Ausgabe von axe-core nicht lesbar: {e}") from e
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return {"url": url, "axe_result": data}
 
 
-def run_lighthouse(url: str, filename: str = "lighthouse_results.json") -> None:
-    """Run Lighthouse for the given URL and append the JSON result to ``filename``."""
+def _lighthouse_entry(url: str) -> dict:
+    """Run Lighthouse for ``url`` and return the result entry."""
     print(f"Lighthouse: {url}")
     fd, tmp_path = tempfile.mkstemp(suffix=".json")
     os.close(fd)
-    result = subprocess.run(
-        [
-            NPX,
-            "lighthouse",
-            url,
-            "--only-categories=accessibility",
-            "--output=json",
-            "--chrome-flags=--headless",
-            f"--output-path={tmp_path}",
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        print("Fehler bei Lighthouse:", result.stderr)
     try:
-        with open(tmp_path, "r", encoding="utf-8") as tmp_file:
-            data = json.load(tmp_file)
-        entry = {"url": url, "lighthouse_result": data}
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                all_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            all_data = []
-        all_data.append(entry)
-        with open(filename, "w", encoding="utf-8") as out_file:
-            json.dump(all_data, out_file, indent=2, ensure_ascii=False)
+        result = run_command(
+            [
+                NPX,
+                "lighthouse",
+                url,
+                *TOOL_OPTIONS["lighthouse"],
+                "--chrome-flags=--headless",
+                f"--output-path={tmp_path}",
+            ],
+            TOOL_TIMEOUTS["lighthouse"],
+            track_process,
+        )
+        if result.returncode != 0:
+            print("Fehler bei Lighthouse:", result.stderr)
+        if TRIM_LIGHTHOUSE_REPORTS:
+            data = load_report(tmp_path)
+        else:
+            with open(tmp_path, "r", encoding="utf-8") as tmp_file:
+                data = json.load(tmp_file)
+        return {"url": url, "lighthouse_result": data}
+    except ToolError:
+        raise
     except Exception as exc:
-        print(f"Fehler beim Lesen/Speichern von Lighthouse-Ergebnissen: {exc}")
+        raise ToolError(f"Lighthouse-Ergebnis nicht lesbar: {exc}") from exc
     finally:
         try:
             os.remove(tmp_path)
@@ -359,227 +337,424 @@ def run_lighthouse(url: str, filename: str = "lighthouse_results.json") -> None:
             pass
 
 
-def accessibility_checks(urls: List[str]) -> None:
-    """Run Pa11y, Axe and Lighthouse on each URL in ``urls``."""
-    for url in urls:
-        print(f"\n=== Teste Seite: {url} ===")
-        run_pa11y(url)
-        run_axe(url)
-        run_lighthouse(url)
+def _run_with_retries(name: str, runner: Callable[[str], Optional[dict]], url: str) -> Optional[dict]:
+    """Run one tool with the configured retries; return the entry or a failure record."""
+    return retrying_tools({name: runner}, TOOL_ATTEMPTS, RETRY_BACKOFF)[name](url)
+
+
+def run_pa11y(url: str, filename: str = PA11Y_RESULTS) -> None:
+    """Run Pa11y and store the result in a JSON file."""
+    _append_entry(filename, _run_with_retries("pa11y", _pa11y_entry, url))
+
+
+def run_axe(url: str, filename: str = AXE_RESULTS) -> None:
+    """Run axe-core and append the result to a JSON file."""
+    _append_entry(filename, _run_with_retries("axe", _axe_entry, url))
+
+
+def run_lighthouse(url: str, filename: str = LIGHTHOUSE_RESULTS) -> None:
+    """Run Lighthouse for the given URL and append the JSON result to ``filename``."""
+    _append_entry(filename, _run_with_retries("lighthouse", _lighthouse_entry, url))
+
+
+def _daemon_tools(daemon: AuditDaemon) -> Dict[str, Callable[[str], Optional[dict]]]:
+    """Return tool runners that use the persistent Node worker instead of ``npx``.
+
+    The entries have the same shape as the ones produced by the ``npx`` based
+    runners, so the rest of the pipeline does not need to know which backend
+    was used.  Worker errors are raised as :class:`ToolError`, so the run is
+    repeated; once the worker has exited, the ``npx`` runners are used.
+    """
+    fallback_notice = threading.Event()
+
+    def _audit(url: str, engine: str) -> object:
+        try:
+            data = daemon.audit(url, [engine], timeout=TOOL_TIMEOUTS[engine])[engine]
+        except DaemonTimeout as exc:
+            raise ToolTimeout(str(exc)) from exc
+        except DaemonError as exc:
+            raise ToolError(str(exc)) from exc
+        if data is None:
+            raise ToolError(f"{engine} hat kein Ergebnis geliefert")
+        return data
+
+    def pa11y(url: str) -> dict:
+        print(f"Pa11y: {url}")
+        return {"url": url, "results": _audit(url, "pa11y")}
+
+    def axe(url: str) -> dict:
+        print(f"axe-core: {url}")
+        return {"url": url, "axe_result": _audit(url, "axe")}
+
+    def lighthouse(url: str) -> dict:
+        print(f"Lighthouse: {url}")
+        data = _audit(url, "lighthouse")
+        if TRIM_LIGHTHOUSE_REPORTS:
+            data = trim_report(data)
+        return {"url": url, "lighthouse_result": data}
+
+    def _or_npx(runner: Callable[[str], dict], npx_runner: Callable[[str], dict]) -> Callable[[str], dict]:
+        def run(url: str) -> dict:
+            if daemon.running:
+                return runner(url)
+            if not fallback_notice.is_set():
+                fallback_notice.set()
+                print("Der Audit-Worker wurde beendet. Verwende npx für die übrigen Tests.")
+            return npx_runner(url)
+
+        return run
+
+    return {
+        "pa11y": _or_npx(pa11y, _pa11y_entry),
+        "axe": _or_npx(axe, _axe_entry),
+        "lighthouse": _or_npx(lighthouse, _lighthouse_entry),
+    }
+
+
+# Default concurrency of ``accessibility_checks``.  Every tool run starts its
+# own browser, so the number of parallel pages should match the available
+# CPU cores and memory.
+MAX_CONCURRENT_PAGES = 4
+MAX_CONCURRENT_TOOLS = 3
+
+# Audit only a few representatives of pages that share a DOM template and
+# extrapolate their findings to the other pages of the cluster.
+TEMPLATE_CLUSTERING = False
+
+# Re-audit only pages whose content or tool versions changed since the last
+# run and reuse the stored findings for all others (see ``audit_state``).
+INCREMENTAL_AUDIT = True
+
+# Serve results for already audited page contents from the on-disk cache in
+# ``.audit_cache`` (see ``audit_cache``).
+AUDIT_CACHE = True
+
+# After every audit, write the resource usage of the tool runs in the
+# Prometheus text format to this file, e.g. in the directory of the node
+# exporter's textfile collector (``None`` disables it; see ``tool_metrics``).
+METRICS_TEXTFILE: Optional[str] = None
+
+
+def audit_tools(
+    daemon: Optional[AuditDaemon] = None,
+    cache: Optional[AuditCache] = None,
+    content_hashes: Optional[Dict[str, str]] = None,
+    versions: Optional[Dict[str, Optional[str]]] = None,
+    recorder: Optional[MetricsRecorder] = None,
+) -> Dict[str, Callable[[str], Optional[dict]]]:
+    """Return the tool runners used by :func:`accessibility_checks`.
+
+    Every run takes a slot from the shared per-host rate limiter, is limited
+    to ``TOOL_TIMEOUTS`` and repeated on failure (see ``watchdog``).  With a
+    ``recorder``, the resource usage of every attempt is measured (see
+    ``tool_metrics``).
+    """
+    if daemon is not None:
+        tools = _daemon_tools(daemon)
+    else:
+        tools = {"pa11y": _pa11y_entry, "axe": _axe_entry, "lighthouse": _lighthouse_entry}
+    if recorder is not None:
+        tools = instrumented_tools(tools, recorder, "npx" if daemon is None else "daemon")
+    # Tool runs count against the per-host limits; cache hits and the waits
+    # between retries do not.
+    tools = retrying_tools(rate_limited_tools(tools), TOOL_ATTEMPTS, RETRY_BACKOFF)
+    if cache is not None:
+        tools = cached_tools(tools, cache, content_hashes or {}, versions or {}, TOOL_OPTIONS, canonicalize_url)
+    return tools
+
+
+def accessibility_checks(
+    urls: List[str],
+    max_pages: int = MAX_CONCURRENT_PAGES,
+    max_tools_per_page: int = MAX_CONCURRENT_TOOLS,
+    pa11y_file: str = PA11Y_RESULTS,
+    axe_file: str = AXE_RESULTS,
+    lighthouse_file: str = LIGHTHOUSE_RESULTS,
+    daemon: Optional[AuditDaemon] = None,
+    cache: Optional[AuditCache] = None,
+    content_hashes: Optional[Dict[str, str]] = None,
+    versions: Optional[Dict[str, Optional[str]]] = None,
+    journal: Optional[RunJournal] = None,
+    recorder: Optional[MetricsRecorder] = None,
+) -> None:
+    """Run Pa11y, Axe and Lighthouse on each URL in ``urls``.
+
+    Up to ``max_pages`` pages are audited at the same time and each page runs
+    up to ``max_tools_per_page`` tools concurrently.  Results are written in
+    the order of ``urls``, so the result files are identical to a serial run
+    (``max_pages=1, max_tools_per_page=1``).  If a running ``daemon`` is
+    given, the tools are executed by the persistent Node worker instead of
+    separate ``npx`` processes.  With a ``cache``, results for pages whose
+    content hash is listed in ``content_hashes`` are looked up by URL,
+    content, tool, tool version (``versions``) and ``TOOL_OPTIONS`` first.
+    With a ``journal``, tool runs it lists as done are skipped and every
+    stored result is recorded in it (see ``checkpoint``).  A ``recorder``
+    receives the measurements of every tool run.
+    """
+    outputs = {"pa11y": pa11y_file, "axe": axe_file, "lighthouse": lighthouse_file}
+    tools = audit_tools(daemon, cache, content_hashes, versions, recorder)
+    if journal is not None:
+        urls = journal.pending(urls, list(tools))
+        tools = _skip_done(tools, journal)
+    scheduler = AuditScheduler(
+        tools,
+        max_pages=max_pages,
+        max_tools_per_page=max_tools_per_page,
+    )
+
+    stores = {tool: ResultStore(path) for tool, path in outputs.items() if path.endswith(".jsonl")}
+
+    def _store(url: str, results: Dict[str, Optional[dict]]) -> None:
+        for tool, entry in results.items():
+            if entry is None:
+                continue
+            if tool in stores:
+                stores[tool].append(entry, sync=journal is not None)
+            else:
+                _append_entry(outputs[tool], entry)
+            if journal is not None:
+                journal.record(url, tool, ok=not entry.get("error"))
+
+    scheduler.run(urls, _store)
+
+
+def _skip_done(tools: Dict[str, Callable[[str], Optional[dict]]], journal: RunJournal):
+    """Wrap ``tools`` so that runs recorded as done in ``journal`` produce no result."""
+
+    def _wrap(name: str, runner: Callable[[str], Optional[dict]]) -> Callable[[str], Optional[dict]]:
+        def run(url: str) -> Optional[dict]:
+            return None if journal.is_done(url, name) else runner(url)
+
+        return run
+
+    return {name: _wrap(name, runner) for name, runner in tools.items()}
+
+
+def _prepare_resume(journal: RunJournal, outputs: List[str]) -> None:
+    """Reduce the result stores to the entries recorded in ``journal``.
+
+    Entries written after the last journal record (e.g. the tools of a page
+    that was being stored during the crash), failure records and duplicates
+    are removed, so the resumed run appends each result exactly once.
+    """
+    for tool, path in zip(("pa11y", "axe", "lighthouse"), outputs):
+        seen = set()
+
+        def keep(entry: dict, tool: str = tool) -> bool:
+            url = entry.get("url")
+            if url in seen or not journal.is_done(url, tool):
+                return False
+            seen.add(url)
+            return True
+
+        removed = ResultStore(path).retain(keep)
+        if removed:
+            print(f"{removed} nicht im Journal verzeichnete Einträge aus '{path}' entfernt.")
 
 
 # ------------------------------------------------------------------------------
 # Helper functions to extract and canonicalise issues from the various tools
 
-def _extract_pa11y_errors(data: List[dict]) -> List[Dict[str, str]]:
-    """Return a list of error messages and contexts from Pa11y results."""
-    errors: List[Dict[str, str]] = []
-    seen: set = set()
-    for entry in data:
-        for res in entry.get("results", []):
-            if res.get("type") == "error":
-                msg = res.get("message", "")
-                ctx = res.get("context", "")
-                key = (_canonicalize_message(msg), ctx)
-                if key in seen:
-                    continue
-                seen.add(key)
-                errors.append({"message": msg, "context": ctx})
-    return errors
-
-
-def _extract_axe_errors(data: List[dict]) -> List[Dict[str, str]]:
-    """Return a list of error messages and contexts from Axe results."""
-    errors: List[Dict[str, str]] = []
-    seen: set = set()
-    for entry in data:
-        axe_result = entry.get("axe_result", {})
-        results = axe_result if isinstance(axe_result, list) else [axe_result]
-        for result in results:
-            for viol in result.get("violations", []):
-                msg = viol.get("help", viol.get("description", ""))
-                for node in viol.get("nodes", []):
-                    ctx = node.get("html", "")
-                    key = (_canonicalize_message(msg), ctx)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    errors.append({"message": msg, "context": ctx})
-    return errors
-
-
-def _extract_lighthouse_errors(data: List[dict]) -> List[Dict[str, str]]:
-    """Return a list of error messages and contexts from Lighthouse results."""
-    errors: List[Dict[str, str]] = []
+def _make_issue(msg: str, ctx: str, tool: str) -> Issue:
+    """Return the compact record of one finding of ``tool``."""
+    return Issue(CATEGORIES.intern(_canonicalize_message(msg)), TOOL_BITS[tool], msg, ctx)
+
+
+def _dedupe(issues: Iterator[Issue]) -> List[Issue]:
+    """Drop findings with the same canonical message and context."""
     seen: set = set()
-    for entry in data:
-        lh = entry.get("lighthouse_result", entry)
-        audits = lh.get("audits", {})
-        for audit in audits.values():
-            score = audit.get("score")
-            if score is not None and score < 1:
-                title = audit.get("title", "")
-                details = audit.get("details", {})
-                items = details.get("items", [])
-                if items:
-                    for it in items:
-                        node = it.get("node", {})
-                        ctx = node.get("snippet", "")
-                        msg = node.get("explanation", title)
-                        key = (_canonicalize_message(msg), ctx)
-                        if key in seen:
-                            continue
-                        seen.add(key)
-                        errors.append({"message": msg, "context": ctx})
-                else:
-                    key = (_canonicalize_message(title), "")
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    errors.append({"message": title, "context": ""})
-    return errors
+    unique: List[Issue] = []
+    for issue in issues:
+        if issue.key not in seen:
+            seen.add(issue.key)
+            unique.append(issue)
+    return unique
+
+
+def _extract_pa11y_errors(data: List[dict]) -> List[Issue]:
+    """Return the findings of type ``error`` from Pa11y results."""
+
+    def _iter() -> Iterator[Issue]:
+        for entry in data:
+            for res in entry.get("results", []):
+                if res.get("type") == "error":
+                    yield _make_issue(res.get("message", ""), res.get("context", ""), "pa11y")
+
+    return _dedupe(_iter())
+
+
+def _extract_axe_errors(data: List[dict]) -> List[Issue]:
+    """Return the findings (one per violating node) from Axe results."""
+
+    def _iter() -> Iterator[Issue]:
+        for entry in data:
+            axe_result = entry.get("axe_result", {})
+            results = axe_result if isinstance(axe_result, list) else [axe_result]
+            for result in results:
+                for viol in result.get("violations", []):
+                    msg = viol.get("help", viol.get("description", ""))
+                    for node in viol.get("nodes", []):
+                        yield _make_issue(msg, node.get("html", ""), "axe")
+
+    return _dedupe(_iter())
+
+
+def _extract_lighthouse_errors(data: List[dict]) -> List[Issue]:
+    """Return the findings of failed audits from Lighthouse results."""
+
+    def _iter() -> Iterator[Issue]:
+        for entry in data:
+            lh = entry.get("lighthouse_result", entry)
+            audits = lh.get("audits", {})
+            for audit in audits.values():
+                score = audit.get("score")
+                if score is not None and score < 1:
+                    title = audit.get("title", "")
+                    details = audit.get("details", {})
+                    items = details.get("items", [])
+                    if items:
+                        for it in items:
+                            node = it.get("node", {})
+                            yield _make_issue(node.get("explanation", title), node.get("snippet", ""), "lighthouse")
+                    else:
+                        yield _make_issue(title, "", "lighthouse")
+
+    return _dedupe(_iter())
+
+
+def _entry_issues(entry: dict) -> List[Issue]:
+    """Return the merged findings (``All tools``) of a ``bewertung.json`` entry."""
+    issues: List[Issue] = []
+    for issue in entry.get("All tools", []):
+        msg = issue.get("message", "")
+        if msg:
+            issues.append(Issue(CATEGORIES.intern(_canonicalize_message(msg)), 0, msg, issue.get("context", "")))
+    return issues
 
 
 def _canonicalize_message(msg: str) -> str:
-    """Simplify the given message to a canonical form for deduplication."""
-    msg_l = msg.lower()
-    if "alt attribute" in msg_l or "alternative text" in msg_l or "missing alt" in msg_l:
-        return "images must have alternative text"
-    if "one main landmark" in msg_l:
-        return "document should have one main landmark"
-    if "landmark" in msg_l:
-        return "all page content should be contained by landmarks"
-    if "page title" in msg_l or "title element" in msg_l:
-        return "document must have a title element"
-    if "lang attribute" in msg_l or "document language" in msg_l:
-        return "document must have a language attribute"
-    if (
-        "no link content" in msg_l
-        or "discernible text" in msg_l
-        or "anchor element found with a valid href" in msg_l
-    ):
-        return "links must have discernible text"
-    if "form" in msg_l and "label" in msg_l:
-        return "form elements must have labels"
-    if "<label>" in msg_l and ("implicit" in msg_l or "explicit" in msg_l):
-        return "form elements must have labels"
-    if (
-        "accessible name" in msg_l
-        or "name available to an accessibility api" in msg_l
-        or "does not have accessible text" in msg_l
-    ):
-        return "element requires an accessible name"
-    if ("aria hidden" in msg_l and "focusable" in msg_l) or "focusable content should have tabindex" in msg_l:
-        return "aria-hidden element must not be focusable"
-    if "tabindex" in msg_l and "+" in msg_l:
-        return "avoid positive tabindex values"
-    if "frame" in msg_l and "tabindex" in msg_l:
-        return "frames must not remove focusable content"
-    if "color contrast" in msg_l:
-        return "elements must meet minimum color contrast ratio thresholds"
-    if "link has no styling" in msg_l or "relying on color" in msg_l:
-        return "links must be distinguishable without relying on color"
-    if "insufficient size" in msg_l or "tap target" in msg_l:
-        return "interactive elements must have sufficient size"
-    if "fieldset" in msg_l and "legend" in msg_l:
-        return "fieldsets must contain a legend element"
-    if "invalid autocomplete" in msg_l:
-        return "autocomplete attribute must be valid"
-    if "list element has direct children" in msg_l or "<ul> and <ol> must only directly contain" in msg_l:
-        return "lists must only contain allowed children"
-    if "scrollable" in msg_l and "focusable" in msg_l:
-        return "scrollable region must be focusable"
-    if "level-one heading" in msg_l:
-        return "page should contain a level-one heading"
-    if "aria" in msg_l and "attribute" in msg_l and "valid" in msg_l:
-        return "aria attributes must be valid"
-    if "interactive controls" in msg_l and "nested" in msg_l:
-        return "interactive controls must not be nested"
-    if "bypass" in msg_l and "repeated blocks" in msg_l:
-        return "page must have a skip link or landmark"
-    if "data cells" in msg_l and "table headers" in msg_l:
-        return "table cells must have headers"
-    if "duplicate id" in msg_l:
-        return "elements must have unique ids"
-    if "meta http-equiv\"refresh" in msg_l or "timed refresh" in msg_l:
-        return "page must not use timed refresh"
-    if "user-scalable\"=" in msg_l or "maximum-scale" in msg_l:
-        return "page must allow zooming"
-    if "aria role" in msg_l and (
-        "not allowed" in msg_l or "appropriate" in msg_l or "invalid" in msg_l
-    ):
-        return "element has an invalid aria role"
-    return msg_l.strip()
+    """Simplify the given message to a canonical form for deduplication.
+
+    The mapping is defined by the rules in ``canonical_rules.json`` (see
+    ``canonicalizer``); results are memoised per raw message.
+    """
+    return CANONICALIZER.canonicalize(msg)
 
 
 # ------------------------------------------------------------------------------
 # Data combination and serialisation
 
 def combine_errors(
-    pa11y_file: str = "pa11y_result.json",
-    axe_file: str = "axe_result.json",
-    lighthouse_file: str = "lighthouse_results.json",
+    pa11y_file: str = PA11Y_RESULTS,
+    axe_file: str = AXE_RESULTS,
+    lighthouse_file: str = LIGHTHOUSE_RESULTS,
     output: str = "bewertung.json",
+    inferred: Optional[Dict[str, str]] = None,
+    reused: Optional[List[dict]] = None,
 ) -> None:
     """Combine errors from all tools and write the unified list to ``output``.
 
     The resulting JSON is a list of objects where each entry contains the URL
     along with the issues found by each individual tool and a merged list
-    under the key ``All tools``.
+    under the key ``All tools``.  ``inferred`` maps pages that were not
+    audited to the representative of their template cluster; they are added
+    with a copy of the representative's findings and an ``inferred_from``
+    marker.  ``reused`` contains entries of unchanged pages from a previous
+    run (see ``audit_state``); they are included unless the page was audited
+    again.  Tools whose run failed for good (failure records with an
+    ``error`` key, see ``watchdog``) are listed under ``failed_tools``; pages
+    on which every tool failed are left out, so they are neither stored nor
+    scored, and are only reported.  The
+    findings are also written to an SQLite database next to ``output`` (see
+    ``issue_db``) that the reports query.
     """
-    pa11y_data = _load_json(pa11y_file)
-    axe_data = _load_json(axe_file)
-    lighthouse_data = _load_json(lighthouse_file)
-    grouped: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+    pa11y_data = _iter_json(pa11y_file)
+    axe_data = _iter_json(axe_file)
+    lighthouse_data = iter_lighthouse_entries(lighthouse_file)
+    grouped: Dict[str, Dict[str, List[Issue]]] = {}
+    failed: Dict[str, List[str]] = {}
+    audited: Set[str] = set()
     for entry in pa11y_data:
         url = entry.get("url")
         if not url:
             continue
         grouped.setdefault(url, {"pa11y": [], "axe": [], "lighthouse": []})
-        grouped[url]["pa11y"].extend(_extract_pa11y_errors([entry]))
+        if entry.get("error"):
+            failed.setdefault(url, []).append("pa11y")
+        else:
+            grouped[url]["pa11y"].extend(_extract_pa11y_errors([entry]))
+            audited.add(url)
     for entry in axe_data:
         url = entry.get("url")
         if not url:
             continue
         grouped.setdefault(url, {"pa11y": [], "axe": [], "lighthouse": []})
-        grouped[url]["axe"].extend(_extract_axe_errors([entry]))
+        if entry.get("error"):
+            failed.setdefault(url, []).append("axe")
+        else:
+            grouped[url]["axe"].extend(_extract_axe_errors([entry]))
+            audited.add(url)
     for entry in lighthouse_data:
         url = entry.get("url") or entry.get("lighthouse_result", {}).get("finalUrl") or entry.get("lighthouse_result", {}).get("requestedUrl")
         if not url:
             continue
         grouped.setdefault(url, {"pa11y": [], "axe": [], "lighthouse": []})
-        grouped[url]["lighthouse"].extend(_extract_lighthouse_errors([entry]))
+        if entry.get("error"):
+            failed.setdefault(url, []).append("lighthouse")
+        else:
+            grouped[url]["lighthouse"].extend(_extract_lighthouse_errors([entry]))
+            audited.add(url)
     result_list = []
     for url, data in grouped.items():
-        seen: set = set()
-        all_tools: List[Dict[str, str]] = []
-        for tool_name in ("pa11y", "axe", "lighthouse"):
-            for err in data[tool_name]:
-                msg = err.get("message", "")
-                ctx = err.get("context", "")
-                key = (_canonicalize_message(msg), ctx)
-                if key not in seen:
-                    seen.add(key)
-                    all_tools.append({"message": key[0], "context": ctx})
+        if url not in audited:
+            continue
+        all_tools = merge_issues(data[tool_name] for tool_name in ("pa11y", "axe", "lighthouse"))
         result_list.append(
             {
                 "URL": url,
-                "All tools": all_tools,
-                "pa11y": data["pa11y"],
-                "axe": data["axe"],
-                "lighthouse": data["lighthouse"],
+                "All tools": [issue.as_dict(canonical=True) for issue in all_tools],
+                "pa11y": [issue.as_dict() for issue in data["pa11y"]],
+                "axe": [issue.as_dict() for issue in data["axe"]],
+                "lighthouse": [issue.as_dict() for issue in data["lighthouse"]],
             }
         )
+        if url in failed:
+            result_list[-1]["failed_tools"] = failed[url]
+    partial = [url for url in failed if url in audited]
+    if partial:
+        print(f"{len(partial)} Seite(n) mit fehlgeschlagenen Tools, siehe 'failed_tools' in '{output}'.")
+    unaudited = [url for url in grouped if url not in audited]
+    if unaudited:
+        print(f"{len(unaudited)} Seite(n) ohne Ergebnis, da alle Tools fehlschlugen; sie werden nicht bewertet:")
+        for url in unaudited:
+            print(f"  {url}")
+    for entry in reused or []:
+        if entry.get("URL") not in grouped:
+            result_list.append(entry)
+    result_list = extrapolate_entries(result_list, inferred)
     try:
-        with open(output, "w", encoding="utf-8") as f:
-            json.dump(result_list, f, indent=2, ensure_ascii=False)
+        write_json(output, result_list)
         print(f"Kombinierte Fehler in '{output}' gespeichert.")
+        IssueDB.build(result_list, issue_db_path(output), _canonicalize_message).close()
     except Exception as exc:
         print(f"Fehler beim Speichern der kombinierten Fehler: {exc}")
 
 
+def _iter_json(path: str) -> Iterator[dict]:
+    """Yield the entries of a result file one at a time.
+
+    JSON-lines stores (``.jsonl``) are streamed line by line, so only one
+    entry is held in memory at a time.  Other files are loaded as JSON.
+    """
+    if path.endswith(".jsonl"):
+        return iter_entries(path)
+    return iter(_load_json(path))
+
+
 def _load_json(path: str) -> List[dict]:
     """Load a JSON file and return its contents or an empty list."""
+    if path.endswith(".jsonl"):
+        return list(iter_entries(path))
     try:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -593,17 +768,25 @@ def _load_json(path: str) -> List[dict]:
 def delete_old_results() -> None:
     """Remove existing result files if they exist."""
     temp_files = [
-        "axe_result.json",
-        "lighthouse_results.json",
-        "pa11y_result.json",
+        AXE_RESULTS,
+        LIGHTHOUSE_RESULTS,
+        PA11Y_RESULTS,
+        index_path(AXE_RESULTS),
+        index_path(LIGHTHOUSE_RESULTS),
+        index_path(PA11Y_RESULTS),
         "bewertung.json",
+        issue_db_path("bewertung.json"),
         "gefundene_urls.txt",
+        LASTMOD_FILE,
+        JOURNAL_FILE,
+        TIMINGS_FILE,
         "lh_tmp.json",
         "visualization_summary.txt",
         "tool_comparison.png",
         "common_errors.png",
         "score.json",
         "scores_per_url.json",
+        "template_clusters.json",
         "scores_visualization_summary.txt",
         "scores_per_url_chart.png",
         "total_deduction_chart.png",
@@ -627,7 +810,8 @@ def delete_old_results() -> None:
 
 def delete_results() -> None:
     """Delete tool result files (Pa11y, Axe, Lighthouse)."""
-    temp_files = ["axe_result.json", "lighthouse_results.json", "pa11y_result.json"]
+    temp_files = [AXE_RESULTS, LIGHTHOUSE_RESULTS, PA11Y_RESULTS]
+    temp_files += [index_path(path) for path in temp_files]
     for path in temp_files:
         if os.path.exists(path):
             try:
@@ -646,6 +830,11 @@ def _load_bewertung(path: Path = Path("bewertung.json")) -> List[dict]:
     return _load_json(str(path))
 
 
+def _open_issue_db(path: Path = Path("bewertung.json")) -> IssueDB:
+    """Open the findings database of ``path``, building it if it is missing or stale."""
+    return open_issue_db(str(path), _canonicalize_message)
+
+
 def _count_issues(entries: List[dict]) -> List[Dict[str, object]]:
     """Return a list with the number of issues per tool for each URL."""
     counts: List[Dict[str, object]] = []
@@ -677,7 +866,7 @@ def _count_common_errors(entries: List[dict]) -> Counter:
 
 def _write_summary_text(counts: List[Dict[str, object]], counter: Counter, output: Path = Path("visualization_summary.txt")) -> None:
     """Write a textual summary of the visualisation data for screen readers."""
-    with output.open("w", encoding="utf-8") as f:
+    with atomic_write(str(output)) as f:
         f.write("Probleme pro Tool und Seite:\n")
         for c in counts:
             f.write(
@@ -690,6 +879,8 @@ def _write_summary_text(counts: List[Dict[str, object]], counter: Counter, outpu
 
 def _plot_tool_comparison(counts: List[Dict[str, object]], output: Path = Path("tool_comparison.png")) -> None:
     """Create a bar chart comparing the number of issues per tool per page."""
+    import matplotlib.pyplot as plt
+
     labels = [c["url"] for c in counts]
     pa11y = [c["pa11y"] for c in counts]
     axe = [c["axe"] for c in counts]
@@ -720,6 +911,8 @@ def _plot_tool_comparison(counts: List[Dict[str, object]], output: Path = Path("
 
 def _plot_common_errors(counter: Counter, output: Path = Path("common_errors.png"), top_n: int = 10) -> None:
     """Plot the most frequent accessibility issues across all tools and pages."""
+    import matplotlib.pyplot as plt
+
     most_common = counter.most_common(top_n)
     labels = [m[0][:50] + ("..." if len(m[0]) > 50 else "") for m in most_common]
     values = [m[1] for m in most_common]
@@ -735,9 +928,9 @@ def _plot_common_errors(counter: Counter, output: Path = Path("common_errors.png
 
 def visualisation() -> None:
     """Generate visualisations for the combined error data and per‑URL scores."""
-    entries = _load_bewertung()
-    counts = _count_issues(entries)
-    counter = _count_common_errors(entries)
+    with _open_issue_db() as db:
+        counts = db.counts_per_url()
+        counter = Counter(dict(db.top_messages(10)))
     _plot_tool_comparison(counts)
     _plot_common_errors(counter)
     _write_summary_text(counts, counter)
@@ -763,144 +956,80 @@ def _count_all_tool_messages(entries: List[dict]) -> Counter:
     """Count how often each canonical message occurs across all pages."""
     counter: Counter = Counter()
     for entry in entries:
-        for issue in entry.get("All tools", []):
-            msg = issue.get("message", "")
-            if msg:
-                counter[_canonicalize_message(msg)] += 1
-    return counter
+        counter.update(issue.category for issue in _entry_issues(entry))
+    return Counter({CATEGORIES.name(category): count for category, count in counter.items()})
 
 
 def accessibility_score(entries: List[dict]) -> Tuple[float, float, List[Dict[str, object]]]:
     """Compute a normalised accessibility score across all pages."""
-    counts = _count_all_tool_messages(entries)
-    total_issues = sum(counts.values())
-    if total_issues == 0:
-        return 100.0, 0.0, []
-    if ISSUE_CATEGORIES:
-        max_weight = max(
-            info.get("severity", DEFAULT_SEVERITY) * info.get("type_factor", DEFAULT_TYPE_FACTOR)
-            for info in ISSUE_CATEGORIES.values()
-        )
-    else:
-        max_weight = DEFAULT_SEVERITY * DEFAULT_TYPE_FACTOR
-    if max_weight <= 0:
-        max_weight = 1.0
-    scaling_factor = 100.0 / max_weight
-    details: List[Dict[str, object]] = []
-    total_penalty = 0.0
-    for key, freq in counts.items():
-        if freq == 0:
-            continue
-        info = ISSUE_CATEGORIES.get(
-            key, {"severity": DEFAULT_SEVERITY, "type_factor": DEFAULT_TYPE_FACTOR, "label": key}
-        )
-        severity = info.get("severity", DEFAULT_SEVERITY)
-        type_factor = info.get("type_factor", DEFAULT_TYPE_FACTOR)
-        label = info.get("label", key)
-        ratio = freq / total_issues
-        deduction = severity * type_factor * ratio * scaling_factor
-        total_penalty += deduction
-        details.append(
-            {
-                "label": label,
-                "severity": severity,
-                "frequency": freq,
-                "type_factor": type_factor,
-                "ratio": ratio,
-                "deduction": deduction,
-            }
-        )
-    details.sort(key=lambda d: d["deduction"], reverse=True)
-    score = max(0.0, 100.0 - total_penalty)
-    return round(score, 1), round(total_penalty, 1), details
+    return _score_counts(_count_all_tool_messages(entries))
+
+
+def _score_counts(counts: Dict[str, int]) -> Tuple[float, float, List[Dict[str, object]]]:
+    """Compute the overall score from the number of findings per category."""
+    return SCORING_ENGINE.site_score(counts)
 
 
 def accessibility_score_per_url(entries: List[dict]) -> List[Dict[str, object]]:
     """Compute the score and details for each individual URL."""
-    results: List[Dict[str, object]] = []
-    if ISSUE_CATEGORIES:
-        max_weight = max(
-            info.get("severity", DEFAULT_SEVERITY) * info.get("type_factor", DEFAULT_TYPE_FACTOR)
-            for info in ISSUE_CATEGORIES.values()
+    return _score_histograms(
+        (
+            entry.get("URL") or entry.get("url"),
+            entry.get("inferred_from"),
+            Counter(CATEGORIES.name(issue.category) for issue in _entry_issues(entry)),
         )
-    else:
-        max_weight = DEFAULT_SEVERITY * DEFAULT_TYPE_FACTOR
-    if max_weight <= 0:
-        max_weight = 1.0
-    scaling_factor = 100.0 / max_weight
-    for entry in entries:
-        url = entry.get("URL") or entry.get("url")
-        issues = entry.get("All tools", [])
-        counts: Counter = Counter()
-        for issue in issues:
-            msg = issue.get("message", "")
-            if msg:
-                key = _canonicalize_message(msg)
-                counts[key] += 1
-        total_issues = sum(counts.values())
-        if total_issues == 0:
-            results.append({"url": url, "score": 100.0, "total_deduction": 0.0, "issues": []})
-            continue
-        total_penalty = 0.0
-        details: List[Dict[str, object]] = []
-        for key, freq in counts.items():
-            info = ISSUE_CATEGORIES.get(
-                key, {"severity": DEFAULT_SEVERITY, "type_factor": DEFAULT_TYPE_FACTOR, "label": key}
-            )
-            severity = info.get("severity", DEFAULT_SEVERITY)
-            type_factor = info.get("type_factor", DEFAULT_TYPE_FACTOR)
-            label = info.get("label", key)
-            ratio = freq / total_issues
-            deduction = severity * type_factor * ratio * scaling_factor
-            total_penalty += deduction
-            details.append(
-                {
-                    "label": label,
-                    "severity": severity,
-                    "frequency": freq,
-                    "type_factor": type_factor,
-                    "deduction": round(deduction, 1),
-                }
-            )
-        details.sort(key=lambda d: d["deduction"], reverse=True)
-        score = max(0.0, 100.0 - total_penalty)
-        results.append(
-            {
-                "url": url,
-                "score": round(score, 1),
-                "total_deduction": round(total_penalty, 1),
-                "issues": details,
-            }
-        )
-    return results
+        for entry in entries
+    )
+
 
+def _score_histograms(
+    histograms: Iterable[Tuple[Optional[str], Optional[str], Dict[str, int]]]
+) -> List[Dict[str, object]]:
+    """Compute the per-URL scores from ``(url, inferred_from, counts)`` tuples."""
+    return SCORING_ENGINE.score_per_url(histograms)
 
-def print_scores_per_url() -> None:
-    """Print the accessibility scores for all stored URLs and write to JSON."""
-    entries = _load_bewertung()
-    results = accessibility_score_per_url(entries)
+
+def print_scores_per_url(charts: bool = True, path: Path = Path("bewertung.json")) -> None:
+    """Print the accessibility scores for all URLs of ``path`` and write to JSON.
+
+    With ``charts`` a score chart is generated for every URL as well.
+    """
+    with _open_issue_db(path) as db:
+        results = _score_histograms(db.histograms())
     print("\nScores pro URL:")
     for res in results:
-        print(f"{res['url']}: Score = {res['score']:.1f}, Gesamtabzug = {res['total_deduction']:.1f}")
+        hinweis = f" (abgeleitet von {res['inferred_from']})" if res.get("inferred") else ""
+        print(f"{res['url']}: Score = {res['score']:.1f}, Gesamtabzug = {res['total_deduction']:.1f}{hinweis}")
         for d in res["issues"]:
             print(
                 f"  - {d['label']}: Schweregrad {d['severity']} , Häufigkeit {d['frequency']} , "
                 f"Typ‑Faktor {d['type_factor']} = {d['deduction']:.1f}"
             )
-    with open("scores_per_url.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    write_json("scores_per_url.json", results)
 
-    # Generate a score chart for each URL
+    if charts:
+        plot_scores_per_url(results)
+
+
+def plot_scores_per_url(results: Optional[List[Dict[str, object]]] = None) -> None:
+    """Generate a score chart for each URL of ``scores_per_url.json``."""
+    if results is None:
+        try:
+            with open("scores_per_url.json", "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            print("Keine Daten in scores_per_url.json gefunden.")
+            return
     for idx, res in enumerate(results, start=1):
         url = res.get('url', '')
         issues = res.get('issues', [])
         _plot_url_issue_details(url, issues, idx)
 
 
-def print_score_and_prioritization() -> None:
-    """Print a prioritised list of issues and the overall score."""
-    entries = _load_bewertung()
-    score, total, details = accessibility_score(entries)
+def print_score_and_prioritization(path: Path = Path("bewertung.json")) -> None:
+    """Print a prioritised list of the issues in ``path`` and the overall score."""
+    with _open_issue_db(path) as db:
+        score, total, details = _score_counts(dict(db.category_counts()))
     print("Priorisierte Probleme:")
     for d in details:
         print(
@@ -933,6 +1062,8 @@ def _plot_url_issue_details(url: str, issues: List[Dict[str, object]], index: in
     ``_plot_score_details`` but on a per‑page basis.  The file is saved
     directly into the current working directory.
     """
+    import matplotlib.pyplot as plt
+
     if not issues:
         return
     # Take the top_n issues by deduction
@@ -961,6 +1092,8 @@ def _visualise_scores_per_url(file_path: str = "scores_per_url.json") -> None:
     accessibility score of each URL and one for the total deduction.  It
     additionally writes a summary text for screen readers.
     """
+    import matplotlib.pyplot as plt
+
     if not os.path.exists(file_path):
         return
     try:
@@ -1005,36 +1138,187 @@ def _visualise_scores_per_url(file_path: str = "scores_per_url.json") -> None:
     fig2.savefig("total_deduction_chart.png", bbox_inches="tight")
     print("Diagramm der Gesamtabzüge pro Seite wurde in total_deduction_chart.png gespeichert.")
     # Write a summary text for screen readers
-    with open("scores_visualization_summary.txt", "w", encoding="utf-8") as f:
+    with atomic_write("scores_visualization_summary.txt") as f:
         f.write("Barrierefreiheits‑Scores und Gesamtabzüge pro Seite:\n")
         for num, url, score, ded in zip(numbers, urls, scores, deductions):
             f.write(f"{num}: {url} – Score: {score:.1f}, Gesamtabzug: {ded:.1f}\n")
 
 
+def collect_pages(
+    start_url: str,
+    template_clustering: bool = TEMPLATE_CLUSTERING,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> Tuple[List[str], Dict[str, str]]:
+    """Crawl ``start_url`` and return the pages to audit and the inferred pages.
+
+    The second value maps pages that are not audited themselves to the
+    representative of their template cluster; it is empty unless
+    ``template_clustering`` is enabled.
+    """
+    clusters = TemplateClusters() if template_clustering else None
+    gefunden = [start_url] + finde_interne_links(
+        start_url, max_depth=max_depth, max_pages=max_pages, on_page=clusters.add if clusters else None
+    )
+    # Collapse fragment, slash, port, query and redirect variants so every
+    # document is audited only once.
+    seiten = canonicalize_urls(gefunden)
+    print(f"\nGefundene Seiten: {len(seiten)} ({len(gefunden) - len(seiten)} Duplikate entfernt)")
+    inferred: Dict[str, str] = {}
+    if clusters is not None:
+        clusters.fill_missing(seiten)
+        clusters.save(seiten)
+        seiten, inferred = clusters.select(seiten, DEFAULT_REPRESENTATIVES)
+        print(f"Template-Cluster: {len(seiten)} Seiten werden geprüft, {len(inferred)} werden abgeleitet.")
+    return seiten, inferred
+
+
+def audit_pages(
+    urls: List[str],
+    use_daemon: bool = True,
+    incremental: bool = INCREMENTAL_AUDIT,
+    use_cache: bool = AUDIT_CACHE,
+    announce: Optional[str] = None,
+    resume: bool = False,
+    inferred: Optional[Dict[str, str]] = None,
+    metrics_textfile: Optional[str] = METRICS_TEXTFILE,
+) -> Dict[str, object]:
+    """Run all tools against ``urls`` and return what :func:`combine_run` needs.
+
+    The returned dict lists the URLs whose results are reused from the last
+    run (``reused``) together with the validators and tool versions used to
+    update the audit state, and the entries of ``inferred`` whose
+    representative is one of ``urls``.  ``announce`` is printed right before
+    the tools start.
+
+    The run is recorded in ``JOURNAL_FILE`` (see ``checkpoint``).  With
+    ``resume``, an interrupted run is continued instead: its pages and the
+    results of its change check are read from the journal, ``urls`` is
+    ignored and only the tool runs that did not finish are repeated.
+
+    The resource usage of all tool runs is written to ``TIMINGS_FILE`` and,
+    if ``metrics_textfile`` is set, as Prometheus metrics to that file.
+    """
+    journal = RunJournal.load() if resume else RunJournal()
+    if resume and not journal.interrupted:
+        print("Kein unterbrochener Lauf gefunden, starte einen neuen Lauf.")
+        journal = RunJournal()
+    recorder = MetricsRecorder.load() if journal.interrupted else MetricsRecorder()
+    # Start the persistent Node worker once for the whole run; fall back to
+    # one ``npx`` call per tool if it cannot be started.
+    daemon = None
+    if use_daemon:
+        try:
+            daemon = AuditDaemon(
+                concurrency=MAX_CONCURRENT_PAGES * MAX_CONCURRENT_TOOLS,
+                browsers=MAX_CONCURRENT_PAGES,
+            ).start()
+        except DaemonError as exc:
+            print(f"{exc} Verwende npx für jeden Test.")
+    state = AuditState.load() if incremental else None
+    cache = AuditCache() if use_cache else None
+    run: Dict[str, object] = {"incremental": state is not None, "reused": [], "validators": {}, "versions": {}}
+    hashes: Dict[str, str] = {}
+    try:
+        if journal.interrupted:
+            urls, run, hashes = journal.plan["urls"], journal.plan["run"], journal.plan["hashes"]
+            _prepare_resume(journal, [PA11Y_RESULTS, AXE_RESULTS, LIGHTHOUSE_RESULTS])
+            done = len(urls) - len(journal.pending(urls, list(TOOL_OPTIONS)))
+            print(f"Setze unterbrochenen Lauf fort: {done} von {len(urls)} Seite(n) bereits geprüft.")
+        else:
+            if inferred is not None:
+                run["inferred"] = limit_inferred(inferred, urls)
+            if state is not None or cache is not None:
+                run["versions"] = tool_versions(daemon)
+            if state is not None:
+                urls, run["reused"], run["validators"] = state.check(urls, run["versions"], lastmod=_load_lastmod(urls))
+                hashes = {url: info["body_hash"] for url, info in run["validators"].items() if info.get("body_hash")}
+                reused = len(state.entries(run["reused"]))
+                print(f"{reused} unveränderte Seite(n) werden aus dem letzten Lauf übernommen.")
+            elif cache is not None:
+                hashes = fetch_content_hashes(urls)
+            journal.start({"urls": urls, "run": run, "hashes": hashes})
+        if announce:
+            print(announce)
+        accessibility_checks(
+            urls,
+            daemon=daemon,
+            cache=cache,
+            content_hashes=hashes,
+            versions=run["versions"] if cache is not None else None,
+            journal=journal,
+            recorder=recorder,
+        )
+        journal.finish()
+    finally:
+        if daemon is not None:
+            daemon.close()
+        recorder.save()
+        recorder.print_summary()
+        if metrics_textfile:
+            recorder.write_prometheus(metrics_textfile)
+    return run
+
+
+def _load_lastmod(urls: List[str]) -> Dict[str, str]:
+    """Return the sitemap ``lastmod`` dates of the last crawl for ``urls``.
+
+    The dates are stored by canonical URL (see ``url_canonical``).
+    """
+    try:
+        with open(LASTMOD_FILE, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    keys = {url: canonicalize_url(url) for url in urls}
+    return {url: stored[key] for url, key in keys.items() if key in stored}
+
+
+def combine_run(run: Dict[str, object], inferred: Optional[Dict[str, str]] = None) -> None:
+    """Combine the results of an :func:`audit_pages` run and update the audit state."""
+    state = AuditState.load() if run.get("incremental") else None
+    reused = state.entries(run.get("reused", [])) if state is not None else []
+    combine_errors(inferred=inferred if inferred is not None else run.get("inferred"), reused=reused)
+    if state is not None:
+        state.update(_load_bewertung(), run.get("validators", {}), run.get("versions", {}))
+        state.save()
+
+
 if __name__ == "__main__":
     # Ensure Node.js meets the minimum version before starting tests
     if not _check_node_version():
         exit(1)
-    delete_old_results()
-    user_url = input("Gib eine URL ein (inkl. https://): ").strip()
-    if not user_url.startswith("http"):
-        print("Bitte mit http:// oder https:// beginnen.")
-    else:
-        seiten = [user_url] + finde_interne_links(user_url)
-        print(f"\nGefundene Seiten: {len(seiten)}")
+    run = None
+    if RunJournal.load().interrupted:
+        antwort = input("Ein unterbrochener Lauf wurde gefunden. Fortsetzen? (j/n): ").strip().lower()
+        if antwort.startswith("j"):
+            run = audit_pages([], resume=True)
+    if run is None:
+        delete_old_results()
+        user_url = input("Gib eine URL ein (inkl. https://): ").strip()
+        if not user_url.startswith("http"):
+            print("Bitte mit http:// oder https:// beginnen.")
+            exit(1)
+        eingabe = input(f"Bis zu welcher Linktiefe soll gesucht werden? (Enter für {DEFAULT_MAX_DEPTH}): ").strip()
+        try:
+            tiefe = int(eingabe) if eingabe else DEFAULT_MAX_DEPTH
+        except ValueError:
+            print(f"Ungültige Zahl. Es wird die Linktiefe {DEFAULT_MAX_DEPTH} verwendet.")
+            tiefe = DEFAULT_MAX_DEPTH
+        seiten, inferred = collect_pages(user_url, max_depth=max(1, tiefe))
         try:
             anzahl_seiten = int(input("Wie viele Seiten sollen getestet werden? (0 für alle): ").strip())
         except ValueError:
             print("Ungültige Zahl. Es werden alle Seiten getestet.")
             anzahl_seiten = 0
+        zu_testen = seiten if anzahl_seiten == 0 else seiten[:anzahl_seiten]
         if anzahl_seiten == 0:
-            print("Starte Barrierefreiheits‑Checks für alle Seiten …")
-            accessibility_checks(seiten)
+            hinweis = "Starte Barrierefreiheits‑Checks für alle Seiten …"
         else:
-            print(f"Starte Barrierefreiheits‑Checks für {anzahl_seiten} Seite(n) …")
-            accessibility_checks(seiten[:anzahl_seiten])
-        combine_errors()
-        delete_results()
-        visualisation()
-        print_score_and_prioritization()
-        print_scores_per_url()
\ No newline at end of file
+            hinweis = f"Starte Barrierefreiheits‑Checks für {anzahl_seiten} Seite(n) …"
+        run = audit_pages(zu_testen, announce=hinweis, inferred=inferred)
+    combine_run(run)
+    delete_results()
+    visualisation()
+    print_score_and_prioritization()
+    print_scores_per_url()
@@ -0,0 +1,177 @@
+"""Content-addressed on-disk cache for raw audit results.
+
+A result is stored under the hash of everything that determines it: the
+canonical URL, the hash of the page content, the tool, the tool version and
+the tool options.  When the same page content is audited again – in a later
+run, on another site serving the same page or after a crash – the stored
+result is returned without launching a browser.
+
+The cache lives in a directory of JSON files.  Entries older than ``ttl``
+seconds are ignored and removed; when the directory grows beyond
+``max_bytes`` the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+CACHE_DIR = ".audit_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Name of each tool in the version mapping returned by
+# ``audit_state.tool_versions``.
+VERSION_KEYS = {"pa11y": "pa11y", "axe": "axe-core", "lighthouse": "lighthouse"}
+
+ToolRunner = Callable[[str], Optional[dict]]
+
+
+class AuditCache:
+    """Size-capped LRU/TTL cache of tool results on local disk."""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, content_hash: str, tool: str, version: Optional[str], options: Sequence[str] = ()) -> str:
+        """Return the cache key for one audit of one page content."""
+        material = json.dumps([url, content_hash, tool, version, list(options)], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _entries(self) -> List[os.DirEntry]:
+        files = []
+        for sub in os.scandir(self.directory):
+            if sub.is_dir():
+                files.extend(f for f in os.scandir(sub.path) if f.name.endswith(".json"))
+        return files
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or ``None``.
+
+        A hit refreshes the entry's modification time, which is used as the
+        last-access time for LRU eviction.
+        """
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key`` and evict old entries if necessary."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            try:
+                previous = os.path.getsize(path)
+            except OSError:
+                previous = 0
+            os.replace(tmp_path, path)
+            if self._size is not None:
+                self._size += size - previous
+        self.evict()
+
+    def _remove(self, path: str) -> None:
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._size is not None:
+                self._size -= size
+
+    def evict(self) -> None:
+        """Remove expired entries and, if still too large, the least recently used."""
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+            now = time.time()
+            files = []
+            total = 0
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            files.sort()
+            for _mtime, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+            self._size = total
+
+
+def _is_failure(entry: dict) -> bool:
+    """Return True for entries that only record a failed tool run."""
+    return bool(entry.get("error")) or entry.get("axe_result") == {}
+
+
+def cached_tools(
+    tools: Dict[str, ToolRunner],
+    cache: AuditCache,
+    content_hashes: Dict[str, str],
+    versions: Dict[str, Optional[str]],
+    options: Dict[str, Sequence[str]],
+    canonicalize: Callable[[str], str] = lambda url: url,
+) -> Dict[str, ToolRunner]:
+    """Wrap ``tools`` so that results are served from and stored in ``cache``.
+
+    Pages without a known content hash are always audited, because their
+    result cannot be keyed safely.  Failed runs are not cached.
+    """
+
+    def _wrap(name: str, runner: ToolRunner) -> ToolRunner:
+        def run(url: str) -> Optional[dict]:
+            content_hash = content_hashes.get(url)
+            if content_hash is None:
+                return runner(url)
+            key = AuditCache.key(
+                canonicalize(url), content_hash, name, versions.get(VERSION_KEYS.get(name, name)), options.get(name, ())
+            )
+            hit = cache.get(key)
+            if hit is not None:
+                print(f"{name} (aus dem Cache): {url}")
+                return hit
+            entry = runner(url)
+            if entry is not None and not _is_failure(entry):
+                cache.put(key, entry)
+            return entry
+
+        return run
+
+    return {name: _wrap(name, runner) for name, runner in tools.items()}
@@ -0,0 +1,185 @@
+"""Persistent per-URL audit state for incremental re-audits.
+
+For every audited page the state file stores the HTTP validators (``ETag``,
+``Last-Modified``), a hash of the normalised response body, the versions of
+the audit tools and the combined findings of that page (its entry from
+``bewertung.json``).  On the next run each page is requested conditionally
+first; only pages whose content changed, or that were audited with other
+tool versions, are passed to Pa11y/axe/Lighthouse again.  The stored
+findings are reused for all other pages.  Pages whose sitemap ``lastmod``
+is unchanged are not requested at all.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from checkpoint import write_json
+from ratelimit import get_limiter, parse_retry_after
+
+STATE_FILE = "audit_state.json"
+
+if os.name == "nt":
+    NPX = "npx.cmd"
+else:
+    NPX = "npx"
+
+# Parts of a page that change on every request without changing its content.
+_VOLATILE = [
+    re.compile(r"<!--.*?-->", re.S),
+    re.compile(r"""(nonce|sesskey|csrf[-_]?token|_token)(=|["']\s*:\s*|\s*=\s*["'])["']?[^"'&\s>]*""", re.I),
+    re.compile(r"\s+"),
+]
+
+
+def normalize_body(html: str) -> str:
+    """Remove comments, per-request tokens and whitespace differences."""
+    for pattern in _VOLATILE[:-1]:
+        html = pattern.sub("", html)
+    return _VOLATILE[-1].sub(" ", html).strip()
+
+
+def body_hash(html: str) -> str:
+    """Return the SHA-256 of the normalised ``html``."""
+    return hashlib.sha256(normalize_body(html).encode("utf-8")).hexdigest()
+
+
+def tool_versions(daemon=None) -> Dict[str, Optional[str]]:
+    """Return the versions of the audit tools.
+
+    The versions reported by a running :class:`node_daemon.AuditDaemon` are
+    used if available; otherwise each CLI is asked for its version.
+    """
+    if daemon is not None and daemon.versions:
+        return {tool: daemon.versions.get(tool) for tool in ("pa11y", "axe-core", "lighthouse")}
+    versions: Dict[str, Optional[str]] = {}
+    for tool, package in (("pa11y", "pa11y"), ("axe-core", "@axe-core/cli"), ("lighthouse", "lighthouse")):
+        try:
+            result = subprocess.run([NPX, package, "--version"], capture_output=True, text=True, timeout=120)
+            versions[tool] = (result.stdout.strip() or None) if result.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired):
+            versions[tool] = None
+    return versions
+
+
+def fetch_content_hashes(urls: List[str], concurrency: int = 16, timeout: float = 10.0) -> Dict[str, str]:
+    """Fetch ``urls`` and return the hash of each page that could be loaded."""
+    from crawler import fetch_pages
+
+    results = fetch_pages(urls, concurrency=concurrency, timeout=timeout)
+    return {url: body_hash(result[1]) for url, result in zip(urls, results) if result is not None}
+
+
+class AuditState:
+    """Validators, content hashes and findings of previously audited pages."""
+
+    def __init__(self, path: str = STATE_FILE) -> None:
+        self.path = path
+        self.pages: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: str = STATE_FILE) -> "AuditState":
+        state = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state.pages = json.load(f).get("pages", {})
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            state.pages = {}
+        return state
+
+    def save(self) -> None:
+        write_json(self.path, {"pages": self.pages})
+
+    def check(
+        self,
+        urls: List[str],
+        versions: Dict[str, Optional[str]],
+        timeout: float = 10.0,
+        concurrency: int = 16,
+        lastmod: Optional[Dict[str, str]] = None,
+    ) -> Tuple[List[str], List[str], Dict[str, dict]]:
+        """Find out which of ``urls`` changed since they were last audited.
+
+        Returns ``(changed, unchanged, validators)`` where ``validators``
+        holds the fresh ``etag``/``last_modified``/``body_hash`` of every
+        page that could be fetched.  Pages without stored findings or with
+        different tool versions always count as changed.  ``lastmod`` maps
+        URLs to their sitemap ``lastmod``; a page whose ``lastmod`` equals the
+        one stored with its findings counts as unchanged without a request.
+        """
+        lastmod = lastmod or {}
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        limiter = get_limiter()
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        def _check(url: str) -> Tuple[bool, dict]:
+            previous = self.pages.get(url)
+            reusable = previous is not None and previous.get("entry") and previous.get("tool_versions") == versions
+            if reusable and lastmod.get(url) and previous.get("lastmod") == lastmod[url]:
+                return False, {key: previous.get(key) for key in ("etag", "last_modified", "body_hash", "lastmod")}
+            headers = {}
+            if reusable:
+                if previous.get("etag"):
+                    headers["If-None-Match"] = previous["etag"]
+                if previous.get("last_modified"):
+                    headers["If-Modified-Since"] = previous["last_modified"]
+            with limiter.request(url) as ticket:
+                try:
+                    response = session.get(url, headers=headers, timeout=timeout)
+                except requests.RequestException as exc:
+                    ticket.failed = True
+                    print(f"Fehler beim Abrufen der Seite {url}: {exc}")
+                    return True, {}
+                ticket.status = response.status_code
+                ticket.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if reusable and response.status_code == 304:
+                return False, {
+                    "etag": previous.get("etag"),
+                    "last_modified": previous.get("last_modified"),
+                    "body_hash": previous.get("body_hash"),
+                    "lastmod": lastmod.get(url),
+                }
+            info = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body_hash": body_hash(response.text),
+                "lastmod": lastmod.get(url),
+            }
+            changed = not reusable or info["body_hash"] != previous.get("body_hash")
+            return changed, info
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                checked = list(pool.map(_check, urls))
+        finally:
+            session.close()
+        changed = [url for url, (flag, _) in zip(urls, checked) if flag]
+        unchanged = [url for url, (flag, _) in zip(urls, checked) if not flag]
+        validators = {url: info for url, (_, info) in zip(urls, checked) if info}
+        return changed, unchanged, validators
+
+    def entries(self, urls: List[str]) -> List[dict]:
+        """Return the stored ``bewertung.json`` entries of ``urls``."""
+        return [self.pages[url]["entry"] for url in urls if self.pages.get(url, {}).get("entry")]
+
+    def update(self, entries: List[dict], validators: Dict[str, dict], versions: Dict[str, Optional[str]]) -> None:
+        """Record the findings of freshly audited pages.
+
+        Entries that were inferred from a template representative are not
+        stored, because the page itself has never been audited, nor are
+        entries of pages on which a tool failed, so they are audited again.
+        """
+        for entry in entries:
+            url = entry.get("URL")
+            if not url or entry.get("inferred_from") or entry.get("failed_tools") or url not in validators:
+                continue
+            self.pages[url] = {**validators[url], "tool_versions": versions, "entry": entry}
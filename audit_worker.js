@@ -0,0 +1,377 @@
+#!/usr/bin/env node
+/*
+ * Long-lived audit worker for the accessibility analyzer.
+ *
+ * The Python side starts this script once per run and talks to it over a
+ * JSON-lines protocol on stdin/stdout:
+ *
+ *   request:  {"id": 1, "url": "https://example.org/", "engines": ["pa11y", "axe", "lighthouse"], "timeout": 120}
+ *   result:   {"id": 1, "engine": "pa11y", "ok": true, "result": [...]}
+ *   error:    {"id": 1, "engine": "axe", "ok": false, "error": "..."}
+ *   timeout:  {"id": 1, "engine": "axe", "ok": false, "timeout": true, "error": "..."}
+ *   done:     {"id": 1, "done": true}
+ *
+ * After start-up a single {"ready": true, "versions": {...}} line is written.
+ * Results are streamed as soon as each engine finishes.  The worker exits
+ * once stdin is closed and all pending jobs have finished.
+ *
+ * ``timeout`` (seconds, optional) is the budget of every engine run of the
+ * job.  The clock starts when the engine has got its tab, so time spent
+ * queued behind other jobs or other Lighthouse runs does not count.  An
+ * expired run is abandoned: its browser context is closed and its browser
+ * is retired, to be closed (or killed) once the other runs in it have
+ * finished (see BrowserPool).
+ *
+ * The result payloads have the same shape as the CLI tools produce:
+ * Pa11y's JSON reporter (list of issues), the list written by
+ * ``@axe-core/cli --save`` and the Lighthouse report (LHR).
+ */
+'use strict';
+
+const path = require('path');
+const readline = require('readline');
+const { createRequire } = require('module');
+const { pathToFileURL } = require('url');
+
+// Libraries may log to stdout, which would corrupt the protocol stream.
+const protocolOut = process.stdout.write.bind(process.stdout);
+console.log = console.error;
+console.info = console.error;
+
+// Milliseconds a browser context or a retired browser gets to close.
+const CLOSE_GRACE_MS = 5000;
+
+function send(message) {
+  protocolOut(JSON.stringify(message) + '\n');
+}
+
+class RunTimeout extends Error {}
+
+function parseArgs(argv) {
+  const options = { concurrency: 4, browsers: 1, maxPagesPerBrowser: 50 };
+  const flags = {
+    '--concurrency': 'concurrency',
+    '--browsers': 'browsers',
+    '--max-pages-per-browser': 'maxPagesPerBrowser',
+  };
+  for (let i = 0; i < argv.length; i++) {
+    const key = flags[argv[i]];
+    if (key) {
+      options[key] = Math.max(1, parseInt(argv[++i], 10) || 1);
+    }
+  }
+  return options;
+}
+
+// Resolve a module either from NODE_PATH/global installs or from the
+// dependencies of another package (e.g. puppeteer from pa11y).
+function resolveFrom(name, parents) {
+  try {
+    return require.resolve(name);
+  } catch (err) {
+    for (const parent of parents) {
+      try {
+        return createRequire(require.resolve(parent)).resolve(name);
+      } catch (ignored) {
+        // try next parent
+      }
+    }
+    throw err;
+  }
+}
+
+function packageVersion(name, parents) {
+  try {
+    let dir = path.dirname(resolveFrom(name, parents));
+    while (dir !== path.dirname(dir)) {
+      try {
+        const pkg = require(path.join(dir, 'package.json'));
+        if (pkg.name === name) {
+          return pkg.version;
+        }
+      } catch (ignored) {
+        // keep walking up
+      }
+      dir = path.dirname(dir);
+    }
+  } catch (ignored) {
+    // not installed
+  }
+  return null;
+}
+
+// Serialises calls of ``fn``; Lighthouse does not support concurrent runs
+// inside the same process.
+function serialised(fn) {
+  let tail = Promise.resolve();
+  return (...args) => {
+    const run = tail.then(() => fn(...args));
+    tail = run.catch(() => {});
+    return run;
+  };
+}
+
+async function loadEngines() {
+  const pa11y = require(resolveFrom('pa11y', []));
+  const puppeteer = require(resolveFrom('puppeteer', ['pa11y']));
+  const axeSource = require(resolveFrom('axe-core', ['@axe-core/cli', 'lighthouse'])).source;
+  const lighthouse = (await import(pathToFileURL(resolveFrom('lighthouse', [])).href)).default;
+  return { pa11y, puppeteer, axeSource, lighthouse };
+}
+
+/*
+ * Pool of headless Chrome instances shared by all engines.
+ *
+ * Every browser is started once with a remote debugging port and keeps its
+ * running between audits.  Every engine run gets a tab in a browser context
+ * of its own, which is closed when the run ends, so concurrent and
+ * consecutive audits share no cookies, cache or storage.  After
+ * ``maxPagesPerBrowser`` audits, or after a run in it has expired, a browser
+ * is retired and replaced by a fresh one; it is closed once its last lease
+ * has been released (and killed if it does not close), which keeps memory
+ * leaks and hung renderers of long runs in check without disturbing the
+ * audits still running in it.
+ */
+class BrowserPool {
+  constructor(puppeteer, size, maxPagesPerBrowser) {
+    this.puppeteer = puppeteer;
+    this.size = size;
+    this.maxPagesPerBrowser = maxPagesPerBrowser;
+    this.slots = [];
+  }
+
+  // Pick the least busy browser that still accepts work, starting new ones
+  // until the pool is full.  Book-keeping happens synchronously so that
+  // concurrent callers never exceed the pool size.
+  slot() {
+    const open = this.slots.filter((slot) => !slot.retiring);
+    if (open.length < this.size) {
+      const slot = { browser: null, active: 0, served: 0, retiring: false };
+      slot.ready = this.puppeteer
+        .launch({
+          headless: true,
+          args: ['--remote-debugging-port=0', '--no-first-run', '--no-default-browser-check'],
+        })
+        .then((browser) => {
+          slot.browser = browser;
+          return slot;
+        });
+      this.slots.push(slot);
+      return slot;
+    }
+    return open.reduce((best, slot) => (slot.active < best.active ? slot : best));
+  }
+
+  async acquire() {
+    const slot = this.slot();
+    slot.active++;
+    slot.served++;
+    if (slot.served >= this.maxPagesPerBrowser) {
+      slot.retiring = true;
+    }
+    try {
+      await slot.ready;
+      const browser = slot.browser;
+      // ``createIncognitoBrowserContext`` is the name before Puppeteer 22.
+      const context = await (browser.createBrowserContext || browser.createIncognitoBrowserContext).call(browser);
+      let page;
+      try {
+        page = await context.newPage();
+      } catch (err) {
+        await context.close().catch(() => {});
+        throw err;
+      }
+      return { slot, context, page, port: Number(new URL(browser.wsEndpoint()).port) };
+    } catch (err) {
+      slot.active--;
+      this.slots = this.slots.filter((other) => other !== slot);
+      throw err;
+    }
+  }
+
+  // Wait up to CLOSE_GRACE_MS for ``action`` (returning a promise); returns
+  // whether it settled in time.
+  async within(action) {
+    let timer;
+    const done = await Promise.race([
+      action().then(
+        () => true,
+        () => true
+      ),
+      new Promise((resolve) => {
+        timer = setTimeout(() => resolve(false), CLOSE_GRACE_MS);
+      }),
+    ]);
+    clearTimeout(timer);
+    return done;
+  }
+
+  async release(lease) {
+    const { slot, context } = lease;
+    if (lease.expired) {
+      // The run may be hung inside the browser: stop handing it out.
+      slot.retiring = true;
+    }
+    await this.within(() => context.close());
+    slot.active--;
+    if (slot.retiring && slot.active === 0) {
+      this.slots = this.slots.filter((other) => other !== slot);
+      const proc = slot.browser.process();
+      if (!(await this.within(() => slot.browser.close())) && proc) {
+        proc.kill('SIGKILL');
+      }
+    }
+  }
+
+  // Run ``fn`` with a leased tab.  With ``timeoutMs`` the run is abandoned
+  // after that long and a RunTimeout is thrown.
+  async withPage(fn, timeoutMs) {
+    const lease = await this.acquire();
+    let timer;
+    try {
+      const run = fn(lease.page, lease.port);
+      if (!timeoutMs) {
+        return await run;
+      }
+      // The abandoned run fails once its context is closed; nobody waits for it.
+      run.catch(() => {});
+      const expired = new Promise((resolve, reject) => {
+        timer = setTimeout(() => {
+          lease.expired = true;
+          reject(new RunTimeout(`Zeitlimit von ${Math.round(timeoutMs / 1000)} s überschritten`));
+        }, timeoutMs);
+      });
+      return await Promise.race([run, expired]);
+    } finally {
+      clearTimeout(timer);
+      await this.release(lease);
+    }
+  }
+
+  async close() {
+    const slots = this.slots;
+    this.slots = [];
+    await Promise.allSettled(slots.map((slot) => slot.ready.then(() => slot.browser.close())));
+  }
+}
+
+function createRunners(engines, pool) {
+  async function runPa11y(url, timeoutMs) {
+    return pool.withPage(async (page) => {
+      const results = await engines.pa11y(url, {
+        includeWarnings: true,
+        browser: page.browser(),
+        page,
+      });
+      return results.issues;
+    }, timeoutMs);
+  }
+
+  async function runAxe(url, timeoutMs) {
+    return pool.withPage(async (page) => {
+      await page.goto(url, { waitUntil: 'load' });
+      await page.evaluate(engines.axeSource);
+      const result = await page.evaluate(() => window.axe.run());
+      return [result];
+    }, timeoutMs);
+  }
+
+  const runLighthouse = serialised((url, timeoutMs) =>
+    pool.withPage(async (page, port) => {
+      const runnerResult = await engines.lighthouse(
+        url,
+        {
+          port,
+          output: 'json',
+          onlyCategories: ['accessibility'],
+          logLevel: 'error',
+        },
+        undefined,
+        page
+      );
+      return runnerResult.lhr;
+    }, timeoutMs)
+  );
+
+  return { pa11y: runPa11y, axe: runAxe, lighthouse: runLighthouse };
+}
+
+async function handleJob(runners, job) {
+  const timeoutMs = job.timeout ? job.timeout * 1000 : 0;
+  await Promise.all(
+    (job.engines || Object.keys(runners)).map(async (engine) => {
+      const runner = runners[engine];
+      if (!runner) {
+        send({ id: job.id, engine, ok: false, error: `unknown engine: ${engine}` });
+        return;
+      }
+      try {
+        send({ id: job.id, engine, ok: true, result: await runner(job.url, timeoutMs) });
+      } catch (err) {
+        if (err instanceof RunTimeout) {
+          send({ id: job.id, engine, ok: false, timeout: true, error: err.message });
+        } else {
+          send({ id: job.id, engine, ok: false, error: String((err && err.stack) || err) });
+        }
+      }
+    })
+  );
+  send({ id: job.id, done: true });
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const engines = await loadEngines();
+  const pool = new BrowserPool(engines.puppeteer, options.browsers, options.maxPagesPerBrowser);
+  const runners = createRunners(engines, pool);
+  send({
+    ready: true,
+    versions: {
+      node: process.versions.node,
+      pa11y: packageVersion('pa11y', []),
+      'axe-core': packageVersion('axe-core', ['@axe-core/cli', 'lighthouse']),
+      lighthouse: packageVersion('lighthouse', []),
+    },
+  });
+
+  const queue = [];
+  let active = 0;
+  let closed = false;
+
+  function pump() {
+    while (active < options.concurrency && queue.length) {
+      const job = queue.shift();
+      active++;
+      handleJob(runners, job).finally(() => {
+        active--;
+        pump();
+      });
+    }
+    if (closed && active === 0 && queue.length === 0) {
+      pool.close().finally(() => process.exit(0));
+    }
+  }
+
+  const input = readline.createInterface({ input: process.stdin });
+  input.on('line', (line) => {
+    if (!line.trim()) {
+      return;
+    }
+    try {
+      queue.push(JSON.parse(line));
+    } catch (err) {
+      send({ ok: false, error: `invalid request: ${err.message}` });
+      return;
+    }
+    pump();
+  });
+  input.on('close', () => {
+    closed = true;
+    pump();
+  });
+}
+
+main().catch((err) => {
+  send({ ready: false, error: String((err && err.stack) || err) });
+  process.exit(1);
+});
@@ -0,0 +1,358 @@
+"""Audit many sites in one run with shared crawl, worker and browser pools.
+
+The sites are read from a text file with one start URL per line, optionally
+followed by the number of pages to audit for that site (``0`` or no number
+audits every page found); empty lines and lines starting with ``#`` are
+ignored::
+
+    https://example.org/ 20
+    https://example.com/
+
+    python batch.py sites.txt [--output-dir batch_ergebnisse] [--max-depth 2] [--resume]
+
+Node.js is checked once, all sites are crawled together over one connection
+pool (see :func:`crawler.crawl_sites`) and the pages of all sites are audited
+by one scheduler and one Node worker, with the sites interleaved
+round-robin so that a large site does not delay the small ones.  As in a
+single-site run, each site's ``robots.txt`` and sitemaps are read first
+(see :func:`accessibility1.discover_site`), the run is journaled so that
+``--resume`` continues an interrupted batch, and the resource usage of the
+tool runs is recorded.  Each site gets its own directory below
+``--output-dir`` with the raw tool results, ``bewertung.json``,
+``bewertung.sqlite`` and ``scores_per_url.json``; an overview of all sites
+is written to ``batch_summary.json``, the journal and the tool timings are
+kept next to it.
+"""
+
+import argparse
+import os
+import re
+import sys
+from itertools import zip_longest
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from accessibility1 import (
+    AUDIT_CACHE,
+    AXE_RESULTS,
+    LIGHTHOUSE_RESULTS,
+    MAX_CONCURRENT_PAGES,
+    MAX_CONCURRENT_TOOLS,
+    METRICS_TEXTFILE,
+    PA11Y_RESULTS,
+    SITEMAP_DISCOVERY,
+    _check_node_version,
+    _open_issue_db,
+    _prepare_resume,
+    _score_counts,
+    _score_histograms,
+    _skip_done,
+    add_sitemap_pages,
+    audit_tools,
+    combine_errors,
+    discover_site,
+    ist_internal_link,
+)
+from audit_cache import AuditCache
+from audit_state import body_hash, fetch_content_hashes, tool_versions
+from checkpoint import JOURNAL_FILE, RunJournal, atomic_write, write_json
+from crawler import DEFAULT_MAX_DEPTH, DEFAULT_MAX_PAGES, crawl_sites
+from node_daemon import AuditDaemon, DaemonError
+from result_store import ResultStore, index_path
+from scheduler import AuditScheduler
+from tool_metrics import TIMINGS_FILE, MetricsRecorder
+from url_canonical import canonicalize_url, canonicalize_urls
+
+DEFAULT_OUTPUT_DIR = "batch_ergebnisse"
+SUMMARY_FILE = "batch_summary.json"
+
+
+class Site:
+    """One site of a batch: start URL, page limit and output directory."""
+
+    __slots__ = ("url", "limit", "directory", "pages")
+
+    def __init__(self, url: str, limit: int = 0, directory: str = "") -> None:
+        self.url = url
+        self.limit = limit
+        self.directory = directory
+        self.pages: List[str] = []
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def as_dict(self) -> Dict[str, object]:
+        """Return the site as stored in the run journal."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Site":
+        site = cls(data["url"], data["limit"], data["directory"])
+        site.pages = list(data["pages"])
+        return site
+
+    def outputs(self) -> List[str]:
+        """Return the result stores of the site (Pa11y, axe, Lighthouse)."""
+        return [self.path(name) for name in (PA11Y_RESULTS, AXE_RESULTS, LIGHTHOUSE_RESULTS)]
+
+
+def read_sites(path: str) -> List[Site]:
+    """Parse the sites file at ``path``."""
+    sites: List[Site] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            if not parts[0].startswith("http"):
+                print(f"Zeile {number}: {parts[0]} beginnt nicht mit http:// oder https:// und wird übersprungen.")
+                continue
+            try:
+                limit = int(parts[1]) if len(parts) > 1 else 0
+            except ValueError:
+                print(f"Zeile {number}: ungültige Seitenzahl {parts[1]!r}, es werden alle Seiten getestet.")
+                limit = 0
+            sites.append(Site(parts[0], limit))
+    return sites
+
+
+def _assign_directories(sites: List[Site], output_dir: str) -> None:
+    """Give every site its own directory named after its host."""
+    used: Dict[str, int] = {}
+    for site in sites:
+        name = re.sub(r"[^A-Za-z0-9.-]+", "_", urlparse(site.url).netloc) or "site"
+        used[name] = used.get(name, 0) + 1
+        if used[name] > 1:
+            name = f"{name}_{used[name]}"
+        site.directory = os.path.join(output_dir, name)
+        os.makedirs(site.directory, exist_ok=True)
+        for result in (PA11Y_RESULTS, AXE_RESULTS, LIGHTHOUSE_RESULTS):
+            for file in (site.path(result), index_path(site.path(result))):
+                if os.path.exists(file):
+                    os.remove(file)
+
+
+def _interleave(sites: List[Site]) -> List[Tuple[Site, str]]:
+    """Return the pages of all sites round-robin: first page of each site, second, …"""
+    return [
+        (site, url)
+        for level in zip_longest(*(site.pages for site in sites))
+        for site, url in zip(sites, level)
+        if url is not None
+    ]
+
+
+def collect_site_pages(
+    sites: List[Site],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    use_sitemaps: bool = SITEMAP_DISCOVERY,
+) -> Dict[str, str]:
+    """Crawl all sites and set their ``pages``; return the content hash of each page the crawl fetched.
+
+    With ``use_sitemaps`` every site is crawled as :func:`finde_interne_links`
+    crawls it: within the rules and crawl delay of its ``robots.txt``, with
+    the sitemap pages the crawl did not reach appended.
+    """
+    fetched: Dict[str, str] = {}
+    hashes: Dict[str, str] = {}
+    scopes: Dict[str, Callable[[str, str], bool]] = {}
+    sitemap_pages: Dict[str, Dict[str, Optional[str]]] = {}
+    if use_sitemaps:
+        for site in sites:
+            scopes[site.url], sitemap_pages[site.url] = discover_site(site.url, max_pages)
+
+    def _in_scope(start_url: str, link: str) -> bool:
+        return scopes.get(start_url, ist_internal_link)(start_url, link)
+
+    def _on_page(_index: int, url: str, html: str) -> None:
+        fetched[canonicalize_url(url)] = body_hash(html)
+
+    found = crawl_sites([site.url for site in sites], _in_scope, max_depth, max_pages, on_page=_on_page)
+    for site, links in zip(sites, found):
+        links = add_sitemap_pages(links, sitemap_pages.get(site.url, {}), max_pages)
+        with atomic_write(site.path("gefundene_urls.txt")) as f:
+            for url in sorted(links):
+                f.write(url + "\n")
+        pages = canonicalize_urls([site.url] + links)
+        site.pages = pages if site.limit == 0 else pages[: site.limit]
+        # The audited URL may be the target of a redirect of the fetched one.
+        hashes.update(
+            (page, fetched[canonicalize_url(page)]) for page in site.pages if canonicalize_url(page) in fetched
+        )
+        print(f"{site.url}: {len(pages)} Seiten gefunden, {len(site.pages)} werden geprüft.")
+    return hashes
+
+
+def audit_sites(
+    sites: List[Site],
+    hashes: Dict[str, str],
+    use_daemon: bool = True,
+    use_cache: bool = AUDIT_CACHE,
+    journal: Optional[RunJournal] = None,
+    recorder: Optional[MetricsRecorder] = None,
+) -> None:
+    """Audit the pages of all sites with one scheduler and one Node worker.
+
+    A page that belongs to several sites is audited once and its results
+    are stored for each of them.  With a ``journal``, tool runs it lists as
+    done are skipped and every result is recorded in it once it has been
+    stored for all its sites; a ``recorder`` receives the measurements of
+    every tool run (see :func:`accessibility_checks`).
+    """
+    queue = _interleave(sites)
+    owners: Dict[str, List[Site]] = {}
+    for site, url in queue:
+        owners.setdefault(url, []).append(site)
+    urls = list(owners)
+    daemon = None
+    if use_daemon:
+        try:
+            daemon = AuditDaemon(
+                concurrency=MAX_CONCURRENT_PAGES * MAX_CONCURRENT_TOOLS,
+                browsers=MAX_CONCURRENT_PAGES,
+            ).start()
+        except DaemonError as exc:
+            print(f"{exc} Verwende npx für jeden Test.")
+    try:
+        cache = versions = None
+        if use_cache:
+            cache = AuditCache()
+            versions = tool_versions(daemon)
+            missing = [url for url in urls if url not in hashes]
+            if missing:
+                hashes.update(fetch_content_hashes(missing))
+        tools = audit_tools(daemon, cache, hashes, versions, recorder)
+        if journal is not None:
+            urls = journal.pending(urls, list(tools))
+            tools = _skip_done(tools, journal)
+        scheduler = AuditScheduler(
+            tools,
+            max_pages=MAX_CONCURRENT_PAGES,
+            max_tools_per_page=MAX_CONCURRENT_TOOLS,
+        )
+        outputs = {"pa11y": PA11Y_RESULTS, "axe": AXE_RESULTS, "lighthouse": LIGHTHOUSE_RESULTS}
+        stores = {
+            id(site): {tool: ResultStore(site.path(name)) for tool, name in outputs.items()} for site in sites
+        }
+
+        def _store(url: str, results: Dict[str, Optional[dict]]) -> None:
+            for tool, entry in results.items():
+                if entry is None:
+                    continue
+                for site in owners[url]:
+                    stores[id(site)][tool].append(entry, sync=journal is not None)
+                if journal is not None:
+                    journal.record(url, tool, ok=not entry.get("error"))
+
+        print(f"Starte Barrierefreiheits‑Checks für {len(urls)} Seite(n) auf {len(sites)} Website(s) …")
+        scheduler.run(urls, _store)
+    finally:
+        if daemon is not None:
+            daemon.close()
+
+
+def score_site(site: Site) -> Dict[str, object]:
+    """Combine the results of ``site`` and write its ``scores_per_url.json``."""
+    bewertung = site.path("bewertung.json")
+    combine_errors(site.path(PA11Y_RESULTS), site.path(AXE_RESULTS), site.path(LIGHTHOUSE_RESULTS), bewertung)
+    with _open_issue_db(Path(bewertung)) as db:
+        score, total, _details = _score_counts(dict(db.category_counts()))
+        per_url = _score_histograms(db.histograms())
+    write_json(site.path("scores_per_url.json"), per_url)
+    return {
+        "url": site.url,
+        "directory": site.directory,
+        "pages": len(per_url),
+        "score": score,
+        "total_deduction": total,
+    }
+
+
+def run_batch(
+    sites: List[Site],
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    use_daemon: bool = True,
+    use_cache: bool = AUDIT_CACHE,
+    resume: bool = False,
+    use_sitemaps: bool = SITEMAP_DISCOVERY,
+    metrics_textfile: Optional[str] = METRICS_TEXTFILE,
+) -> List[Dict[str, object]]:
+    """Crawl, audit and score all ``sites``; return the overview of all sites.
+
+    The run is recorded in the journal in ``output_dir``.  With ``resume``,
+    an interrupted batch is continued instead: its sites and pages are read
+    from the journal, ``sites`` is ignored and only the tool runs that did
+    not finish are repeated.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    journal_path = os.path.join(output_dir, JOURNAL_FILE)
+    timings_path = os.path.join(output_dir, TIMINGS_FILE)
+    journal = RunJournal.load(journal_path) if resume else RunJournal(journal_path)
+    if resume and not journal.interrupted:
+        print("Kein unterbrochener Lauf gefunden, starte einen neuen Lauf.")
+        journal = RunJournal(journal_path)
+    recorder = MetricsRecorder.load(timings_path) if journal.interrupted else MetricsRecorder()
+    if journal.interrupted:
+        sites = [Site.from_dict(data) for data in journal.plan["sites"]]
+        hashes = journal.plan["hashes"]
+        for site in sites:
+            _prepare_resume(journal, site.outputs())
+        print(f"Setze unterbrochenen Lauf mit {len(sites)} Website(s) fort.")
+    else:
+        _assign_directories(sites, output_dir)
+        hashes = collect_site_pages(sites, max_depth, max_pages, use_sitemaps)
+        journal.start({"sites": [site.as_dict() for site in sites], "hashes": hashes})
+    try:
+        audit_sites(sites, hashes, use_daemon, use_cache, journal, recorder)
+        journal.finish()
+    finally:
+        recorder.save(timings_path)
+        recorder.print_summary()
+        if metrics_textfile:
+            recorder.write_prometheus(metrics_textfile)
+    summary = [score_site(site) for site in sites]
+    write_json(os.path.join(output_dir, SUMMARY_FILE), summary)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mehrere Websites in einem Lauf prüfen.")
+    parser.add_argument("sites", help="Datei mit einer Start-URL (und optional der Seitenzahl) pro Zeile")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Verzeichnis für die Ergebnisse")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH, help="maximale Linktiefe")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES, help="maximale Anzahl Links pro Website")
+    parser.add_argument("--no-daemon", action="store_true", help="npx statt des Node-Workers verwenden")
+    parser.add_argument("--no-cache", action="store_true", help="Audit-Cache nicht verwenden")
+    parser.add_argument("--no-sitemaps", action="store_true", help="robots.txt und Sitemaps nicht auswerten")
+    parser.add_argument("--resume", action="store_true", help="unterbrochenen Lauf fortsetzen")
+    args = parser.parse_args()
+
+    sites = read_sites(args.sites)
+    if not sites and not args.resume:
+        print("Keine Websites gefunden.")
+        return 2
+    if not _check_node_version():
+        return 1
+    summary = run_batch(
+        sites,
+        args.output_dir,
+        args.max_depth,
+        args.max_pages,
+        use_daemon=not args.no_daemon,
+        use_cache=AUDIT_CACHE and not args.no_cache,
+        resume=args.resume,
+        use_sitemaps=SITEMAP_DISCOVERY and not args.no_sitemaps,
+    )
+    print("\nScores pro Website:")
+    for row in summary:
+        print(f"{row['url']}: Score = {row['score']:.1f} ({row['pages']} Seiten, {row['directory']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
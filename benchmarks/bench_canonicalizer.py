@@ -0,0 +1,98 @@
+"""Throughput of the message canonicaliser.
+
+Compares a straightforward rule-by-rule substring scan (the behaviour of the
+former ``if`` chain) with the compiled matcher, with and without its memo
+cache.  The workload consists of the messages found in the result files of
+the working directory, or of synthetic messages if there are none, repeated
+to the requested size.
+
+    python benchmarks/bench_canonicalizer.py [--messages 300000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from canonicalizer import Canonicalizer  # noqa: E402
+
+RESULT_FILES = (
+    ("pa11y_result.jsonl", "pa11y_result.json"),
+    ("axe_result.jsonl", "axe_result.json"),
+    ("lighthouse_results.jsonl", "lighthouse_result.json"),
+)
+
+
+def naive(canonicalizer: Canonicalizer) -> Callable[[str], str]:
+    """Return a canonicaliser that checks every rule with ``in`` tests."""
+    rules = [(rule.canonical, rule.clauses) for rule in canonicalizer.rules]
+
+    def canonicalize(msg: str) -> str:
+        msg_l = msg.lower()
+        for canonical, clauses in rules:
+            for clause in clauses:
+                if all(needle in msg_l for needle in clause):
+                    return canonical
+        return msg_l.strip()
+
+    return canonicalize
+
+
+def sample_messages() -> List[str]:
+    """Collect the tool messages of the result files in the working directory."""
+    from accessibility1 import _extract_axe_errors, _extract_lighthouse_errors, _extract_pa11y_errors, _load_json
+
+    messages = []
+    extractors = (_extract_pa11y_errors, _extract_axe_errors, _extract_lighthouse_errors)
+    for paths, extract in zip(RESULT_FILES, extractors):
+        for path in paths:
+            if os.path.exists(path):
+                messages.extend(issue.message for issue in extract(_load_json(path)))
+                break
+    return messages
+
+
+def synthetic_messages(canonicalizer: Canonicalizer, count: int = 2000) -> List[str]:
+    rng = random.Random(0)
+    needles = [n for rule in canonicalizer.rules for clause in rule.clauses for n in clause]
+    words = ["element", "page", "the", "must", "have", "value", "button", "Ensure", "contrast"]
+    return [
+        " ".join(rng.choice(needles if rng.random() < 0.2 else words) for _ in range(rng.randint(4, 20)))
+        for _ in range(count)
+    ]
+
+
+def measure(name: str, func: Callable[[str], str], messages: List[str]) -> None:
+    start = time.perf_counter()
+    for msg in messages:
+        func(msg)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {elapsed:8.3f}s  {len(messages) / elapsed:12,.0f} msg/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300_000, help="number of messages to canonicalise")
+    args = parser.parse_args()
+
+    canonicalizer = Canonicalizer.from_file()
+    distinct = sample_messages() or synthetic_messages(canonicalizer)
+    messages = [distinct[i % len(distinct)] for i in range(args.messages)]
+    print(f"{len(messages):,} messages, {len(set(distinct)):,} distinct, {len(canonicalizer.rules)} rules")
+
+    reference = naive(canonicalizer)
+    for msg in set(distinct):
+        assert reference(msg) == canonicalizer.canonicalize(msg), msg
+    canonicalizer.cache_clear()
+
+    measure("naive", reference, messages)
+    measure("compiled", lambda msg: canonicalizer._match(msg.lower()) or msg.lower().strip(), messages)
+    measure("memoised", canonicalizer.canonicalize, messages)
+
+
+if __name__ == "__main__":
+    main()
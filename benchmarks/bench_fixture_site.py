@@ -0,0 +1,290 @@
+"""End-to-end throughput against the bundled fixture site.
+
+Serves ``benchmarks/fixture_site`` from a local HTTP server and measures
+pages per minute for the stages of a run: crawling (``finde_interne_links``),
+auditing (``accessibility_checks``), combining (``combine_errors``) and
+scoring.  Every fixture page contains one known violation; together they
+cover all entries of ``CANONICAL_MESSAGES`` (see ``fixture_site/manifest.json``).
+The site is served ``--copies`` times under ``/kopie<n>/`` so that the crawl
+and the later stages see a realistic number of pages.
+
+Auditing needs Pa11y, axe and Lighthouse installed globally.  Without them,
+or with ``--skip-audit``, the audit stage is skipped and the tool results are
+built from the manifest instead, so combining and scoring are always
+measured.  Each run checks that the known violation of every page ends up
+in ``bewertung.json``.
+
+The numbers are compared with ``benchmarks/baselines.json``: a stage that is
+more than ``--threshold`` slower than its baseline is reported and the exit
+status is 1.  Baselines depend on the machine; ``--save-baseline`` replaces
+them with the numbers of the current run.
+
+    python benchmarks/bench_fixture_site.py [--copies 20] [--repeat 3] [--skip-audit] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import accessibility1 as a11y  # noqa: E402
+from checkpoint import write_json  # noqa: E402
+from result_store import ResultStore  # noqa: E402
+from url_canonical import canonicalize_urls  # noqa: E402
+
+FIXTURE_DIR = Path(__file__).with_name("fixture_site")
+BASELINE_FILE = Path(__file__).with_name("baselines.json")
+STAGES = ("crawl", "audit", "combine", "score")
+_COPY = re.compile(r"^/kopie\d+(?=/)")
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the fixture directory under ``/kopie<n>/`` and lists the copies at ``/``."""
+
+    def __init__(self, *args, copies: int = 1, **kwargs) -> None:
+        self.copies = copies
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        if self.path != "/":
+            return super().do_GET()
+        links = "".join(f'<li><a href="/kopie{n}/index.html">Kopie {n}</a></li>' for n in range(self.copies))
+        body = f'<!DOCTYPE html><html lang="de"><head><title>Kopien</title></head><body><ul>{links}</ul></body></html>'
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def translate_path(self, path: str) -> str:
+        return super().translate_path(_COPY.sub("", path))
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(copies: int) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the fixture server on a free local port; return it and its start URL."""
+    handler = partial(_FixtureHandler, copies=copies, directory=str(FIXTURE_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def load_manifest() -> Dict[str, dict]:
+    """Return the manifest entries keyed by page file name."""
+    with open(FIXTURE_DIR / "manifest.json", "r", encoding="utf-8") as f:
+        return {page["page"]: page for page in json.load(f)["pages"]}
+
+
+def tools_installed() -> bool:
+    return all(shutil.which(name) for name in ("pa11y", "axe", "lighthouse"))
+
+
+def manifest_entries(url: str, page: Optional[dict]) -> Dict[str, dict]:
+    """Return the result entry each tool would store for ``url``.
+
+    The tool named in the manifest reports the page's violation, the others
+    report nothing.
+    """
+    entries = {
+        "pa11y": {"url": url, "results": []},
+        "axe": {"url": url, "axe_result": {"violations": []}},
+        "lighthouse": {"url": url, "lighthouse_result": {"requestedUrl": url, "finalUrl": url, "audits": {}}},
+    }
+    if page is None:
+        return entries
+    message, context, rule = page["message"], page["context"], page["page"][: -len(".html")]
+    if page["tool"] == "pa11y":
+        entries["pa11y"]["results"].append({"code": rule, "type": "error", "message": message, "context": context})
+    elif page["tool"] == "axe":
+        violation = {"id": rule, "help": message, "nodes": [{"html": context}]}
+        entries["axe"]["axe_result"]["violations"].append(violation)
+    else:
+        item = {"node": {"snippet": context, "explanation": message}}
+        audit = {"id": rule, "title": message, "score": 0, "details": {"items": [item]}}
+        entries["lighthouse"]["lighthouse_result"]["audits"][rule] = audit
+    return entries
+
+
+def write_manifest_results(urls: List[str], manifest: Dict[str, dict]) -> None:
+    stores = {
+        "pa11y": ResultStore(a11y.PA11Y_RESULTS),
+        "axe": ResultStore(a11y.AXE_RESULTS),
+        "lighthouse": ResultStore(a11y.LIGHTHOUSE_RESULTS),
+    }
+    for url in urls:
+        for tool, entry in manifest_entries(url, manifest.get(url.rsplit("/", 1)[-1])).items():
+            stores[tool].append(entry)
+
+
+def check_findings(urls: List[str], manifest: Dict[str, dict]) -> List[str]:
+    """Return the fixture pages whose known violation is missing in ``bewertung.json``.
+
+    The messages under ``All tools`` are already canonical.
+    """
+    found: Dict[str, set] = {}
+    for entry in a11y._load_bewertung():
+        found[entry["URL"]] = {issue.get("message", "") for issue in entry["All tools"]}
+    missing = []
+    for url in urls:
+        page = manifest.get(url.rsplit("/", 1)[-1])
+        if page is not None and page["canonical"] not in found.get(url, ()):
+            missing.append(f"{url}: {page['canonical']}")
+    return missing
+
+
+def best_of(repeat: int, stage: Callable[[], int]) -> Tuple[float, int]:
+    """Run ``stage`` ``repeat`` times; return the best time and its page count."""
+    best, pages = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = stage()
+        best = min(best, time.perf_counter() - start)
+    return best, pages
+
+
+def combine() -> int:
+    a11y.combine_errors()
+    return len(a11y._load_bewertung())
+
+
+def score() -> int:
+    with a11y._open_issue_db() as db:
+        a11y._score_counts(dict(db.category_counts()))
+        per_url = a11y._score_histograms(db.histograms())
+    return len(per_url)
+
+
+def run(copies: int, repeat: int, skip_audit: bool, audit_pages: int) -> Dict[str, Optional[float]]:
+    """Measure all stages and return pages per minute per stage (``None`` = skipped)."""
+    manifest = load_manifest()
+    server, start_url = serve(copies)
+    rates: Dict[str, Optional[float]] = {}
+    try:
+        # Every copy has its fixture pages and the index, which the crawler
+        # also finds under the directory URL; the duplicates are canonicalised.
+        max_pages = copies * (len(manifest) + 2) + 1
+        found: List[str] = []
+
+        def crawl() -> int:
+            found[:] = [start_url] + a11y.finde_interne_links(start_url, max_depth=3, max_pages=max_pages)
+            return len(found)
+
+        seconds, pages = best_of(repeat, crawl)
+        rates["crawl"] = pages / seconds * 60
+        print(f"Crawl: {pages} Seiten in {seconds:.2f} s")
+        urls = canonicalize_urls(found)
+
+        if skip_audit or not tools_installed():
+            reason = "--skip-audit" if skip_audit else "Pa11y/axe/Lighthouse nicht installiert"
+            print(f"Audit: übersprungen ({reason}), Ergebnisse aus manifest.json")
+            rates["audit"] = None
+            write_manifest_results(urls, manifest)
+        else:
+            audited = urls[:audit_pages] if audit_pages else urls
+            start = time.perf_counter()
+            a11y.accessibility_checks(audited)
+            seconds = time.perf_counter() - start
+            rates["audit"] = len(audited) / seconds * 60
+            print(f"Audit: {len(audited)} Seiten in {seconds:.2f} s")
+            urls = audited
+
+        seconds, pages = best_of(repeat, combine)
+        rates["combine"] = pages / seconds * 60
+        print(f"Kombinieren: {pages} Seiten in {seconds:.3f} s")
+        missing = check_findings(urls, manifest)
+        expected = sum(1 for url in urls if url.rsplit("/", 1)[-1] in manifest)
+        print(f"Bekannte Verstöße gefunden: {expected - len(missing)}/{expected}")
+        for line in missing[:10]:
+            print(f"  fehlt: {line}")
+
+        seconds, pages = best_of(repeat, score)
+        rates["score"] = pages / seconds * 60
+        print(f"Bewerten: {pages} Seiten in {seconds:.3f} s")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return rates
+
+
+def machine() -> Dict[str, object]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def compare(rates: Dict[str, Optional[float]], baseline: dict, threshold: float) -> List[str]:
+    """Return the stages that are more than ``threshold`` slower than ``baseline``."""
+    regressions = []
+    print(f"\n{'Stufe':<10}{'Seiten/min':>14}{'Basislinie':>14}{'Änderung':>10}")
+    for stage in STAGES:
+        rate, base = rates.get(stage), baseline.get("stages", {}).get(stage)
+        if rate is None:
+            print(f"{stage:<10}{'–':>14}")
+            continue
+        if not base:
+            print(f"{stage:<10}{rate:>14.0f}{'–':>14}")
+            continue
+        change = rate / base - 1
+        print(f"{stage:<10}{rate:>14.0f}{base:>14.0f}{change:>+9.0%}{'  REGRESSION' if change < -threshold else ''}")
+        if change < -threshold:
+            regressions.append(stage)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=20, help="Anzahl der Kopien der Fixture-Website")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-audit", action="store_true", help="Tools nicht ausführen, Ergebnisse aus dem Manifest")
+    parser.add_argument("--audit-pages", type=int, default=0, help="nur die ersten N Seiten prüfen (0 für alle)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="erlaubte Verlangsamung gegenüber der Basislinie")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="Ergebnisse als neue Basislinie speichern")
+    args = parser.parse_args()
+
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # The stages write their files to the working directory.
+        os.chdir(tmp)
+        try:
+            rates = run(args.copies, args.repeat, args.skip_audit, args.audit_pages)
+        finally:
+            os.chdir(workdir)
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        baseline = {}
+    if baseline and (baseline.get("copies") != args.copies or baseline.get("machine") != machine()):
+        print("\nHinweis: Basislinie wurde mit anderen Kopien oder auf einem anderen Rechner gemessen.")
+    regressions = compare(rates, baseline, args.threshold)
+    if args.save_baseline:
+        stages = {stage: round(rate) for stage, rate in rates.items() if rate is not None}
+        # Keep the audit baseline of a machine with the tools installed.
+        stages = {**baseline.get("stages", {}), **stages}
+        data = {"copies": args.copies, "machine": machine(), "stages": stages}
+        write_json(args.baseline, data)
+        print(f"Basislinie in {args.baseline} gespeichert.")
+        return 0
+    if regressions:
+        print(f"Langsamer als die Basislinie (>{args.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
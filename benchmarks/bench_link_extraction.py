@@ -0,0 +1,115 @@
+"""Speed and memory of the link extraction backends.
+
+Runs every available backend of ``link_extractor`` over a set of HTML pages
+and reports pages per second, the speedup over BeautifulSoup and the peak
+memory allocated while extracting from one page.  The pages are the
+``*.html`` files given on the command line (files or directories, e.g.
+pages saved with ``wget -r``), or synthetic pages modelled on a typical
+university CMS page if none are given.  Every backend is checked to return
+the same links as BeautifulSoup.
+
+    python benchmarks/bench_link_extraction.py [saved_pages/ ...] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from link_extractor import BACKENDS, get_extractor  # noqa: E402
+
+BASE_URL = "https://www.example.org/fakultaet/institut/seite.html"
+
+
+def load_pages(paths: List[str]) -> List[Tuple[str, str]]:
+    """Return ``(name, html)`` of the HTML files in ``paths``."""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.rglob("*.htm*")) if path.is_dir() else [path])
+    return [(str(file), file.read_text(encoding="utf-8", errors="replace")) for file in files]
+
+
+def synthetic_pages(count: int, seed: int = 1) -> List[Tuple[str, str]]:
+    """Return pages with navigation, scripts, inline styles and a long body."""
+    rng = random.Random(seed)
+    pages = []
+    for n in range(count):
+        nav = "".join(
+            f'<li class="nav-item"><a class="nav-link" href="/bereich{i}/seite{rng.randrange(500)}.html" '
+            f'title="Bereich {i} &amp; mehr">Bereich {i}</a></li>'
+            for i in range(rng.randint(40, 120))
+        )
+        script = "var cfg = {" + ",".join(f'"k{i}": "<a href=\\"x{i}\\">"' for i in range(200)) + "};"
+        body = "".join(
+            f'<div class="row"><p>{"Lorem ipsum dolor sit amet " * rng.randint(5, 30)}'
+            f'<a href="?page={i}&amp;sort=asc#top">Seite {i}</a> <img src="/img/{i}.png" alt="Bild {i}"></p>'
+            f'<!-- <a href="/alt/{i}"> --></div>'
+            for i in range(rng.randint(100, 400))
+        )
+        html = (
+            f'<!DOCTYPE html><html lang="de"><head><title>Seite {n}</title><base href="/fakultaet/">'
+            f"<style>.nav-link{{color:#036}}</style><script>{script}</script></head>"
+            f'<body><nav><ul class="nav">{nav}</ul></nav><main>{body}</main>'
+            f'<footer><a href="https://www.example.org/impressum">Impressum</a></footer></body></html>'
+        )
+        pages.append((f"synthetic-{n}", html))
+    return pages
+
+
+def bench(backend: str, pages: List[Tuple[str, str]], repeat: int) -> Tuple[float, int]:
+    """Return the best time for all pages and the peak memory of one page."""
+    extract = get_extractor(backend)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _name, html in pages:
+            extract(html, BASE_URL)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    peak = 0
+    for _name, html in pages:
+        tracemalloc.reset_peak()
+        extract(html, BASE_URL)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="HTML-Dateien oder Verzeichnisse")
+    parser.add_argument("--pages", type=int, default=50, help="Anzahl synthetischer Seiten")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths) if args.paths else synthetic_pages(args.pages)
+    size = sum(len(html) for _name, html in pages)
+    print(f"{len(pages)} Seiten, {size / 1e6:.1f} MB HTML")
+
+    reference = [get_extractor("bs4")(html, BASE_URL) for _name, html in pages]
+    results = {}
+    for backend in BACKENDS:
+        if get_extractor(backend) is not BACKENDS[backend]:
+            print(f"{backend:>10}: nicht installiert")
+            continue
+        for (name, html), links in zip(pages, reference):
+            if get_extractor(backend)(html, BASE_URL) != links:
+                print(f"{backend:>10}: abweichende Links in {name}")
+                break
+        results[backend] = bench(backend, pages, args.repeat)
+    baseline = results["bs4"][0]
+    for backend, (seconds, peak) in results.items():
+        print(
+            f"{backend:>10}: {len(pages) / seconds:8.1f} Seiten/s  "
+            f"{baseline / seconds:5.1f}x  Spitze {peak / 1e6:6.2f} MB pro Seite"
+        )
+
+
+if __name__ == "__main__":
+    main()
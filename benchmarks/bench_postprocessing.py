@@ -0,0 +1,211 @@
+"""Time and peak memory of the post-processing stages for large page counts.
+
+For every page count, synthetic result stores are generated (see
+``synthetic_results.py``) and each stage runs in a fresh child process:
+
+* ``combine_errors`` – combining the three stores into ``bewertung.json``
+  and ``bewertung.sqlite``,
+* ``load`` – reading ``bewertung.json`` (input of the following four),
+* ``_count_issues``, ``_count_common_errors``, ``accessibility_score`` and
+  ``accessibility_score_per_url`` on the loaded entries,
+* ``issue_db`` – the site and per-URL scores from ``bewertung.sqlite``, as
+  the reports compute them,
+* ``create_rating`` – ``bewertung.create_rating`` on the result stores.
+
+Per stage the wall time, the peak of the Python heap (``tracemalloc``,
+allocations of the stage only) and the peak RSS of the child process are
+reported; a stage that the system kills, e.g. for lack of memory, is listed
+with its exit status.  The last table shows the time per page for each page
+count, so stages that grow faster than linearly stand out.  ``tracemalloc``
+slows the stages down by a factor of about two; ``--no-tracemalloc`` measures
+the time alone.
+
+    python benchmarks/bench_postprocessing.py [--pages 1000 10000 100000] [--workdir DIR] [--lean]
+
+The generated stores take about 200 KB per page (``--lean``: about 75 KB)
+and are kept in ``--workdir`` when it is given, so later runs reuse them.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import accessibility1 as a11y  # noqa: E402
+import bewertung  # noqa: E402
+from synthetic_results import generate  # noqa: E402
+
+MARKER_FILE = "synthetic.json"
+
+
+def _entries() -> tuple:
+    return (a11y._load_bewertung(),)
+
+
+def _nothing() -> tuple:
+    return ()
+
+
+def _combine() -> None:
+    a11y.combine_errors()
+
+
+def _issue_db() -> None:
+    with a11y._open_issue_db() as db:
+        a11y._score_counts(dict(db.category_counts()))
+        a11y._score_histograms(db.histograms())
+
+
+def _create_rating() -> None:
+    bewertung.create_rating(output="rating.json")
+
+
+# name -> (setup returning the arguments, stage); setup is not measured.
+STAGES: Dict[str, Tuple[Callable[[], tuple], Callable]] = {
+    "combine_errors": (_nothing, _combine),
+    "load": (_nothing, a11y._load_bewertung),
+    "_count_issues": (_entries, a11y._count_issues),
+    "_count_common_errors": (_entries, a11y._count_common_errors),
+    "accessibility_score": (_entries, a11y.accessibility_score),
+    "accessibility_score_per_url": (_entries, a11y.accessibility_score_per_url),
+    "issue_db": (_nothing, _issue_db),
+    "create_rating": (_nothing, _create_rating),
+}
+
+
+def _max_rss() -> int:
+    """Return the peak RSS of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_stage(conn, workdir: str, stage: str, trace: bool) -> None:
+    """Child process: run ``stage`` in ``workdir`` and send its measurements."""
+    os.chdir(workdir)
+    setup, func = STAGES[stage]
+    with contextlib.redirect_stdout(io.StringIO()):
+        args = setup()
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        func(*args)
+        seconds = time.perf_counter() - start
+        heap = tracemalloc.get_traced_memory()[1] if trace else None
+    conn.send({"seconds": seconds, "heap_bytes": heap, "rss_bytes": _max_rss()})
+    conn.close()
+
+
+def measure(workdir: str, stage: str, trace: bool) -> dict:
+    """Run ``stage`` in a child process and return its measurements or ``{"exitcode"}``."""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_stage, args=(child, workdir, stage, trace))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = None
+    process.join()
+    if result is None or process.exitcode != 0:
+        return {"exitcode": process.exitcode}
+    return result
+
+
+def prepare(workdir: str, pages: int, lean: bool) -> None:
+    """Generate the result stores in ``workdir`` unless matching ones exist."""
+    marker = os.path.join(workdir, MARKER_FILE)
+    wanted = {"pages": pages, "lean": lean}
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if json.load(f) == wanted:
+                print(f"Vorhandene synthetische Ergebnisse in {workdir} werden verwendet.")
+                return
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    os.makedirs(workdir, exist_ok=True)
+    start = time.perf_counter()
+    paths = generate(pages, workdir, lean=lean)
+    size = sum(os.path.getsize(path) for path in paths.values())
+    print(f"{pages:,} Seiten erzeugt ({size / 1e6:,.0f} MB) in {time.perf_counter() - start:.1f} s")
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(wanted, f)
+
+
+def _mb(value: Optional[int]) -> str:
+    return "–" if value is None else f"{value / 1e6:,.1f}"
+
+
+def report(pages: int, results: Dict[str, dict]) -> None:
+    print(f"{pages:,} Seiten")
+    print(f"{'Stufe':<30}{'Zeit [s]':>10}{'Seiten/s':>12}{'Heap-Spitze [MB]':>18}{'RSS max [MB]':>14}")
+    for stage, result in results.items():
+        if "exitcode" in result:
+            print(f"{stage:<30}  abgebrochen (Exit-Status {result['exitcode']})")
+            continue
+        rate = pages / result["seconds"] if result["seconds"] else float("inf")
+        print(
+            f"{stage:<30}{result['seconds']:>10.2f}{rate:>12,.0f}"
+            f"{_mb(result['heap_bytes']):>18}{_mb(result['rss_bytes']):>14}"
+        )
+
+
+def report_scaling(all_results: Dict[int, Dict[str, dict]]) -> None:
+    """Print the time per page of every stage for each page count."""
+    counts = sorted(all_results)
+    if len(counts) < 2:
+        return
+    print("\nZeit pro Seite [µs]")
+    print(f"{'Stufe':<30}" + "".join(f"{count:>12,}" for count in counts) + f"{'Faktor':>10}")
+    for stage in all_results[counts[0]]:
+        per_page: List[Optional[float]] = []
+        for count in counts:
+            result = all_results[count].get(stage, {})
+            per_page.append(result["seconds"] / count * 1e6 if "seconds" in result else None)
+        cells = "".join(f"{'–' if value is None else f'{value:,.1f}':>12}" for value in per_page)
+        known = [value for value in per_page if value]
+        factor = f"{known[-1] / known[0]:.1f}x" if len(known) > 1 else "–"
+        print(f"{stage:<30}{cells}{factor:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pages", type=int, nargs="+", default=[1000, 10000], help="Seitenzahlen, z. B. 1000 10000 100000"
+    )
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--workdir", help="Verzeichnis für die erzeugten Dateien (bleibt erhalten)")
+    parser.add_argument("--lean", action="store_true", help="axe-Ergebnisse ohne passes/inapplicable/incomplete")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="nur die Zeit messen")
+    args = parser.parse_args()
+
+    base = args.workdir or tempfile.mkdtemp(prefix="bench_postprocessing_")
+    all_results: Dict[int, Dict[str, dict]] = {}
+    try:
+        for pages in sorted(args.pages):
+            print()
+            workdir = os.path.join(base, f"{pages}{'_lean' if args.lean else ''}")
+            prepare(workdir, pages, args.lean)
+            results = all_results[pages] = {}
+            for stage in args.stages:
+                results[stage] = measure(workdir, stage, not args.no_tracemalloc)
+            report(pages, results)
+        report_scaling(all_results)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
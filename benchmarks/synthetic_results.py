@@ -0,0 +1,209 @@
+"""Synthetic Pa11y, axe and Lighthouse result stores for large page counts.
+
+The entries are modelled on the sample results in the repository root
+(``pa11y_result.json``, ``axe_result.json``, ``lighthouse_result.json``):
+every page gets a random selection of their findings, with a random number
+of failing nodes per axe rule and Lighthouse audit.  Part of the contexts is
+shared by all pages (site layout), the rest is specific to the page, and
+some Pa11y contrast findings carry page-specific ratios in their message,
+as the real tool reports them.  axe entries keep the full ``passes``,
+``inapplicable`` and ``incomplete`` lists (about 125 KB per page) unless
+``lean`` is set; Lighthouse reports are stored trimmed, as with
+``TRIM_LIGHTHOUSE_REPORTS``.  A small share of the tool runs is stored as a
+failure record (see ``watchdog``).
+
+The stores are written as ``pa11y_result.jsonl``, ``axe_result.jsonl`` and
+``lighthouse_results.jsonl`` without offset index; ``ResultStore`` rebuilds
+it when it is needed.  Full entries take about 200 KB per page on disk.
+
+    python benchmarks/synthetic_results.py --pages 10000 [--directory DIR] [--lean] [--seed 0]
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lighthouse_report import trim_report  # noqa: E402
+from watchdog import failure_record  # noqa: E402
+
+SAMPLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUTS = {"pa11y": "pa11y_result.jsonl", "axe": "axe_result.jsonl", "lighthouse": "lighthouse_results.jsonl"}
+# Share of findings whose context is the same on every page.
+SHARED_CONTEXT = 0.6
+# Share of tool runs stored as failure records.
+FAILURE_RATE = 0.005
+CONTRAST_MESSAGE = (
+    "This element has insufficient contrast at this conformance level. Expected a contrast ratio of at least "
+    "4.5:1, but text in this element has a contrast ratio of {ratio:.2f}:1. Recommendation: change text colour "
+    "to {colour}."
+)
+
+
+def _load_sample(name: str):
+    with open(os.path.join(SAMPLE_DIR, name), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data[0] if isinstance(data, list) else data
+
+
+def _page_context(context: str, marker: str) -> str:
+    """Mark the first tag of ``context`` with ``marker`` (the page and node)."""
+    end = context.find(">")
+    if end <= 0:
+        return f"{context} <!-- {marker} -->"
+    if context[end - 1] == "/":
+        end -= 1
+    return f'{context[:end]} data-seite="{marker}"{context[end:]}'
+
+
+class SyntheticResults:
+    """Generates the result entries of one synthetic page at a time."""
+
+    def __init__(self, seed: int = 0, lean: bool = False) -> None:
+        self.rng = random.Random(seed)
+        self.pa11y_results: List[dict] = _load_sample("pa11y_result.json")["results"]
+
+        axe = _load_sample("axe_result.json")["axe_result"]
+        axe = axe[0] if isinstance(axe, list) else axe
+        self.axe_violations: List[dict] = axe["violations"]
+        static = {key: value for key, value in axe.items() if key not in ("url", "violations")}
+        if lean:
+            for key in ("passes", "inapplicable", "incomplete"):
+                static[key] = []
+        # The unchanging part of every axe entry is serialised once.
+        self.axe_static = json.dumps(static, ensure_ascii=False)[1:-1]
+
+        report = trim_report(_load_sample("lighthouse_result.json"))
+        self.lighthouse_report = report
+        self.lighthouse_failing = [
+            name for name, audit in report["audits"].items() if audit["score"] is not None and audit["score"] < 1
+        ]
+
+    def _context(self, context: str, page: int) -> str:
+        return context if self.rng.random() < SHARED_CONTEXT else _page_context(context, str(page))
+
+    def _nodes(self, nodes: List[dict], page: int, key: str = "html") -> List[dict]:
+        """Return between one and twice as many nodes as ``nodes``; ``key`` holds the context."""
+        count = self.rng.randint(1, 2 * len(nodes))
+        chosen = []
+        for n in range(count):
+            node = nodes[n % len(nodes)]
+            html = node.get(key, "")
+            html = self._context(html, page) if n < len(nodes) else _page_context(html, f"{page}-{n}")
+            chosen.append({**node, key: html})
+        return chosen
+
+    def failed(self, url: str, tool: str) -> Optional[dict]:
+        if self.rng.random() < FAILURE_RATE:
+            return failure_record(url, tool, "Zeitlimit von 120 s überschritten", 3)
+        return None
+
+    def pa11y(self, url: str, page: int) -> dict:
+        rng = self.rng
+        results = [
+            {**result, "context": self._context(result.get("context", ""), page)}
+            for result in self.pa11y_results
+            if rng.random() < 0.5
+        ]
+        for n in range(rng.randint(0, 4)):
+            message = CONTRAST_MESSAGE.format(ratio=rng.uniform(1.5, 4.4), colour=f"#{rng.randrange(0x1000000):06x}")
+            results.append(
+                {
+                    "code": "WCAG2AA.Principle1.Guideline1_4.1_4_3.G18.Fail",
+                    "type": "error",
+                    "typeCode": 1,
+                    "message": message,
+                    "context": _page_context('<span class="hinweis">Text</span>', f"{page}-{n}"),
+                    "selector": "span.hinweis",
+                    "runner": "htmlcs",
+                    "runnerExtras": {},
+                }
+            )
+        return {"url": url, "results": results}
+
+    def axe_line(self, url: str, page: int) -> str:
+        """Return the serialised axe entry of ``url``."""
+        violations = [
+            {**violation, "nodes": self._nodes(violation["nodes"], page)}
+            for violation in self.axe_violations
+            if self.rng.random() < 0.7
+        ]
+        return '{"url": %s, "axe_result": [{%s, "url": %s, "violations": %s}]}' % (
+            json.dumps(url),
+            self.axe_static,
+            json.dumps(url),
+            json.dumps(violations, ensure_ascii=False),
+        )
+
+    def lighthouse(self, url: str, page: int) -> dict:
+        report = copy.copy(self.lighthouse_report)
+        report.update(requestedUrl=url, finalUrl=url, finalDisplayedUrl=url, mainDocumentUrl=url)
+        audits = dict(report["audits"])
+        failing = 0
+        for name in self.lighthouse_failing:
+            audit = audits[name]
+            if self.rng.random() < 0.6:
+                items = audit.get("details", {}).get("items", [])
+                nodes = [item["node"] for item in items if "node" in item]
+                nodes = self._nodes(nodes, page, "snippet") if nodes else []
+                audits[name] = {**audit, "details": {"items": [{"node": node} for node in nodes]}}
+                failing += 1
+            else:
+                audits[name] = {"score": 1, "title": audit["title"]}
+        report["audits"] = audits
+        report["categories"] = {"accessibility": {"score": round(1 - failing / (len(audits) or 1), 2)}}
+        return {"url": url, "lighthouse_result": report}
+
+    def page_url(self, page: int) -> str:
+        return f"https://www.example.org/bereich{page % 50}/seite{page}.html"
+
+
+def generate(pages: int, directory: str = ".", seed: int = 0, lean: bool = False) -> Dict[str, str]:
+    """Write the result stores for ``pages`` synthetic pages into ``directory``.
+
+    Existing stores are replaced.  Returns the paths of the stores per tool.
+    """
+    synthetic = SyntheticResults(seed, lean)
+    paths = {tool: os.path.join(directory, name) for tool, name in OUTPUTS.items()}
+    for path in paths.values():
+        for stale in (path, path + ".idx"):
+            if os.path.exists(stale):
+                os.remove(stale)
+    files = {tool: open(path, "w", encoding="utf-8") for tool, path in paths.items()}
+    try:
+        for page in range(pages):
+            url = synthetic.page_url(page)
+            failure = synthetic.failed(url, "pa11y")
+            files["pa11y"].write(json.dumps(failure or synthetic.pa11y(url, page), ensure_ascii=False) + "\n")
+            failure = synthetic.failed(url, "axe")
+            files["axe"].write((json.dumps(failure) if failure else synthetic.axe_line(url, page)) + "\n")
+            failure = synthetic.failed(url, "lighthouse")
+            files["lighthouse"].write(
+                json.dumps(failure or synthetic.lighthouse(url, page), ensure_ascii=False) + "\n"
+            )
+    finally:
+        for f in files.values():
+            f.close()
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--directory", default=".", help="Zielverzeichnis der Ergebnisdateien")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lean", action="store_true", help="axe-Ergebnisse ohne passes/inapplicable/incomplete")
+    args = parser.parse_args()
+    os.makedirs(args.directory, exist_ok=True)
+    paths = generate(args.pages, args.directory, args.seed, args.lean)
+    for tool, path in paths.items():
+        print(f"{tool}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
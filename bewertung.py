@@ -1,9 +1,15 @@
 import json
 import os
 
+from checkpoint import write_json
+from lighthouse_report import iter_lighthouse_entries
+from result_store import iter_entries
+
 
 def load_json(path):
     """Load JSON from ``path`` or return an empty list."""
+    if path.endswith(".jsonl"):
+        return list(iter_entries(path))
     try:
         with open(path, "r", encoding="utf-8") as fh:
             data = json.load(fh)
@@ -16,14 +22,24 @@ def load_json(path):
         return []
 
 
-def combine_tool_results(pa11y_data, lighthouse_data, axe_data):
-    """Combine results from Pa11y, Lighthouse and Axe and remove duplicates."""
+def combine_tool_results(pa11y_data, lighthouse_data, axe_data, failed=None):
+    """Combine results from Pa11y, Lighthouse and Axe and remove duplicates.
+
+    Failure records of tool runs (entries with an ``error`` key, see
+    ``watchdog``) are skipped, so a page on which every tool failed gets no
+    entry.  The failed tools are collected per URL in ``failed`` if given.
+    """
     combined = {}
+    if failed is None:
+        failed = {}
 
     for entry in pa11y_data:
         url = entry.get("url")
         if not url:
             continue
+        if entry.get("error"):
+            failed.setdefault(url, []).append("pa11y")
+            continue
         combined.setdefault(url, {"pa11y": [], "lighthouse": [], "axe": [], "lh_score": 1})
         for res in entry.get("results", []):
             msg = res.get("message", "")
@@ -34,6 +50,9 @@ def combine_tool_results(pa11y_data, lighthouse_data, axe_data):
         url = entry.get("url")
         if not url:
             continue
+        if entry.get("error"):
+            failed.setdefault(url, []).append("lighthouse")
+            continue
         combined.setdefault(url, {"pa11y": [], "lighthouse": [], "axe": [], "lh_score": 1})
         lh_result = entry.get("lighthouse_result", {})
         audits = lh_result.get("audits", {})
@@ -49,6 +68,9 @@ def combine_tool_results(pa11y_data, lighthouse_data, axe_data):
         url = entry.get("url")
         if not url:
             continue
+        if entry.get("error"):
+            failed.setdefault(url, []).append("axe")
+            continue
         combined.setdefault(url, {"pa11y": [], "lighthouse": [], "axe": [], "lh_score": 1})
 
         axe_result = entry.get("axe_result", {})
@@ -105,27 +127,32 @@ def calculate_scores(combined):
     return scores
 
 
-def create_rating(pa11y_file="pa11y_result.json", lighthouse_file="lighthouse_results.json", axe_file="axe_result.json", output="bewertung.json"):
+def create_rating(pa11y_file="pa11y_result.jsonl", lighthouse_file="lighthouse_results.jsonl", axe_file="axe_result.jsonl", output="bewertung.json"):
     """Load tool results, combine them and store a rating per page."""
     pa11y_data = load_json(pa11y_file)
-    lighthouse_data = load_json(lighthouse_file)
+    # Only the trimmed reports are kept in memory (see ``lighthouse_report``).
+    lighthouse_data = list(iter_lighthouse_entries(lighthouse_file))
     axe_data = load_json(axe_file)
 
     if not pa11y_data and not lighthouse_data and not axe_data:
         print("Keine Ergebnisdaten für die Bewertung gefunden.")
         return
 
-    combined = combine_tool_results(pa11y_data, lighthouse_data, axe_data)
+    failed = {}
+    combined = combine_tool_results(pa11y_data, lighthouse_data, axe_data, failed)
     scores = calculate_scores(combined)
 
     rating = {
         "info": "Tools kombiniert, Duplikate entfernt",
         "scores": scores,
     }
+    if failed:
+        # Pages without any successful tool run have no score.
+        rating["failed_tools"] = failed
+        print(f"{len(failed)} Seite(n) mit fehlgeschlagenen Tools, siehe 'failed_tools' in '{output}'.")
 
     try:
-        with open(output, "w", encoding="utf-8") as fh:
-            json.dump(rating, fh, indent=2, ensure_ascii=False)
+        write_json(output, rating)
         print(f"Bewertung in '{output}' gespeichert.")
     except Exception as exc:
         print(f"Fehler beim Speichern der Bewertung: {exc}")
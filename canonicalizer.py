@@ -0,0 +1,97 @@
+"""Data-driven, memoised mapping of tool messages to canonical issue keys.
+
+The rules live in ``canonical_rules.json``.  Each rule names a canonical
+message and a list of clauses; a clause is a list of substrings that must
+all occur in the lower-cased tool message.  Rules are checked in order and
+the first rule with a matching clause wins.  Messages that match no rule are
+returned lower-cased and stripped.
+
+The rules are compiled once into integer masks over the set of distinct
+substrings.  A message is tested for every substring exactly once, however
+many rules share it, and each rule is then a mask comparison.  (A single
+alternation regex over all substrings was measured to be slower than the
+per-substring ``in`` tests in CPython.)  The result for every distinct raw
+message is memoised, because the same messages are canonicalised over and
+over by the extraction, combining and scoring stages.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+RULES_FILE = Path(__file__).with_name("canonical_rules.json")
+
+# Upper bound for the number of memoised messages.  The cache is cleared when
+# it is exceeded; real runs see far fewer distinct messages.
+DEFAULT_CACHE_SIZE = 200_000
+
+
+class Rule:
+    """One canonicalisation rule as read from the rules file."""
+
+    __slots__ = ("canonical", "clauses", "category")
+
+    def __init__(self, canonical: str, clauses: Sequence[Sequence[str]], category: Optional[dict] = None) -> None:
+        self.canonical = canonical
+        self.clauses = [list(clause) for clause in clauses]
+        self.category = category
+
+
+class Canonicalizer:
+    """Compiled, memoising matcher for a list of :class:`Rule` objects."""
+
+    def __init__(self, rules: Sequence[Rule], cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.rules = list(rules)
+        self.cache_size = cache_size
+        self._cache: Dict[str, str] = {}
+        needles = list(dict.fromkeys(n for rule in self.rules for clause in rule.clauses for n in clause))
+        self._needles = [(needle, 1 << i) for i, needle in enumerate(needles)]
+        bit = dict(self._needles)
+        self._compiled = [
+            (sys.intern(rule.canonical), [sum(bit[n] for n in clause) for clause in rule.clauses])
+            for rule in self.rules
+        ]
+
+    @classmethod
+    def from_file(cls, path: Path = RULES_FILE) -> "Canonicalizer":
+        """Load the rules from the JSON file at ``path``."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([Rule(r["canonical"], r["any"], r.get("category")) for r in data.get("rules", [])])
+
+    @property
+    def canonical_messages(self) -> List[str]:
+        """All canonical messages in rule order, without duplicates."""
+        return list(dict.fromkeys(rule.canonical for rule in self.rules))
+
+    def _match(self, msg_l: str) -> Optional[str]:
+        present = 0
+        for needle, bit in self._needles:
+            if needle in msg_l:
+                present |= bit
+        if not present:
+            return None
+        for canonical, clauses in self._compiled:
+            for mask in clauses:
+                if present & mask == mask:
+                    return canonical
+        return None
+
+    def canonicalize(self, msg: str) -> str:
+        """Return the canonical key for the tool message ``msg``."""
+        try:
+            return self._cache[msg]
+        except KeyError:
+            pass
+        msg_l = msg.lower()
+        result = self._match(msg_l)
+        if result is None:
+            result = sys.intern(msg_l.strip())
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[msg] = result
+        return result
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,136 @@
+"""Run journal and crash-safe output files for long audit runs.
+
+The journal ``audit_journal.jsonl`` is written next to the result stores.
+Its first line holds the plan of the run (the pages to audit and what
+:func:`accessibility1.combine_run` needs afterwards); every tool run that
+finished with a result adds one line ``{"url", "tool", "ok"}``, and a last
+line marks the run as finished.  Each line is flushed and synced before the
+next tool result is recorded, so after a crash the journal lists exactly the
+work that does not have to be repeated.  ``--resume`` reads it, drops result
+entries the journal does not know about and audits only the missing
+``(url, tool)`` pairs.
+
+Output files that are rewritten as a whole (``bewertung.json``,
+``scores_per_url.json``, ``audit_state.json`` …) are written through
+:func:`atomic_write`: into a temporary file in the same directory that
+replaces the target only once it is complete, so a crash leaves either the
+old or the new file, never a truncated one.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+JOURNAL_FILE = "audit_journal.jsonl"
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", encoding: str = "utf-8") -> Iterator:
+    """Open a temporary file that replaces ``path`` when the block succeeds.
+
+    The data is synced to disk before the rename; if the block raises, the
+    temporary file is removed and ``path`` is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: str, data) -> None:
+    """Write ``data`` as indented JSON to ``path`` via :func:`atomic_write`."""
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+class RunJournal:
+    """Plan and completed tool runs of the current audit run."""
+
+    def __init__(self, path: str = JOURNAL_FILE) -> None:
+        self.path = path
+        self.plan: Optional[dict] = None
+        # url -> tools whose result is stored
+        self.done: Dict[str, Set[str]] = {}
+        self.finished = False
+
+    @classmethod
+    def load(cls, path: str = JOURNAL_FILE) -> "RunJournal":
+        """Read the journal at ``path``; a partially written last line is ignored."""
+        journal = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    journal._apply(record)
+        except FileNotFoundError:
+            pass
+        return journal
+
+    def _apply(self, record: dict) -> None:
+        event = record.get("event")
+        if event == "plan":
+            self.plan = record.get("plan")
+            self.done = {}
+            self.finished = False
+        elif event == "tool":
+            tools = self.done.setdefault(record["url"], set())
+            if record.get("ok"):
+                tools.add(record["tool"])
+            else:
+                tools.discard(record["tool"])
+        elif event == "finished":
+            self.finished = True
+
+    def _append(self, record: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(record)
+
+    @property
+    def interrupted(self) -> bool:
+        """``True`` if the journal holds a run that did not finish."""
+        return self.plan is not None and not self.finished
+
+    def start(self, plan: dict) -> None:
+        """Begin a new run with ``plan``, discarding the previous journal."""
+        with atomic_write(self.path) as f:
+            f.write(json.dumps({"event": "plan", "plan": plan}, ensure_ascii=False) + "\n")
+        self._apply({"event": "plan", "plan": plan})
+
+    def record(self, url: str, tool: str, ok: bool = True) -> None:
+        """Record that the result of ``tool`` for ``url`` has been stored.
+
+        Failed runs (``ok=False``) are stored too but repeated on resume.
+        """
+        self._append({"event": "tool", "url": url, "tool": tool, "ok": ok})
+
+    def finish(self) -> None:
+        self._append({"event": "finished"})
+
+    def is_done(self, url: str, tool: str) -> bool:
+        return tool in self.done.get(url, ())
+
+    def pending(self, urls: List[str], tools: List[str]) -> List[str]:
+        """Return the pages of ``urls`` with at least one tool still to run."""
+        return [url for url in urls if not all(self.is_done(url, tool) for tool in tools)]
@@ -0,0 +1,171 @@
+"""Non-interactive command line interface with one subcommand per stage.
+
+    python cli.py crawl https://example.org/ [--max-depth 2] [--max-pages 500] [--cluster]
+    python cli.py audit [--limit 20] [--no-daemon] [--full] [--no-cache] [--resume] [--metrics-textfile PATH]
+    python cli.py combine
+    python cli.py score [--profile legacy ...]
+    python cli.py report
+
+Every stage reads the files written by the one before it, so stages can be
+run separately, repeated, or scheduled independently.  ``audit --resume``
+continues an interrupted audit from its journal (see ``checkpoint``).  Modules are imported
+inside the subcommands: ``score`` never loads matplotlib, and only ``crawl``
+and ``audit`` touch the network or the Node tooling.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from checkpoint import atomic_write, write_json
+
+# Files passed between the stages.
+PAGES_FILE = "zu_pruefende_seiten.txt"
+INFERRED_FILE = "abgeleitete_seiten.json"
+AUDIT_RUN_FILE = "audit_lauf.json"
+
+
+def _read_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def cmd_crawl(args: argparse.Namespace) -> int:
+    if not args.url.startswith("http"):
+        print("Bitte mit http:// oder https:// beginnen.")
+        return 2
+    import accessibility1
+
+    accessibility1.delete_old_results()
+    limits = {"max_depth": args.max_depth, "max_pages": args.max_pages}
+    seiten, inferred = accessibility1.collect_pages(
+        args.url, template_clustering=args.cluster, **{k: v for k, v in limits.items() if v is not None}
+    )
+    with atomic_write(args.output) as f:
+        f.writelines(f"{url}\n" for url in seiten)
+    write_json(INFERRED_FILE, inferred)
+    print(f"{len(seiten)} Seite(n) in {args.output} gespeichert.")
+    return 0
+
+
+def cmd_audit(args: argparse.Namespace) -> int:
+    try:
+        with open(args.urls, "r", encoding="utf-8") as f:
+            urls: List[str] = [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        print(f"{args.urls} nicht gefunden. Zuerst 'crawl' ausführen.")
+        return 2
+    if args.limit:
+        urls = urls[: args.limit]
+    import accessibility1
+
+    if not accessibility1._check_node_version():
+        return 1
+    # Result stores are append-only; start from empty ones unless an
+    # interrupted run is continued.
+    resume = args.resume and accessibility1.RunJournal.load().interrupted
+    if args.resume and not resume:
+        print("Kein unterbrochener Lauf gefunden, starte einen neuen Lauf.")
+    for path in (accessibility1.PA11Y_RESULTS, accessibility1.AXE_RESULTS, accessibility1.LIGHTHOUSE_RESULTS):
+        for name in (path, accessibility1.index_path(path)):
+            if not resume and os.path.exists(name):
+                os.remove(name)
+    run = accessibility1.audit_pages(
+        urls,
+        inferred=_read_json(INFERRED_FILE, {}),
+        use_daemon=not args.no_daemon,
+        incremental=accessibility1.INCREMENTAL_AUDIT and not args.full,
+        use_cache=accessibility1.AUDIT_CACHE and not args.no_cache,
+        announce=f"Starte Barrierefreiheits‑Checks für {len(urls)} Seite(n) …",
+        resume=resume,
+        metrics_textfile=args.metrics_textfile or accessibility1.METRICS_TEXTFILE,
+    )
+    write_json(AUDIT_RUN_FILE, run)
+    return 0
+
+
+def cmd_combine(args: argparse.Namespace) -> int:
+    import accessibility1
+
+    # The audit stores the inferred pages whose representative it audited.
+    accessibility1.combine_run(_read_json(AUDIT_RUN_FILE, {}))
+    return 0
+
+
+def cmd_score(args: argparse.Namespace) -> int:
+    if not os.path.exists(args.bewertung):
+        print(f"{args.bewertung} nicht gefunden. Zuerst 'combine' ausführen.")
+        return 2
+    if args.profile:
+        import rescore
+
+        results = rescore.rescore(args.profile, args.bewertung)
+        for name, (_site, per_url) in results.items():
+            write_json(f"scores_per_url.{os.path.splitext(os.path.basename(name))[0]}.json", per_url)
+        rescore._print_table(results)
+        return 0
+    import accessibility1
+
+    accessibility1.print_score_and_prioritization(Path(args.bewertung))
+    accessibility1.print_scores_per_url(charts=False, path=Path(args.bewertung))
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    import accessibility1
+
+    if not os.path.exists("scores_per_url.json"):
+        accessibility1.print_scores_per_url(charts=False)
+    accessibility1.visualisation()
+    accessibility1.plot_scores_per_url()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Barrierefreiheitsanalyse in einzelnen Schritten ausführen.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("crawl", help="Website crawlen und die zu prüfenden Seiten speichern")
+    p.add_argument("url", help="Start-URL (inkl. https://)")
+    p.add_argument("--max-depth", type=int, help="maximale Linktiefe (Standard des Crawlers)")
+    p.add_argument("--max-pages", type=int, help="maximale Anzahl gefundener Links (Standard des Crawlers)")
+    p.add_argument("--cluster", action="store_true", help="nur Vertreter jedes Seiten-Templates prüfen")
+    p.add_argument("--output", default=PAGES_FILE, help="Datei für die gefundenen Seiten")
+    p.set_defaults(func=cmd_crawl)
+
+    p = sub.add_parser("audit", help="Pa11y, axe und Lighthouse gegen die gespeicherten Seiten ausführen")
+    p.add_argument("--urls", default=PAGES_FILE, help="Datei mit einer URL pro Zeile")
+    p.add_argument("--limit", type=int, default=0, help="nur die ersten N Seiten prüfen (0 für alle)")
+    p.add_argument("--no-daemon", action="store_true", help="npx statt des Node-Workers verwenden")
+    p.add_argument("--full", action="store_true", help="auch unveränderte Seiten erneut prüfen")
+    p.add_argument("--no-cache", action="store_true", help="Audit-Cache nicht verwenden")
+    p.add_argument("--resume", action="store_true", help="unterbrochenen Lauf aus dem Journal fortsetzen")
+    p.add_argument("--metrics-textfile", help="Ressourcenverbrauch der Tools als Prometheus-Textdatei schreiben")
+    p.set_defaults(func=cmd_audit)
+
+    p = sub.add_parser("combine", help="Ergebnisse der Tools zu bewertung.json zusammenführen")
+    p.set_defaults(func=cmd_combine)
+
+    p = sub.add_parser("score", help="Scores berechnen und ausgeben")
+    p.add_argument("--profile", action="append", help="Gewichtungsprofil (mehrfach möglich)")
+    p.add_argument("--bewertung", default="bewertung.json", help="bewertung.json der Prüfung")
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser("report", help="Diagramme und Zusammenfassungen erzeugen")
+    p.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Breadth-first crawler for collecting the internal pages of a website.
+
+Pages are fetched level by level with a pooled HTTP client: all pages of one
+depth are requested concurrently over keep-alive connections before the next
+depth is started.  If ``aiohttp`` is installed it is used as the asynchronous
+client; otherwise a thread pool sharing one ``requests.Session`` is used.
+Links are read with the streaming tokenizer of ``link_extractor`` instead of
+a full BeautifulSoup tree.  Every request takes a slot from the per-host
+rate limiter of ``ratelimit``.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urlparse
+
+from link_extractor import DEFAULT_BACKEND, get_extractor
+from ratelimit import THROTTLE_STATUS, get_limiter, parse_retry_after
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_MAX_PAGES = 5000
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 10.0
+# How often a page answered with 429/503 is requested again; the rate
+# limiter pauses the host before each retry.
+THROTTLE_RETRIES = 2
+
+# (final URL after redirects, HTML body) or ``None`` if the page could not be
+# fetched or is not an HTML document.
+FetchResult = Optional[Tuple[str, str]]
+ScopeCheck = Callable[[str, str], bool]
+PageCallback = Callable[[str, str], None]
+
+
+class _AiohttpFetcher:
+    """Fetch pages concurrently with one pooled ``aiohttp`` session."""
+
+    def __init__(self, concurrency: int, timeout: float) -> None:
+        import aiohttp
+
+        self._aiohttp = aiohttp
+        self._limiter = get_limiter()
+        self._loop = asyncio.new_event_loop()
+        self._concurrency = concurrency
+        self._timeout = timeout
+        self._session = self._loop.run_until_complete(self._open())
+
+    async def _open(self):
+        connector = self._aiohttp.TCPConnector(limit=self._concurrency, keepalive_timeout=30)
+        return self._aiohttp.ClientSession(
+            connector=connector,
+            timeout=self._aiohttp.ClientTimeout(total=self._timeout),
+        )
+
+    async def _fetch(self, semaphore: asyncio.Semaphore, url: str) -> FetchResult:
+        for _attempt in range(THROTTLE_RETRIES + 1):
+            # Wait for the host's slot before taking a connection, so a
+            # throttled host does not block requests to the others.
+            async with self._limiter.arequest(url) as ticket, semaphore:
+                try:
+                    async with self._session.get(url) as response:
+                        ticket.status = response.status
+                        if response.status in THROTTLE_STATUS:
+                            ticket.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            continue
+                        if response.status >= 400 or "html" not in response.headers.get("Content-Type", ""):
+                            return None
+                        return str(response.url), await response.text(errors="replace")
+                except (self._aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError) as exc:
+                    ticket.failed = True
+                    print(f"Fehler beim Abrufen der Seite {url}: {exc}")
+                    return None
+        return None
+
+    async def _fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        semaphore = asyncio.Semaphore(self._concurrency)
+        return await asyncio.gather(*(self._fetch(semaphore, url) for url in urls))
+
+    def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        return self._loop.run_until_complete(self._fetch_all(urls))
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self._session.close())
+        self._loop.close()
+
+
+class _RequestsFetcher:
+    """Fetch pages with a thread pool sharing one pooled ``requests.Session``."""
+
+    def __init__(self, concurrency: int, timeout: float) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._requests = requests
+        self._limiter = get_limiter()
+        self._timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _fetch(self, url: str) -> FetchResult:
+        for _attempt in range(THROTTLE_RETRIES + 1):
+            with self._limiter.request(url) as ticket:
+                try:
+                    response = self._session.get(url, timeout=self._timeout)
+                except self._requests.RequestException as exc:
+                    ticket.failed = True
+                    print(f"Fehler beim Abrufen der Seite {url}: {exc}")
+                    return None
+                ticket.status = response.status_code
+                if response.status_code in THROTTLE_STATUS:
+                    ticket.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    continue
+            if response.status_code >= 400 or "html" not in response.headers.get("Content-Type", ""):
+                return None
+            return response.url, response.text
+        return None
+
+    def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        return list(self._pool.map(self._fetch, urls))
+
+    def close(self) -> None:
+        self._pool.shutdown()
+        self._session.close()
+
+
+def _make_fetcher(concurrency: int, timeout: float):
+    try:
+        return _AiohttpFetcher(concurrency, timeout)
+    except ModuleNotFoundError:
+        return _RequestsFetcher(concurrency, timeout)
+
+
+def fetch_pages(
+    urls: List[str], concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT
+) -> List[FetchResult]:
+    """Fetch ``urls`` concurrently and return their results in the same order."""
+    fetcher = _make_fetcher(concurrency, timeout)
+    try:
+        return fetcher.fetch_all(urls)
+    finally:
+        fetcher.close()
+
+
+class _SiteCrawl:
+    """Breadth-first crawl state of one site.
+
+    The crawl does not fetch anything itself: the caller fetches
+    :attr:`frontier` and hands the results to :meth:`process`, which
+    collects the links and prepares the next level.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        in_scope: ScopeCheck,
+        max_depth: int,
+        max_pages: int,
+        on_page: Optional[PageCallback] = None,
+        link_backend: str = DEFAULT_BACKEND,
+    ) -> None:
+        self.start_url = start_url
+        self.in_scope = in_scope
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.on_page = on_page
+        self._extract = get_extractor(link_backend)
+        self.found: List[str] = []
+        self.frontier = [start_url]
+        self.depth = 0
+        self.done = False
+        self._seen_links = set()
+        self._fetched = {urldefrag(start_url)[0]}
+
+    @property
+    def active(self) -> bool:
+        return not self.done and bool(self.frontier) and self.depth < self.max_depth
+
+    def process(self, results: List[FetchResult]) -> None:
+        """Collect the links of the fetched :attr:`frontier` pages."""
+        next_frontier: List[str] = []
+        for url, result in zip(self.frontier, results):
+            if result is None:
+                continue
+            final_url, html = result
+            if self.on_page is not None:
+                self.on_page(url, html)
+            for link in self._extract(html, final_url):
+                if link in self._seen_links or urlparse(link).scheme not in ("http", "https"):
+                    continue
+                if not self.in_scope(self.start_url, link):
+                    continue
+                self._seen_links.add(link)
+                if len(self.found) >= self.max_pages:
+                    self.done = True
+                    return
+                self.found.append(link)
+                page = urldefrag(link)[0]
+                if page not in self._fetched:
+                    self._fetched.add(page)
+                    next_frontier.append(link)
+        self.frontier = next_frontier
+        self.depth += 1
+
+
+def crawl(
+    start_url: str,
+    in_scope: ScopeCheck,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_page: Optional[PageCallback] = None,
+    delay: float = 0.0,
+    link_backend: str = DEFAULT_BACKEND,
+) -> List[str]:
+    """Crawl ``start_url`` breadth-first and return the internal links found.
+
+    Parameters
+    ----------
+    start_url: str
+        The page the crawl starts from (depth 0).
+    in_scope: Callable[[str, str], bool]
+        ``in_scope(start_url, link)`` decides whether a link belongs to the
+        site, e.g. ``ist_internal_link``.
+    max_depth: int
+        Number of link levels to follow.  With ``1`` only the start page is
+        fetched and the links on it are returned.
+    max_pages: int
+        Upper bound for the number of URLs returned.
+    concurrency: int
+        Number of requests that are in flight at the same time.
+    timeout: float
+        Timeout in seconds for each request.
+    on_page: Callable[[str, str], None], optional
+        Called with ``(url, html)`` for every successfully fetched page.
+    delay: float
+        Seconds to wait between two requests, e.g. the ``Crawl-delay`` of
+        ``robots.txt``; it is applied to the host by the shared rate
+        limiter (see ``ratelimit``).
+    link_backend: str
+        Parser used to extract the links of a page (see ``link_extractor``).
+
+    Links are returned in discovery order.  Only ``http`` and ``https``
+    links are collected; fragments are ignored when deciding whether a page
+    still has to be fetched.
+    """
+    if delay > 0:
+        get_limiter().configure(start_url, crawl_delay=delay)
+    site = _SiteCrawl(start_url, in_scope, max_depth, max_pages, on_page, link_backend)
+    fetcher = _make_fetcher(concurrency, timeout)
+    try:
+        while site.active:
+            site.process(fetcher.fetch_all(site.frontier))
+    finally:
+        fetcher.close()
+    return site.found
+
+
+def crawl_sites(
+    start_urls: List[str],
+    in_scope: ScopeCheck,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_page: Optional[Callable[[int, str, str], None]] = None,
+    link_backend: str = DEFAULT_BACKEND,
+) -> List[List[str]]:
+    """Crawl several sites over one shared connection pool.
+
+    The current levels of all sites are fetched together, with the URLs of
+    the sites interleaved round-robin so that one large site cannot occupy
+    all ``concurrency`` slots while the others wait.  Each site is crawled
+    exactly like :func:`crawl` would crawl it.  ``on_page`` is called with
+    ``(site_index, url, html)``.  Returns the found links of each site in
+    the order of ``start_urls``.
+    """
+    sites = [
+        _SiteCrawl(
+            url,
+            in_scope,
+            max_depth,
+            max_pages,
+            (lambda page, html, i=i: on_page(i, page, html)) if on_page is not None else None,
+            link_backend,
+        )
+        for i, url in enumerate(start_urls)
+    ]
+    fetcher = _make_fetcher(concurrency, timeout)
+    try:
+        while True:
+            active = [site for site in sites if site.active]
+            if not active:
+                break
+            batch = [
+                (site, url)
+                for level in zip_longest(*(site.frontier for site in active))
+                for site, url in zip(active, level)
+                if url is not None
+            ]
+            results: Dict[int, List[FetchResult]] = {id(site): [] for site in active}
+            for (site, _url), result in zip(batch, fetcher.fetch_all([url for _site, url in batch])):
+                results[id(site)].append(result)
+            for site in active:
+                site.process(results[id(site)])
+    finally:
+        fetcher.close()
+    return [site.found for site in sites]
@@ -0,0 +1,199 @@
+"""SQLite store of the combined findings with indexed aggregations.
+
+``bewertung.json`` holds one object per page with the findings of every tool.
+Reports only need counts – per page and tool, per category, per page and
+category – so the findings are additionally written to an SQLite database
+next to it with one row per finding and indexes on page, tool and category.
+The query helpers below answer the report questions inside SQLite without
+loading all findings into Python.
+
+Rows keep the order in which findings appear in ``bewertung.json``; all
+helpers order ties by first occurrence, like :class:`collections.Counter`
+does for the JSON-based counting.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+TOOLS = ("pa11y", "axe", "lighthouse")
+ALL_TOOLS = "All tools"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    inferred_from TEXT
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    page_id INTEGER NOT NULL REFERENCES pages(id),
+    tool TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    message TEXT NOT NULL,
+    context TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages(url);
+CREATE INDEX IF NOT EXISTS findings_page_tool ON findings(page_id, tool);
+CREATE INDEX IF NOT EXISTS findings_tool_category ON findings(tool, category_id);
+CREATE INDEX IF NOT EXISTS findings_tool_message ON findings(tool, message);
+"""
+
+
+def issue_db_path(bewertung_path: str) -> str:
+    """Return the database path belonging to a ``bewertung.json`` file."""
+    return os.path.splitext(str(bewertung_path))[0] + ".sqlite"
+
+
+class IssueDB:
+    """Findings of all pages, one row per finding and tool."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "IssueDB":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @classmethod
+    def build(cls, entries: Iterable[dict], path: str, canonicalize: Callable[[str], str]) -> "IssueDB":
+        """Create the database at ``path`` from ``bewertung.json`` entries.
+
+        An existing database at ``path`` is replaced.  ``canonicalize`` maps
+        a tool message to its category.
+        """
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db = cls(tmp_path)
+        try:
+            db._insert(entries, canonicalize)
+            # Without statistics SQLite finds the findings of a page through
+            # the (tool, category) index, which makes ``histograms`` quadratic.
+            db._conn.execute("ANALYZE")
+        finally:
+            db.close()
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def _insert(self, entries: Iterable[dict], canonicalize: Callable[[str], str]) -> None:
+        categories: Dict[str, int] = {}
+
+        def category_id(message: str) -> int:
+            name = canonicalize(message) if message else ""
+            if name not in categories:
+                cursor = self._conn.execute("INSERT INTO categories (name) VALUES (?)", (name,))
+                categories[name] = cursor.lastrowid
+            return categories[name]
+
+        with self._conn:
+            for entry in entries:
+                url = entry.get("URL") or entry.get("url") or "unknown"
+                cursor = self._conn.execute(
+                    "INSERT INTO pages (url, inferred_from) VALUES (?, ?)", (url, entry.get("inferred_from"))
+                )
+                page_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO findings (page_id, tool, category_id, message, context) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (page_id, tool, category_id(message), message, issue.get("context"))
+                        for tool in (*TOOLS, ALL_TOOLS)
+                        for issue in entry.get(tool, [])
+                        for message in (issue.get("message", ""),)
+                    ),
+                )
+
+    def counts_per_url(self) -> List[Dict[str, object]]:
+        """Return the number of findings per tool (and ``all``) for each page."""
+        counts: Dict[int, Dict[str, object]] = {}
+        rows = self._conn.execute(
+            "SELECT p.id, p.url, f.tool, COUNT(f.id) FROM pages p "
+            "LEFT JOIN findings f ON f.page_id = p.id GROUP BY p.id, f.tool ORDER BY p.id"
+        )
+        for page_id, url, tool, count in rows:
+            row = counts.setdefault(page_id, {"url": url, "pa11y": 0, "axe": 0, "lighthouse": 0, "all": 0})
+            if tool is not None:
+                row["all" if tool == ALL_TOOLS else tool] = count
+        return list(counts.values())
+
+    def top_messages(self, n: Optional[int] = None, tools: Sequence[str] = TOOLS) -> List[Tuple[str, int]]:
+        """Return the ``n`` most frequent tool messages of ``tools`` with their counts."""
+        placeholders = ", ".join("?" for _ in tools)
+        return self._conn.execute(
+            f"SELECT message, COUNT(*) AS n FROM findings WHERE tool IN ({placeholders}) AND message != '' "
+            "GROUP BY message ORDER BY n DESC, MIN(id) LIMIT ?",
+            (*tools, -1 if n is None else n),
+        ).fetchall()
+
+    def category_counts(self, tool: str = ALL_TOOLS) -> List[Tuple[str, int]]:
+        """Return the number of findings per category in order of first occurrence."""
+        return self._conn.execute(
+            "SELECT c.name, COUNT(*) FROM findings f JOIN categories c ON c.id = f.category_id "
+            "WHERE f.tool = ? AND f.message != '' GROUP BY f.category_id ORDER BY MIN(f.id)",
+            (tool,),
+        ).fetchall()
+
+    def top_categories(self, n: Optional[int] = None, tool: str = ALL_TOOLS) -> List[Tuple[str, int]]:
+        """Return the ``n`` most frequent categories with their counts."""
+        return self._conn.execute(
+            "SELECT c.name, COUNT(*) AS n FROM findings f JOIN categories c ON c.id = f.category_id "
+            "WHERE f.tool = ? AND f.message != '' GROUP BY f.category_id ORDER BY n DESC, MIN(f.id) LIMIT ?",
+            (tool, -1 if n is None else n),
+        ).fetchall()
+
+    def histogram(self, url: str, tool: str = ALL_TOOLS) -> Dict[str, int]:
+        """Return the number of findings per category for the page ``url``."""
+        rows = self._conn.execute(
+            "SELECT c.name, COUNT(*) FROM pages p JOIN findings f ON f.page_id = p.id "
+            "JOIN categories c ON c.id = f.category_id WHERE p.url = ? AND f.tool = ? AND f.message != '' "
+            "GROUP BY f.category_id ORDER BY MIN(f.id)",
+            (url, tool),
+        )
+        return dict(rows.fetchall())
+
+    def histograms(self, tool: str = ALL_TOOLS) -> Iterator[Tuple[str, Optional[str], Dict[str, int]]]:
+        """Yield ``(url, inferred_from, histogram)`` for every page in order."""
+        rows = self._conn.execute(
+            "SELECT p.id, p.url, p.inferred_from, c.name, COUNT(f.id) FROM pages p "
+            "LEFT JOIN findings f ON f.page_id = p.id AND f.tool = ? AND f.message != '' "
+            "LEFT JOIN categories c ON c.id = f.category_id "
+            "GROUP BY p.id, f.category_id ORDER BY p.id, MIN(f.id)",
+            (tool,),
+        )
+        current = None
+        for page_id, url, inferred_from, name, count in rows:
+            if current is None or current[0] != page_id:
+                if current is not None:
+                    yield current[1:]
+                current = (page_id, url, inferred_from, {})
+            if name is not None:
+                current[3][name] = count
+        if current is not None:
+            yield current[1:]
+
+
+def open_issue_db(bewertung_path: str, canonicalize: Callable[[str], str]) -> IssueDB:
+    """Open the database of ``bewertung_path``, building it if it is missing or stale."""
+    db_path = issue_db_path(bewertung_path)
+    if os.path.exists(db_path) and (
+        not os.path.exists(bewertung_path) or os.path.getmtime(db_path) >= os.path.getmtime(bewertung_path)
+    ):
+        return IssueDB(db_path)
+    try:
+        with open(bewertung_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        entries = []
+    return IssueDB.build(entries, db_path, canonicalize)
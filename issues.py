@@ -0,0 +1,115 @@
+"""Compact in-memory representation of single findings.
+
+Every finding of Pa11y, axe or Lighthouse becomes one :class:`Issue`.  The
+canonical message is stored as a small integer id from a process-wide
+:class:`CategoryTable`, the reporting tools as a bitmask and the HTML
+context as a 64-bit digest.  Deduplication and counting work on these
+integers, so long message and snippet strings are hashed only once.  The
+raw message and the snippet are kept as references to the strings of the
+parsed tool output; they are needed only when ``bewertung.json`` is
+written.
+"""
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOOL_PA11Y = 1
+TOOL_AXE = 2
+TOOL_LIGHTHOUSE = 4
+TOOL_BITS = {"pa11y": TOOL_PA11Y, "axe": TOOL_AXE, "lighthouse": TOOL_LIGHTHOUSE}
+
+
+class CategoryTable:
+    """Bidirectional mapping between canonical messages and integer ids."""
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        """Return the id of ``name``, assigning the next free id if it is new."""
+        try:
+            return self._ids[name]
+        except KeyError:
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+            return self._ids[name]
+
+    def name(self, category: int) -> str:
+        return self._names[category]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+CATEGORIES = CategoryTable()
+
+
+def context_digest(context: str) -> int:
+    """Return a stable 64-bit digest of an HTML context (0 for no context)."""
+    if not context:
+        return 0
+    return int.from_bytes(hashlib.blake2b(context.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Issue:
+    """A single finding: category id, tool bitmask and context digest."""
+
+    __slots__ = ("category", "tools", "message", "snippet", "_digest")
+
+    def __init__(self, category: int, tools: int, message: str, snippet: Optional[str] = "") -> None:
+        self.category = category
+        self.tools = tools
+        self.message = message
+        self.snippet = snippet
+        self._digest: Optional[int] = None
+
+    @property
+    def digest(self) -> int:
+        """64-bit digest of the snippet, computed on first use."""
+        if self._digest is None:
+            self._digest = context_digest(self.snippet)
+        return self._digest
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        """Identity used for deduplication: category and context digest."""
+        return self.category, self.digest
+
+    @property
+    def category_name(self) -> str:
+        return CATEGORIES.name(self.category)
+
+    def copy(self) -> "Issue":
+        clone = Issue.__new__(Issue)
+        clone.category, clone.tools, clone._digest = self.category, self.tools, self._digest
+        clone.message, clone.snippet = self.message, self.snippet
+        return clone
+
+    def as_dict(self, canonical: bool = False) -> Dict[str, str]:
+        """Return the ``bewertung.json`` form of the finding.
+
+        With ``canonical`` the canonical message is used instead of the
+        message reported by the tool.
+        """
+        return {"message": self.category_name if canonical else self.message, "context": self.snippet}
+
+    def __repr__(self) -> str:
+        return f"Issue({self.category_name!r}, tools={self.tools}, digest={self.digest:016x})"
+
+
+def merge_issues(groups: Iterable[Iterable[Issue]]) -> List[Issue]:
+    """Merge findings of several tools, keeping the first of each key.
+
+    Findings reported by more than one tool are returned once with the tool
+    bits combined.  The input records are not modified.
+    """
+    merged: Dict[Tuple[int, int], Issue] = {}
+    for group in groups:
+        for issue in group:
+            existing = merged.get(issue.key)
+            if existing is None:
+                merged[issue.key] = issue.copy()
+            else:
+                existing.tools |= issue.tools
+    return list(merged.values())
@@ -0,0 +1,140 @@
+"""Reduce Lighthouse reports to the fields the analysis uses.
+
+A full Lighthouse report is about 150 KB of JSON per page, but combining and
+rating only need, per audit, ``score``, ``title`` and the ``node`` of each
+entry in ``details.items``, plus ``categories.accessibility.score`` and the
+page URLs.  :func:`trim_report` keeps exactly these fields.
+
+Report files are parsed incrementally with ``ijson`` when it is installed,
+so only one audit at a time is held in memory; without ``ijson`` the file
+is loaded with :mod:`json` and trimmed afterwards.
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from result_store import iter_entries
+
+# Top-level report fields that are kept.
+REPORT_FIELDS = (
+    "requestedUrl",
+    "finalUrl",
+    "finalDisplayedUrl",
+    "mainDocumentUrl",
+    "lighthouseVersion",
+    "runtimeError",
+)
+
+
+def trim_audit(audit: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the score, title and failing nodes of one audit."""
+    trimmed = {"score": audit.get("score"), "title": audit.get("title", "")}
+    score = trimmed["score"]
+    items = (audit.get("details") or {}).get("items") if score is not None and score < 1 else None
+    if items:
+        trimmed["details"] = {"items": [{"node": item["node"]} if "node" in item else {} for item in items]}
+    return trimmed
+
+
+def trim_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a Lighthouse report with only the used fields.
+
+    Trimming an already trimmed report returns an equal report.
+    """
+    trimmed: Dict[str, Any] = {key: report[key] for key in REPORT_FIELDS if key in report}
+    accessibility = (report.get("categories") or {}).get("accessibility")
+    if accessibility is not None:
+        trimmed["categories"] = {"accessibility": {"score": accessibility.get("score")}}
+    trimmed["audits"] = {name: trim_audit(audit) for name, audit in (report.get("audits") or {}).items()}
+    return trimmed
+
+
+def trim_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Trim the report of a ``lighthouse_results`` entry.
+
+    Bare reports, as written by the Lighthouse CLI, are trimmed as well.
+    """
+    if "lighthouse_result" in entry:
+        return {**entry, "lighthouse_result": trim_report(entry["lighthouse_result"])}
+    if "audits" in entry:
+        return trim_report(entry)
+    return entry
+
+
+def _stream_report(f) -> Dict[str, Any]:
+    """Build the trimmed form of the report in ``f`` from ``ijson`` events."""
+    import ijson
+
+    report: Dict[str, Any] = {}
+    audits: Dict[str, Any] = {}
+    audit_id = None
+    builder: Optional[ijson.ObjectBuilder] = None
+    builder_prefix = ""
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == builder_prefix and event in ("end_map", "end_array"):
+                if builder_prefix == "runtimeError":
+                    report["runtimeError"] = builder.value
+                else:
+                    audits[audit_id] = trim_audit(builder.value)
+                builder = None
+        elif prefix == "audits" and event == "map_key":
+            audit_id = value
+        elif event == "start_map" and (prefix == f"audits.{audit_id}" or prefix == "runtimeError"):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            builder_prefix = prefix
+        elif prefix == "categories.accessibility.score":
+            report["categories"] = {"accessibility": {"score": value}}
+        elif prefix in REPORT_FIELDS:
+            report[prefix] = value
+    report["audits"] = audits
+    return report
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """Load the Lighthouse report at ``path`` in trimmed form."""
+    with open(path, "rb") as f:
+        try:
+            return _stream_report(f)
+        except ModuleNotFoundError:
+            f.seek(0)
+            return trim_report(json.load(f))
+
+
+def iter_lighthouse_entries(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the trimmed entries of a Lighthouse result file.
+
+    JSON-lines stores are read line by line.  A JSON file holding a list of
+    entries is streamed with ``ijson`` when it is installed, so at most one
+    full report is in memory at a time.
+    """
+    if path.endswith(".jsonl"):
+        for entry in iter_entries(path):
+            yield trim_entry(entry)
+        return
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        head = f.read(64).lstrip()
+        f.seek(0)
+        try:
+            import ijson
+        except ModuleNotFoundError:
+            ijson = None
+        if ijson is None or not head.startswith(b"["):
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return
+            for entry in [data] if isinstance(data, dict) else data:
+                yield trim_entry(entry)
+            return
+        try:
+            for entry in ijson.items(f, "item", use_float=True):
+                yield trim_entry(entry)
+        except ijson.JSONError as exc:
+            print(f"Fehler beim Lesen von {path}: {exc}")
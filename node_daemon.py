@@ -0,0 +1,258 @@
+"""Python client for the persistent Node audit worker (``audit_worker.js``).
+
+Instead of spawning ``npx`` three times per page, a single Node process is
+started per run.  Jobs are sent as JSON lines over stdin and results are
+streamed back over stdout, one line per finished engine.
+
+Time budgets are enforced inside the worker: every engine run is timed from
+the moment it starts, not from submission, and an expired run has its
+browser context closed and its browser retired so that it does not hold a
+concurrency slot.
+"""
+
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from watchdog import kill_process_tree
+
+if os.name == "nt":
+    NPM = "npm.cmd"
+else:
+    NPM = "npm"
+
+WORKER_SCRIPT = Path(__file__).with_name("audit_worker.js")
+ENGINES = ("pa11y", "axe", "lighthouse")
+
+ResultCallback = Callable[[str, Optional[Any]], None]
+
+
+class DaemonError(RuntimeError):
+    """Raised when the audit worker cannot be started or has died."""
+
+
+class DaemonTimeout(DaemonError):
+    """Raised when an audit does not finish within its time budget."""
+
+
+def _node_path() -> str:
+    """Return a ``NODE_PATH`` that includes the global npm modules."""
+    paths = [str(Path.cwd() / "node_modules")]
+    try:
+        result = subprocess.run([NPM, "root", "-g"], capture_output=True, text=True, timeout=60)
+        if result.returncode == 0 and result.stdout.strip():
+            paths.append(result.stdout.strip())
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    existing = os.environ.get("NODE_PATH")
+    if existing:
+        paths.append(existing)
+    return os.pathsep.join(paths)
+
+
+class _Job:
+    """Book-keeping for one submitted URL."""
+
+    def __init__(self, engines: List[str], on_result: Optional[ResultCallback]) -> None:
+        self.engines = engines
+        self.on_result = on_result
+        self.results: Dict[str, Optional[Any]] = {}
+        self.timed_out: List[str] = []
+        self.error = ""
+        self.future: Future = Future()
+
+
+class AuditDaemon:
+    """Long-lived Node process that runs Pa11y, axe-core and Lighthouse.
+
+    All engines share a pool of ``browsers`` headless Chrome instances
+    inside the worker.  Every engine run gets a browser context of its own;
+    a browser is replaced after ``max_pages_per_browser`` audits.
+
+    The daemon is thread-safe: :meth:`submit` and :meth:`audit` may be called
+    from several scheduler threads at the same time.  Use it as a context
+    manager so the Node process is shut down at the end of the run::
+
+        with AuditDaemon() as daemon:
+            results = daemon.audit(url, ["pa11y", "axe"])
+    """
+
+    def __init__(
+        self,
+        node: str = "node",
+        script: Path = WORKER_SCRIPT,
+        concurrency: int = 4,
+        browsers: int = 1,
+        max_pages_per_browser: int = 50,
+    ) -> None:
+        self.node = node
+        self.script = script
+        self.concurrency = concurrency
+        self.browsers = browsers
+        self.max_pages_per_browser = max_pages_per_browser
+        self.versions: Dict[str, Optional[str]] = {}
+        self._proc: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, _Job] = {}
+        self._next_id = 1
+        self._ready = threading.Event()
+        self._error: Optional[str] = None
+
+    def start(self, timeout: float = 60.0) -> "AuditDaemon":
+        """Start the Node worker and wait until it has loaded all engines."""
+        env = dict(os.environ, NODE_PATH=_node_path())
+        try:
+            self._proc = subprocess.Popen(
+                [
+                    self.node,
+                    str(self.script),
+                    "--concurrency",
+                    str(self.concurrency),
+                    "--browsers",
+                    str(self.browsers),
+                    "--max-pages-per-browser",
+                    str(self.max_pages_per_browser),
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                env=env,
+                # Own process group, so the worker and its browsers can be
+                # killed as a whole.
+                start_new_session=os.name != "nt",
+            )
+        except OSError as exc:
+            raise DaemonError(f"Audit-Worker konnte nicht gestartet werden: {exc}") from exc
+        self._reader = threading.Thread(target=self._read_loop, name="audit-daemon-reader", daemon=True)
+        self._reader.start()
+        if not self._ready.wait(timeout) or self._error:
+            self.close()
+            raise DaemonError(self._error or "Audit-Worker hat nicht rechtzeitig geantwortet.")
+        return self
+
+    def _read_loop(self) -> None:
+        assert self._proc is not None and self._proc.stdout is not None
+        for line in self._proc.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "ready" in message:
+                if not message["ready"]:
+                    self._error = message.get("error", "Audit-Worker konnte nicht initialisiert werden.")
+                self.versions = message.get("versions", {})
+                self._ready.set()
+                continue
+            self._dispatch(message)
+        # stdout closed: the worker has exited.  Fail all pending jobs.
+        self._error = self._error or "Audit-Worker wurde beendet."
+        self._ready.set()
+        with self._lock:
+            jobs, self._jobs = self._jobs, {}
+        for job in jobs.values():
+            if not job.future.done():
+                job.future.set_exception(DaemonError(self._error))
+
+    def _dispatch(self, message: dict) -> None:
+        with self._lock:
+            job = self._jobs.get(message.get("id"))
+        if job is None:
+            return
+        if message.get("done"):
+            with self._lock:
+                self._jobs.pop(message["id"], None)
+            for engine in job.engines:
+                job.results.setdefault(engine, None)
+            if job.timed_out:
+                job.future.set_exception(DaemonTimeout(f"{', '.join(job.timed_out)}: {job.error}"))
+            else:
+                job.future.set_result(job.results)
+            return
+        engine = message.get("engine", "")
+        if message.get("ok"):
+            result = message.get("result")
+        elif message.get("timeout"):
+            job.timed_out.append(engine)
+            job.error = message.get("error", "Zeitlimit überschritten")
+            result = None
+        else:
+            print(f"Fehler bei {engine}: {message.get('error', '')}")
+            result = None
+        job.results[engine] = result
+        if job.on_result is not None:
+            job.on_result(engine, result)
+
+    @property
+    def running(self) -> bool:
+        """``True`` while the worker process is alive."""
+        return self._proc is not None and self._proc.poll() is None
+
+    def submit(
+        self,
+        url: str,
+        engines: Sequence[str] = ENGINES,
+        on_result: Optional[ResultCallback] = None,
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """Queue an audit of ``url`` and return a future for ``{engine: result}``.
+
+        ``on_result`` is called from the reader thread as soon as an engine has
+        finished, which allows results to be processed while other engines are
+        still running.  Failed engines are reported as ``None``.  Each engine
+        run gets ``timeout`` seconds from its start in the worker; if one is
+        exceeded, the future fails with :class:`DaemonTimeout`.
+        """
+        if not self.running:
+            raise DaemonError(self._error or "Audit-Worker läuft nicht.")
+        job = _Job(list(engines), on_result)
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = job
+            assert self._proc.stdin is not None
+            request: Dict[str, Any] = {"id": job_id, "url": url, "engines": job.engines}
+            if timeout is not None:
+                request["timeout"] = timeout
+            self._proc.stdin.write(json.dumps(request) + "\n")
+            self._proc.stdin.flush()
+        return job.future
+
+    def audit(
+        self, url: str, engines: Sequence[str] = ENGINES, timeout: Optional[float] = None
+    ) -> Dict[str, Optional[Any]]:
+        """Audit ``url`` with ``engines`` and block until all results are in.
+
+        Raises :class:`DaemonTimeout` if an engine run took longer than
+        ``timeout`` seconds; the worker has abandoned that run by then.
+        """
+        return self.submit(url, engines, timeout=timeout).result()
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Close stdin and wait for the worker to finish its pending jobs."""
+        if self._proc is None:
+            return
+        try:
+            if self._proc.stdin is not None:
+                self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(self._proc)
+        self._proc = None
+
+    def __enter__(self) -> "AuditDaemon":
+        if self._proc is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,241 @@
+"""Per-host request limits shared by the crawler and the audit tools.
+
+Every request to a site – a crawler fetch, a change check of the
+incremental audit or a Pa11y/axe/Lighthouse run – first takes a slot from
+the :class:`HostRateLimiter` for the host of its URL.  Per host the limiter
+enforces
+
+* a maximum number of requests in flight (the *window*),
+* a minimum interval between the starts of two requests (``Crawl-delay``),
+* a pause after ``429 Too Many Requests``/``503 Service Unavailable``,
+  honouring ``Retry-After``.
+
+The window adapts AIMD-style: it grows by ``1/window`` for every fast,
+successful response (about one slot per round trip), and is halved on a
+429/503 or a failed request, and when the smoothed latency rises above
+``LATENCY_FACTOR`` times the fastest latency seen on the host.  Decreases
+happen at most once per window of responses, so one burst of throttled or
+slow answers does not collapse the window.
+
+One process-wide limiter is returned by :func:`get_limiter`; the crawler,
+``audit_state`` and the audit tools all use it, so the limits hold for the
+whole run however the work is spread over threads and event loops.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_INITIAL_WINDOW = 4.0
+# Smoothed latency above this multiple of the fastest latency counts as
+# congestion.
+LATENCY_FACTOR = 3.0
+# Pause after a 429/503 without ``Retry-After``; doubled for every further
+# one in a row, up to ``MAX_BACKOFF``.
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+THROTTLE_STATUS = (429, 503)
+
+ToolRunner = Callable[[str], Optional[dict]]
+
+
+class Ticket:
+    """One admitted request; set ``status`` (and ``retry_after``) when the response arrives.
+
+    ``timed`` is cleared for requests whose duration says nothing about the
+    server's load, such as complete tool runs.
+    """
+
+    __slots__ = ("host", "started", "status", "retry_after", "failed", "timed")
+
+    def __init__(self, host: str, started: float) -> None:
+        self.host = host
+        self.started = started
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self.failed = False
+        self.timed = True
+
+
+class _Host:
+    __slots__ = (
+        "max_in_flight",
+        "window",
+        "in_flight",
+        "min_interval",
+        "next_start",
+        "latency",
+        "base_latency",
+        "backoff",
+        "since_decrease",
+    )
+
+    def __init__(self, max_in_flight: int, window: float) -> None:
+        self.max_in_flight = max_in_flight
+        self.window = min(window, float(max_in_flight))
+        self.in_flight = 0
+        self.min_interval = 0.0
+        self.next_start = 0.0
+        self.latency: Optional[float] = None
+        self.base_latency: Optional[float] = None
+        self.backoff = 0.0
+        # Responses since the last decrease; the first congestion signal of
+        # a host always counts.
+        self.since_decrease = max_in_flight
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the seconds of a ``Retry-After`` header given in seconds."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class HostRateLimiter:
+    """Adaptive per-host concurrency and rate limits."""
+
+    def __init__(
+        self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, initial_window: float = DEFAULT_INITIAL_WINDOW
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.initial_window = initial_window
+        self._hosts: Dict[str, _Host] = {}
+        self._cond = threading.Condition()
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(self.max_in_flight, self.initial_window)
+        return state
+
+    def configure(
+        self, url: str, max_in_flight: Optional[int] = None, crawl_delay: Optional[float] = None
+    ) -> None:
+        """Set the limits of the host of ``url``, e.g. from its ``robots.txt``."""
+        with self._cond:
+            state = self._host(host_of(url))
+            if max_in_flight is not None:
+                state.max_in_flight = max(1, max_in_flight)
+                state.window = min(state.window, float(state.max_in_flight))
+            if crawl_delay is not None:
+                state.min_interval = max(0.0, crawl_delay)
+
+    def window(self, url: str) -> float:
+        with self._cond:
+            return self._host(host_of(url)).window
+
+    def _try_acquire(self, host: str) -> float:
+        """Take a slot and return 0, or return the seconds to wait."""
+        now = time.monotonic()
+        state = self._host(host)
+        if state.in_flight >= max(1, int(state.window)):
+            return -1.0
+        if now < state.next_start:
+            return state.next_start - now
+        state.in_flight += 1
+        state.next_start = now + state.min_interval
+        return 0.0
+
+    def _release(self, ticket: Ticket) -> None:
+        latency = time.monotonic() - ticket.started
+        with self._cond:
+            state = self._host(ticket.host)
+            state.in_flight -= 1
+            state.since_decrease += 1
+            throttled = ticket.status in THROTTLE_STATUS
+            if throttled:
+                state.backoff = min(MAX_BACKOFF, state.backoff * 2 if state.backoff else INITIAL_BACKOFF)
+                pause = ticket.retry_after if ticket.retry_after is not None else state.backoff
+                state.next_start = max(state.next_start, time.monotonic() + pause)
+            else:
+                state.backoff = 0.0
+                if ticket.timed and not ticket.failed:
+                    state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                    if state.base_latency is None or latency < state.base_latency:
+                        state.base_latency = latency
+            slow = state.base_latency is not None and state.latency > LATENCY_FACTOR * max(state.base_latency, 0.01)
+            if throttled or ticket.failed or slow:
+                if state.since_decrease >= state.window:
+                    state.window = max(1.0, state.window / 2)
+                    state.since_decrease = 0
+            else:
+                state.window = min(float(state.max_in_flight), state.window + 1.0 / state.window)
+            self._cond.notify_all()
+
+    @contextmanager
+    def request(self, url: str) -> Iterator[Ticket]:
+        """Wait for a slot for ``url`` and hold it for the duration of the block."""
+        host = host_of(url)
+        with self._cond:
+            while True:
+                wait = self._try_acquire(host)
+                if wait == 0.0:
+                    break
+                self._cond.wait(timeout=None if wait < 0 else wait)
+        ticket = Ticket(host, time.monotonic())
+        try:
+            yield ticket
+        except BaseException:
+            ticket.failed = True
+            raise
+        finally:
+            self._release(ticket)
+
+    @asynccontextmanager
+    async def arequest(self, url: str):
+        """Asynchronous form of :meth:`request` for event-loop clients."""
+        host = host_of(url)
+        while True:
+            with self._cond:
+                wait = self._try_acquire(host)
+            if wait == 0.0:
+                break
+            await asyncio.sleep(0.01 if wait < 0 else wait)
+        ticket = Ticket(host, time.monotonic())
+        try:
+            yield ticket
+        except BaseException:
+            ticket.failed = True
+            raise
+        finally:
+            self._release(ticket)
+
+
+_LIMITER = HostRateLimiter()
+
+
+def get_limiter() -> HostRateLimiter:
+    """Return the limiter shared by all requests of this process."""
+    return _LIMITER
+
+
+def rate_limited_tools(
+    tools: Dict[str, ToolRunner], limiter: Optional[HostRateLimiter] = None
+) -> Dict[str, ToolRunner]:
+    """Wrap ``tools`` so that every run takes a slot for the host of its URL.
+
+    A run that produces no result counts as a failed request; the duration
+    of a run is not used as a latency sample.
+    """
+    limiter = limiter or get_limiter()
+
+    def _wrap(runner: ToolRunner) -> ToolRunner:
+        def run(url: str) -> Optional[dict]:
+            with limiter.request(url) as ticket:
+                ticket.timed = False
+                entry = runner(url)
+                ticket.failed = entry is None
+                return entry
+
+        return run
+
+    return {name: _wrap(runner) for name, runner in tools.items()}
@@ -0,0 +1,73 @@
+"""Recompute the scores of a finished run with other weight profiles.
+
+The findings per page and category are read from ``bewertung.sqlite`` (it is
+rebuilt from ``bewertung.json`` if necessary), so no audit tool is run.
+Several profiles can be evaluated in one pass; the per-URL results of each
+profile are written to ``scores_per_url.<profile>.json``.
+
+    python rescore.py --profile legacy
+    python rescore.py --profile default --profile legacy
+    python rescore.py --list
+"""
+
+import argparse
+import os
+from typing import Dict, List, Sequence, Tuple
+
+from canonicalizer import Canonicalizer
+from checkpoint import write_json
+from issue_db import open_issue_db
+from scoring import CountMatrix
+from weight_profiles import DEFAULT_PROFILE, WeightProfile, available_profiles
+
+SiteScore = Tuple[float, float, List[Dict[str, object]]]
+
+
+def rescore(
+    profiles: Sequence[str], bewertung: str = "bewertung.json"
+) -> Dict[str, Tuple[SiteScore, List[Dict[str, object]]]]:
+    """Return ``{profile: (site score, per-URL scores)}`` for the stored run."""
+    canonicalizer = Canonicalizer.from_file()
+    with open_issue_db(bewertung, canonicalizer.canonicalize) as db:
+        matrix = CountMatrix(db.histograms())
+    site_counts = matrix.site_counts()
+    results = {}
+    for name in profiles:
+        engine = WeightProfile.load(name).engine(canonicalizer.canonical_messages, canonicalizer.rules)
+        results[name] = (engine.site_score(site_counts), engine.score_matrix(matrix))
+    return results
+
+
+def _print_table(results: Dict[str, Tuple[SiteScore, List[Dict[str, object]]]]) -> None:
+    names = list(results)
+    print("Score".ljust(60) + "".join(name[:12].rjust(14) for name in names))
+    print("Gesamt".ljust(60) + "".join(f"{results[name][0][0]:14.1f}" for name in names))
+    per_url = [results[name][1] for name in names]
+    for rows in zip(*per_url):
+        url = str(rows[0]["url"])
+        print((url if len(url) <= 58 else url[:55] + "...").ljust(60) + "".join(f"{row['score']:14.1f}" for row in rows))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scores einer Prüfung mit anderen Gewichtungsprofilen neu berechnen.")
+    parser.add_argument("--profile", action="append", help="Profilname aus profiles/ oder Pfad zu einer JSON-Datei")
+    parser.add_argument("--bewertung", default="bewertung.json", help="bewertung.json der Prüfung")
+    parser.add_argument("--output-dir", default=".", help="Verzeichnis für scores_per_url.<profil>.json")
+    parser.add_argument("--list", action="store_true", help="verfügbare Profile anzeigen")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in available_profiles():
+            print(f"{name}: {WeightProfile.load(name).description}")
+        return
+
+    results = rescore(args.profile or [DEFAULT_PROFILE], args.bewertung)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, (_site, per_url) in results.items():
+        output = os.path.join(args.output_dir, f"scores_per_url.{os.path.splitext(os.path.basename(name))[0]}.json")
+        write_json(output, per_url)
+    _print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Append-only JSON-lines store for the raw tool results.
+
+Each result entry (``{"url": ..., "results"/"axe_result"/"lighthouse_result": ...}``)
+is written as one line to ``<name>.jsonl``.  Next to it, ``<name>.jsonl.idx``
+records the byte offset and length of every entry together with its URL, so
+single pages can be looked up without parsing the whole file.  Writing an
+entry only touches the bytes of that entry, independent of how many pages
+have been stored before.
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from checkpoint import atomic_write
+
+
+def index_path(path: str) -> str:
+    """Return the path of the offset index belonging to ``path``."""
+    return path + ".idx"
+
+
+class ResultStore:
+    """Append-only store of result entries with a per-URL offset index."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[Tuple[int, int]]] = {}
+        self._index_loaded = False
+
+    def append(self, entry: dict, sync: bool = False) -> None:
+        """Append ``entry`` as a single line and record its offset.
+
+        With ``sync`` the line is on disk when the call returns.
+        """
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        url = entry.get("url", "")
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            with open(index_path(self.path), "a", encoding="utf-8") as idx:
+                idx.write(json.dumps({"url": url, "offset": offset, "length": len(line)}, ensure_ascii=False) + "\n")
+            if self._index_loaded:
+                self._index.setdefault(url, []).append((offset, len(line)))
+
+    def _load_index(self) -> None:
+        """Read the offset index, rebuilding it if it does not match the data file."""
+        index: Dict[str, List[Tuple[int, int]]] = {}
+        end = 0
+        try:
+            with open(index_path(self.path), "r", encoding="utf-8") as idx:
+                for line in idx:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    index.setdefault(rec["url"], []).append((rec["offset"], rec["length"]))
+                    end = max(end, rec["offset"] + rec["length"])
+        except FileNotFoundError:
+            pass
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if end != size:
+            index = self._rebuild_index()
+        self._index = index
+        self._index_loaded = True
+
+    def _rebuild_index(self) -> Dict[str, List[Tuple[int, int]]]:
+        """Scan the data file and rewrite the index from scratch."""
+        index: Dict[str, List[Tuple[int, int]]] = {}
+        records = []
+        try:
+            with open(self.path, "rb") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        url = json.loads(line).get("url", "")
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        offset += len(line)
+                        continue
+                    index.setdefault(url, []).append((offset, len(line)))
+                    records.append({"url": url, "offset": offset, "length": len(line)})
+                    offset += len(line)
+        except FileNotFoundError:
+            return index
+        with open(index_path(self.path), "w", encoding="utf-8") as idx:
+            for rec in records:
+                idx.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return index
+
+    def retain(self, keep: Callable[[dict], bool]) -> int:
+        """Rewrite the store with only the entries for which ``keep`` is true.
+
+        Lines that cannot be decoded are dropped as well.  Returns the number
+        of removed entries; the store is replaced atomically.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        removed = 0
+        with self._lock:
+            with atomic_write(self.path, "wb") as out, open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        removed += 1
+                        continue
+                    if keep(entry):
+                        out.write(line if line.endswith(b"\n") else line + b"\n")
+                    else:
+                        removed += 1
+            self._index = self._rebuild_index()
+            self._index_loaded = True
+        return removed
+
+    def urls(self) -> List[str]:
+        """Return all URLs stored so far in insertion order."""
+        with self._lock:
+            if not self._index_loaded:
+                self._load_index()
+            return list(self._index)
+
+    def get(self, url: str) -> List[dict]:
+        """Return all entries stored for ``url`` by seeking to their offsets."""
+        with self._lock:
+            if not self._index_loaded:
+                self._load_index()
+            locations = list(self._index.get(url, []))
+        entries = []
+        with open(self.path, "rb") as f:
+            for offset, length in locations:
+                f.seek(offset)
+                entries.append(json.loads(f.read(length)))
+        return entries
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter_entries(self.path)
+
+
+def iter_entries(path: str) -> Iterator[dict]:
+    """Yield the entries of a ``.jsonl`` store one at a time.
+
+    Lines that cannot be decoded (e.g. a partially written last line after a
+    crash) are skipped.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        return
@@ -0,0 +1,78 @@
+"""Bounded worker-pool scheduler for running the audit tools on many pages.
+
+The scheduler fans the tool runs (Pa11y, Axe, Lighthouse) out over a fixed
+number of concurrently processed pages, each of which may run a bounded
+number of tools at the same time.  Results are handed back to the caller in
+the original URL order, so files written from the callback look exactly like
+the output of a serial run.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+ToolRunner = Callable[[str], Optional[dict]]
+PageCallback = Callable[[str, Dict[str, Optional[dict]]], None]
+
+
+class AuditScheduler:
+    """Run a set of tools for many URLs with bounded concurrency.
+
+    Parameters
+    ----------
+    tools: Dict[str, ToolRunner]
+        Mapping of tool name to a callable that audits one URL and returns
+        the result entry (or ``None`` if the tool produced no result).  The
+        order of the mapping is the order in which results are reported.
+    max_pages: int
+        Number of pages that are processed at the same time.
+    max_tools_per_page: int
+        Number of tools that may run concurrently for a single page.
+    """
+
+    def __init__(self, tools: Dict[str, ToolRunner], max_pages: int = 4, max_tools_per_page: int = 3) -> None:
+        if max_pages < 1 or max_tools_per_page < 1:
+            raise ValueError("max_pages und max_tools_per_page müssen mindestens 1 sein.")
+        self.tools = dict(tools)
+        self.max_pages = max_pages
+        self.max_tools_per_page = max_tools_per_page
+        self._print_lock = threading.Lock()
+
+    def _run_tool(self, name: str, runner: ToolRunner, url: str) -> Optional[dict]:
+        """Run a single tool and turn unexpected exceptions into a missing result."""
+        try:
+            return runner(url)
+        except Exception as exc:
+            with self._print_lock:
+                print(f"Fehler bei {name} für {url}: {exc}")
+            return None
+
+    def _run_page(self, url: str) -> Dict[str, Optional[dict]]:
+        """Run all tools for ``url`` and return their results keyed by tool name."""
+        with self._print_lock:
+            print(f"\n=== Teste Seite: {url} ===")
+        if self.max_tools_per_page == 1 or len(self.tools) == 1:
+            return {name: self._run_tool(name, runner, url) for name, runner in self.tools.items()}
+        workers = min(self.max_tools_per_page, len(self.tools))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(self._run_tool, name, runner, url) for name, runner in self.tools.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def run(self, urls: List[str], on_page_done: PageCallback) -> None:
+        """Audit all ``urls`` and call ``on_page_done`` for each page in input order.
+
+        ``on_page_done`` is always invoked from the calling thread, so it may
+        write result files without additional locking.  Pages that finish
+        early are buffered until all pages before them are done.
+        """
+        if not urls:
+            return
+        buffered: Dict[int, Dict[str, Optional[dict]]] = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_pages, len(urls))) as pool:
+            futures = {pool.submit(self._run_page, url): idx for idx, url in enumerate(urls)}
+            for future in as_completed(futures):
+                buffered[futures[future]] = future.result()
+                while next_index in buffered:
+                    on_page_done(urls[next_index], buffered.pop(next_index))
+                    next_index += 1
@@ -0,0 +1,209 @@
+"""Vectorised accessibility scoring over a URL × category count matrix.
+
+The score of a page is ``100`` minus the sum of the deductions of its issue
+categories, where the deduction of a category is::
+
+    severity * type_factor * (frequency / issues on the page) * 100 / max_weight
+
+:class:`ScoringEngine` computes the weights and ``max_weight`` once per
+category table.  :class:`CountMatrix` holds the number of findings per URL
+and category; all deductions, totals and scores of all URLs are computed
+with array operations on it.
+
+The results are identical to the former per-URL Python loop: deductions
+are summed sequentially in the order in which the categories first occur
+on the page, and values are rounded with Python's :func:`round`.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+Histogram = Tuple[Optional[str], Optional[str], Dict[str, int]]
+
+
+class CountMatrix:
+    """Number of findings per URL (rows) and category (columns).
+
+    Columns are numbered in order of first occurrence over all pages.  The
+    non-zero cells are also kept as flat arrays ``rows``, ``cols``,
+    ``values`` and ``ranks``, ordered by row and, within a row, by the order
+    in which the categories first occur on the page (``ranks``).
+    """
+
+    def __init__(self, histograms: Iterable[Histogram]) -> None:
+        self.urls: List[Optional[str]] = []
+        self.inferred_from: List[Optional[str]] = []
+        self.columns: List[str] = []
+        index: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        values: List[int] = []
+        ranks: List[int] = []
+        for i, (url, inferred_from, counts) in enumerate(histograms):
+            self.urls.append(url)
+            self.inferred_from.append(inferred_from)
+            for rank, (name, count) in enumerate(counts.items()):
+                if name not in index:
+                    index[name] = len(self.columns)
+                    self.columns.append(name)
+                rows.append(i)
+                cols.append(index[name])
+                values.append(count)
+                ranks.append(rank)
+        self.rows = np.array(rows, dtype=np.int64)
+        self.cols = np.array(cols, dtype=np.int64)
+        self.values = np.array(values, dtype=np.int64)
+        self.ranks = np.array(ranks, dtype=np.int64)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Dense ``len(urls) × len(columns)`` count matrix."""
+        dense = np.zeros((len(self.urls), len(self.columns)), dtype=np.int64)
+        dense[self.rows, self.cols] = self.values
+        return dense
+
+    def site_counts(self) -> Dict[str, int]:
+        """Return the number of findings per category over all pages."""
+        totals = np.bincount(self.cols, weights=self.values, minlength=len(self.columns))
+        return {name: int(total) for name, total in zip(self.columns, totals)}
+
+
+def round1(values: np.ndarray) -> np.ndarray:
+    """Round to one decimal exactly like Python's ``round(x, 1)``.
+
+    ``np.round`` scales by ten, which can differ from Python's correctly
+    rounded result for values close to a tie; those few are rounded with
+    :func:`round`.
+    """
+    scaled = values * 10.0
+    rounded = np.rint(scaled) / 10.0
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for k in np.flatnonzero(near_tie):
+        rounded[k] = round(float(values[k]), 1)
+    return rounded
+
+
+class ScoringEngine:
+    """Weights of a category table and the score computations based on them."""
+
+    def __init__(
+        self,
+        categories: Dict[str, Dict[str, object]],
+        default_severity: int = 1,
+        default_type_factor: float = 1.0,
+    ) -> None:
+        self.categories = categories
+        self.default_severity = default_severity
+        self.default_type_factor = default_type_factor
+        if categories:
+            max_weight = max(
+                info.get("severity", default_severity) * info.get("type_factor", default_type_factor)
+                for info in categories.values()
+            )
+        else:
+            max_weight = default_severity * default_type_factor
+        if max_weight <= 0:
+            max_weight = 1.0
+        self.scaling_factor = 100.0 / max_weight
+
+    def _info(self, names: List[str]) -> Tuple[List[object], List[object], List[str], np.ndarray]:
+        """Return severity, type factor, label and weight of each category."""
+        severities, type_factors, labels = [], [], []
+        for key in names:
+            info = self.categories.get(
+                key, {"severity": self.default_severity, "type_factor": self.default_type_factor, "label": key}
+            )
+            severities.append(info.get("severity", self.default_severity))
+            type_factors.append(info.get("type_factor", self.default_type_factor))
+            labels.append(info.get("label", key))
+        weights = np.array(severities, dtype=np.float64) * np.array(type_factors, dtype=np.float64)
+        return severities, type_factors, labels, weights
+
+    def score_per_url(self, histograms: Iterable[Histogram]) -> List[Dict[str, object]]:
+        """Compute score, total deduction and issue details of every URL."""
+        return self.score_matrix(CountMatrix(histograms))
+
+    def score_matrix(self, matrix: CountMatrix) -> List[Dict[str, object]]:
+        """Compute the per-URL results for a prepared :class:`CountMatrix`."""
+        severities, type_factors, labels, weights = self._info(matrix.columns)
+        n_urls = len(matrix.urls)
+        totals = np.bincount(matrix.rows, weights=matrix.values, minlength=n_urls)
+        page_totals = totals[matrix.rows]
+        ratios = np.divide(matrix.values, page_totals, out=np.zeros(len(matrix.values)), where=page_totals > 0)
+        deductions = weights[matrix.cols] * ratios * self.scaling_factor
+        # The deductions of a page are summed sequentially in order of first
+        # occurrence, like the scalar loop did: ``cumsum`` over a padded
+        # page × rank matrix adds left to right, and padding adds 0.0.
+        width = int(matrix.ranks.max()) + 1 if len(matrix.ranks) else 1
+        padded = np.zeros((n_urls, width))
+        padded[matrix.rows, matrix.ranks] = deductions
+        penalties = np.cumsum(padded, axis=1)[:, -1]
+        scores = np.maximum(0.0, 100.0 - penalties)
+        rounded = round1(deductions)
+        # Issues of a page by rounded deduction, descending; ties keep the
+        # order of first occurrence.
+        order = np.lexsort((matrix.ranks, -rounded, matrix.rows))
+
+        scores, penalties = round1(scores).tolist(), round1(penalties).tolist()
+        cols, values, rounded = matrix.cols[order].tolist(), matrix.values[order].tolist(), rounded[order].tolist()
+        ends = np.cumsum(np.bincount(matrix.rows, minlength=n_urls)).tolist()
+        has_issues = (totals > 0).tolist()
+        results: List[Dict[str, object]] = []
+        start = 0
+        for i, url in enumerate(matrix.urls):
+            inferred_from = matrix.inferred_from[i]
+            marker = {"inferred": True, "inferred_from": inferred_from} if inferred_from else {}
+            end = ends[i]
+            if not has_issues[i]:
+                results.append({"url": url, "score": 100.0, "total_deduction": 0.0, "issues": [], **marker})
+                start = end
+                continue
+            details = [
+                {
+                    "label": labels[cols[k]],
+                    "severity": severities[cols[k]],
+                    "frequency": values[k],
+                    "type_factor": type_factors[cols[k]],
+                    "deduction": rounded[k],
+                }
+                for k in range(start, end)
+            ]
+            start = end
+            results.append(
+                {
+                    "url": url,
+                    "score": scores[i],
+                    "total_deduction": penalties[i],
+                    "issues": details,
+                    **marker,
+                }
+            )
+        return results
+
+    def site_score(self, counts: Dict[str, int]) -> Tuple[float, float, List[Dict[str, object]]]:
+        """Compute the overall score from the number of findings per category."""
+        names = [name for name, freq in counts.items() if freq != 0]
+        if not names:
+            return 100.0, 0.0, []
+        severities, type_factors, labels, weights = self._info(names)
+        freqs = [counts[name] for name in names]
+        ratios = np.array(freqs, dtype=np.int64) / sum(freqs)
+        deductions = weights * ratios * self.scaling_factor
+        total_penalty = float(np.cumsum(deductions)[-1])
+        details = [
+            {
+                "label": label,
+                "severity": severity,
+                "frequency": freq,
+                "type_factor": type_factor,
+                "ratio": ratio,
+                "deduction": deduction,
+            }
+            for label, severity, freq, type_factor, ratio, deduction in zip(
+                labels, severities, freqs, type_factors, ratios.tolist(), deductions.tolist()
+            )
+        ]
+        details.sort(key=lambda d: d["deduction"], reverse=True)
+        score = max(0.0, 100.0 - total_penalty)
+        return round(score, 1), round(total_penalty, 1), details
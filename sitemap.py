@@ -0,0 +1,214 @@
+"""URL discovery from ``robots.txt`` and XML sitemaps.
+
+``robots.txt`` is read once per site with :mod:`urllib.robotparser`; its
+``Disallow`` rules restrict which links are crawled and audited, its
+``Crawl-delay`` slows the crawler down, and its ``Sitemap`` lines name the
+sitemaps to expand (``/sitemap.xml`` is tried if there are none).
+
+Sitemaps and sitemap index files are parsed incrementally with
+:func:`xml.etree.ElementTree.iterparse` straight from the HTTP response
+(gzip-compressed sitemaps included), and every ``<url>`` element is
+discarded once its ``loc`` and ``lastmod`` have been read.  Tens of thousands
+of URLs can therefore be enumerated without fetching the pages themselves
+and without holding whole sitemap documents in memory.
+"""
+
+import gzip
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+USER_AGENT = "Accessibility-analyzer"
+DEFAULT_TIMEOUT = 10.0
+# Upper bound for the number of sitemap documents fetched per site.
+DEFAULT_MAX_SITEMAPS = 500
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+ENTRY_TAGS = ("url", "sitemap")
+
+# (page URL, lastmod as written in the sitemap or ``None``)
+SitemapEntry = Tuple[str, Optional[str]]
+
+
+class Robots:
+    """The rules of one site's ``robots.txt``."""
+
+    def __init__(self, url: str, lines: Optional[List[str]] = None) -> None:
+        self.url = url
+        self._parser = RobotFileParser(url)
+        self._parser.parse(lines or [])
+
+    @classmethod
+    def fetch(cls, start_url: str, session=None, timeout: float = DEFAULT_TIMEOUT) -> "Robots":
+        """Fetch the ``robots.txt`` of the site of ``start_url``.
+
+        A missing or unreadable file allows everything.
+        """
+        import requests
+
+        url = urljoin(start_url, "/robots.txt")
+        try:
+            response = (session or requests).get(url, timeout=timeout)
+        except requests.RequestException as exc:
+            print(f"robots.txt von {url} konnte nicht geladen werden: {exc}")
+            return cls(url)
+        if response.status_code >= 400:
+            return cls(url)
+        return cls(url, response.text.splitlines())
+
+    def can_fetch(self, url: str) -> bool:
+        return self._parser.can_fetch(USER_AGENT, url)
+
+    @property
+    def crawl_delay(self) -> float:
+        """Delay in seconds between two requests, ``0`` if none is set."""
+        delay = self._parser.crawl_delay(USER_AGENT)
+        return float(delay) if delay else 0.0
+
+    @property
+    def sitemaps(self) -> List[str]:
+        return list(self._parser.site_maps() or [])
+
+
+def _sitemap_tag(tag: str) -> Optional[str]:
+    """Return the name of a sitemaps.org or un-namespaced element, else ``None``."""
+    if tag.startswith(SITEMAP_NS):
+        return tag[len(SITEMAP_NS):]
+    return None if tag.startswith("{") else tag
+
+
+def _parse_sitemap(source) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Yield ``(kind, loc, lastmod)`` for each entry of a sitemap document.
+
+    ``kind`` is ``"url"`` for pages of a sitemap and ``"sitemap"`` for the
+    child sitemaps of a sitemap index.  Only ``loc`` and ``lastmod`` elements
+    of the sitemaps.org namespace, or without a namespace, that are direct
+    children of the entry are read, so extensions such as ``<image:loc>``
+    are ignored:
+
+    >>> import io
+    >>> doc = b'''<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+    ...   xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+    ... <url><loc>https://x/page1</loc><lastmod>2024-01-01</lastmod>
+    ...   <image:image><image:loc>https://x/img.jpg</image:loc></image:image></url>
+    ... <url><loc>https://x/page2</loc></url></urlset>'''
+    >>> list(_parse_sitemap(io.BytesIO(doc)))
+    [('url', 'https://x/page1', '2024-01-01'), ('url', 'https://x/page2', None)]
+
+    Sitemaps that omit the ``xmlns`` declaration are read as well:
+
+    >>> doc = b'<sitemapindex><sitemap><loc>https://x/s1.xml</loc></sitemap></sitemapindex>'
+    >>> list(_parse_sitemap(io.BytesIO(doc)))
+    [('sitemap', 'https://x/s1.xml', None)]
+    """
+    root = None
+    depth = 0
+    loc: Optional[str] = None
+    lastmod: Optional[str] = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        # The entries are children of the root, their fields grandchildren.
+        tag = _sitemap_tag(elem.tag)
+        if depth == 2:
+            if tag == "loc":
+                loc = (elem.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = (elem.text or "").strip() or None
+        elif depth == 1:
+            if tag in ENTRY_TAGS and loc:
+                yield tag, loc, lastmod
+            loc = lastmod = None
+            # Drop the finished entries so memory stays constant.
+            root.clear()
+
+
+def iter_sitemap(
+    sitemap_urls: List[str],
+    session=None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_sitemaps: int = DEFAULT_MAX_SITEMAPS,
+) -> Iterator[SitemapEntry]:
+    """Yield the pages of ``sitemap_urls``, expanding sitemap index files.
+
+    Child sitemaps are fetched breadth-first; each sitemap is fetched at most
+    once and at most ``max_sitemaps`` are fetched overall.
+    """
+    import requests
+
+    http = session or requests
+    queue = list(sitemap_urls)
+    seen = set()
+    while queue and len(seen) < max_sitemaps:
+        url = queue.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        try:
+            response = http.get(url, timeout=timeout, stream=True)
+        except requests.RequestException as exc:
+            print(f"Sitemap {url} konnte nicht geladen werden: {exc}")
+            continue
+        with response:
+            if response.status_code >= 400:
+                continue
+            response.raw.decode_content = True
+            source = response.raw
+            if urlparse(url).path.endswith(".gz"):
+                source = gzip.GzipFile(fileobj=source)
+            try:
+                for kind, loc, lastmod in _parse_sitemap(source):
+                    # ``loc`` must be absolute; only repair relative ones.
+                    if not loc.startswith(("http://", "https://")):
+                        loc = urljoin(url, loc)
+                    if kind == "sitemap":
+                        queue.append(loc)
+                    else:
+                        yield loc, lastmod
+            except (ET.ParseError, OSError, EOFError) as exc:
+                print(f"Sitemap {url} konnte nicht gelesen werden: {exc}")
+
+
+def lastmod_key(lastmod: Optional[str]) -> float:
+    """Return ``lastmod`` as a timestamp for sorting; unknown dates are the oldest."""
+    if not lastmod:
+        return float("-inf")
+    try:
+        parsed = datetime.fromisoformat(lastmod)
+    except ValueError:
+        return float("-inf")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def discover(
+    start_url: str,
+    in_scope: Callable[[str, str], bool],
+    max_urls: int,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_sitemaps: int = DEFAULT_MAX_SITEMAPS,
+) -> Tuple[Robots, Dict[str, Optional[str]]]:
+    """Read the ``robots.txt`` and sitemaps of the site of ``start_url``.
+
+    Returns the robots rules and up to ``max_urls`` sitemap pages that are
+    in scope and allowed by ``robots.txt``, mapped to their ``lastmod``
+    and ordered with the most recently modified pages first.
+    """
+    import requests
+
+    with requests.Session() as session:
+        session.headers["User-Agent"] = USER_AGENT
+        robots = Robots.fetch(start_url, session, timeout)
+        sitemaps = robots.sitemaps or [urljoin(start_url, "/sitemap.xml")]
+        pages: Dict[str, Optional[str]] = {}
+        for url, lastmod in iter_sitemap(sitemaps, session, timeout, max_sitemaps):
+            if url not in pages and in_scope(start_url, url) and robots.can_fetch(url):
+                pages[url] = lastmod
+    ordered = sorted(pages, key=lambda url: lastmod_key(pages[url]), reverse=True)[:max_urls]
+    return robots, {url: pages[url] for url in ordered}
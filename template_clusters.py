@@ -0,0 +1,169 @@
+"""Group pages that share the same DOM template.
+
+Large CMS sites generate hundreds of pages from a single template (e.g. the
+Moodle ``course/index.php?categoryid=...`` pages).  Those pages usually
+produce the same accessibility findings, so it is enough to audit a few
+representatives per template and to extrapolate their results to the rest
+of the family.
+
+A page's template is identified by a fingerprint of its markup skeleton:
+the set of root-to-element paths made of tag names and class names, with
+digits normalised and text ignored.  Repeated elements (list items, table
+rows) contribute the same path, so pages of one template that merely list a
+different number of entries share a fingerprint.
+"""
+
+import hashlib
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from checkpoint import write_json
+from crawler import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, fetch_pages
+from url_canonical import canonicalize_url
+
+# Number of fully audited pages per template cluster.
+DEFAULT_REPRESENTATIVES = 2
+
+# Paths deeper than this are cut off; deep nesting is mostly content.
+MAX_PATH_DEPTH = 12
+
+_DIGITS = re.compile(r"\d+")
+_VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class _SkeletonParser(HTMLParser):
+    """Collect the tag/class paths of all elements in a document."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.stack: List[str] = []
+        self.paths = set()
+
+    def handle_starttag(self, tag, attrs):
+        classes = ""
+        for name, value in attrs:
+            if name == "class" and value:
+                classes = ".".join(sorted(_DIGITS.sub("#", c) for c in value.split()))
+                break
+        token = f"{tag}.{classes}" if classes else tag
+        self.paths.add("/".join(self.stack[:MAX_PATH_DEPTH] + [token]))
+        if tag not in _VOID_ELEMENTS:
+            self.stack.append(token)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_ELEMENTS and self.stack:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        # Pop up to the matching element to tolerate unclosed tags.
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].split(".", 1)[0] == tag:
+                del self.stack[i:]
+                break
+
+
+def structure_fingerprint(html: str) -> str:
+    """Return a hash of the tag/class skeleton of ``html``."""
+    parser = _SkeletonParser()
+    parser.feed(html)
+    parser.close()
+    digest = hashlib.sha1()
+    for path in sorted(parser.paths):
+        digest.update(path.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class TemplateClusters:
+    """Fingerprints of crawled pages grouped into template clusters.
+
+    ``add`` has the signature of the crawler's ``on_page`` hook, so the
+    fingerprints can be collected while crawling.  URLs are stored in their
+    canonical form.
+    """
+
+    def __init__(self) -> None:
+        self.fingerprints: Dict[str, str] = {}
+
+    def add(self, url: str, html: str) -> None:
+        """Record the fingerprint of the page ``url`` with content ``html``."""
+        self.fingerprints[canonicalize_url(url)] = structure_fingerprint(html)
+
+    def fill_missing(
+        self, urls: List[str], concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT
+    ) -> None:
+        """Fetch and fingerprint all ``urls`` that were not seen while crawling."""
+        missing = [url for url in urls if canonicalize_url(url) not in self.fingerprints]
+        for url, result in zip(missing, fetch_pages(missing, concurrency=concurrency, timeout=timeout)):
+            if result is not None:
+                self.add(url, result[1])
+
+    def clusters(self, urls: List[str]) -> List[List[str]]:
+        """Group ``urls`` by fingerprint, keeping the order of first occurrence.
+
+        URLs without a fingerprint form a cluster of their own.
+        """
+        groups: Dict[str, List[str]] = {}
+        for url in urls:
+            key = self.fingerprints.get(canonicalize_url(url)) or f"url:{url}"
+            groups.setdefault(key, []).append(url)
+        return list(groups.values())
+
+    def select(
+        self, urls: List[str], representatives: int = DEFAULT_REPRESENTATIVES
+    ) -> Tuple[List[str], Dict[str, str]]:
+        """Split ``urls`` into pages to audit and pages to infer.
+
+        Returns the list of URLs that are audited (the first
+        ``representatives`` pages of every cluster, in input order) and a
+        mapping of every other URL to the representative whose results are
+        used for it.  The other pages are spread round-robin over the
+        representatives of their cluster.
+        """
+        audited = set()
+        inferred: Dict[str, str] = {}
+        for cluster in self.clusters(urls):
+            reps = cluster[: max(1, representatives)]
+            audited.update(reps)
+            for i, url in enumerate(cluster[len(reps):]):
+                inferred[url] = reps[i % len(reps)]
+        return [url for url in urls if url in audited], inferred
+
+    def save(self, urls: List[str], output: str = "template_clusters.json") -> None:
+        """Write the clusters of ``urls`` to ``output`` for later inspection."""
+        write_json(output, self.clusters(urls))
+
+
+def limit_inferred(inferred: Dict[str, str], audited: List[str]) -> Dict[str, str]:
+    """Return the entries of ``inferred`` whose representative is in ``audited``.
+
+    Used when only part of the selected pages is audited (a page limit), so
+    that no page is inferred from a representative that was never audited.
+    """
+    audited_set = set(audited)
+    return {url: rep for url, rep in inferred.items() if rep in audited_set}
+
+
+def extrapolate_entries(entries: List[dict], inferred: Optional[Dict[str, str]]) -> List[dict]:
+    """Append inferred ``bewertung.json`` entries for non-audited cluster members.
+
+    Each inferred page receives a copy of its representative's findings and
+    an ``inferred_from`` marker naming the representative.  Pages whose
+    representative has no results are skipped.
+    """
+    if not inferred:
+        return entries
+    by_url = {entry.get("URL"): entry for entry in entries}
+    extra = []
+    for url, rep in inferred.items():
+        source = by_url.get(rep)
+        if source is None or url in by_url:
+            continue
+        entry = {key: value for key, value in source.items() if key != "URL"}
+        extra.append({"URL": url, "inferred_from": rep, **entry})
+    return entries + extra
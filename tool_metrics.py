@@ -0,0 +1,334 @@
+"""Wall time, CPU time, memory and output size of every audit tool run.
+
+:func:`instrumented_tools` wraps the tool runners so that each invocation
+(every attempt of a retried run counts separately) is recorded by a
+:class:`MetricsRecorder` with
+
+* ``wall_s`` – wall-clock time of the run,
+* ``cpu_s`` and ``peak_rss_bytes`` – CPU time and highest resident memory
+  of the whole process tree (``npx``, Node and the Chrome instances it
+  starts), sampled every ``SAMPLE_INTERVAL`` seconds while the tool runs,
+* ``output_bytes`` – size of the stored result entry,
+* ``exit_code`` and ``status`` (``ok``, ``empty``, ``error``, ``timeout``).
+
+CPU and memory are only known for ``npx`` runs, which start their own
+processes; tools running inside the shared Node worker leave them ``None``.
+The processes are found with ``psutil`` if it is installed and through
+``/proc`` otherwise; on other platforms without ``psutil`` they are ``None``
+as well.
+
+At the end of a run the recorder writes all invocations and a summary with
+p50/p95/max per tool to ``tool_timings.json``, prints the summary and can
+write the same figures as a Prometheus textfile for the node exporter's
+textfile collector.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from checkpoint import atomic_write, write_json
+from watchdog import ToolTimeout, descendants
+
+ToolRunner = Callable[[str], Optional[dict]]
+
+TIMINGS_FILE = "tool_timings.json"
+SAMPLE_INTERVAL = 0.5
+# Fields summarised per tool, with the unit they are printed in.
+SUMMARY_FIELDS = {
+    "wall_s": ("s", 1.0),
+    "cpu_s": ("s", 1.0),
+    "peak_rss_bytes": ("MB", 1e6),
+    "output_bytes": ("KB", 1e3),
+}
+
+_current = threading.local()
+
+
+class Invocation:
+    """Measurements of one tool run."""
+
+    __slots__ = (
+        "url",
+        "tool",
+        "backend",
+        "started",
+        "wall_s",
+        "cpu_s",
+        "peak_rss_bytes",
+        "output_bytes",
+        "exit_code",
+        "status",
+    )
+
+    def __init__(self, url: str, tool: str, backend: str) -> None:
+        self.url = url
+        self.tool = tool
+        self.backend = backend
+        self.started = time.time()
+        self.wall_s = 0.0
+        self.cpu_s: Optional[float] = None
+        self.peak_rss_bytes: Optional[int] = None
+        self.output_bytes = 0
+        self.exit_code: Optional[int] = None
+        self.status = "ok"
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Invocation":
+        invocation = cls(data["url"], data["tool"], data.get("backend", ""))
+        for name in cls.__slots__:
+            if name in data:
+                setattr(invocation, name, data[name])
+        return invocation
+
+
+def _tree_usage(pid: int) -> Optional[Dict[int, Tuple[float, int]]]:
+    """Return ``{pid: (cpu seconds, rss bytes)}`` for ``pid`` and its descendants.
+
+    The CPU time of a process includes the children it has already reaped,
+    so the sum over the tree does not drop when a child exits.
+    """
+    try:
+        import psutil
+    except ModuleNotFoundError:
+        psutil = None
+    if psutil is not None:
+        usage = {}
+        try:
+            root = psutil.Process(pid)
+            processes = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return {}
+        for process in processes:
+            try:
+                times = process.cpu_times()
+                cpu = times.user + times.system + times.children_user + times.children_system
+                usage[process.pid] = (cpu, process.memory_info().rss)
+            except psutil.Error:
+                continue
+        return usage
+    if not os.path.isdir("/proc"):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    usage = {}
+    for child in [pid, *descendants(pid)]:
+        try:
+            with open(f"/proc/{child}/stat", "r", encoding="utf-8", errors="replace") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{child}/statm", "r", encoding="utf-8") as f:
+                rss = int(f.read().split()[1]) * page
+        except (OSError, ValueError, IndexError):
+            continue
+        # utime, stime, cutime and cstime are the 14th to 17th field of ``stat``.
+        usage[child] = (sum(int(value) for value in fields[11:15]) / ticks, rss)
+    return usage
+
+
+class _TreeSampler(threading.Thread):
+    """Samples the process tree of ``pid`` into ``invocation`` until stopped."""
+
+    def __init__(self, pid: int, invocation: Invocation, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.invocation = invocation
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def sample(self) -> None:
+        usage = _tree_usage(self.pid)
+        if usage is None:
+            return
+        cpu = sum(cpu for cpu, _rss in usage.values())
+        rss = sum(rss for _cpu, rss in usage.values())
+        # The work of the tree since the last sample is lost when the root
+        # exits, so this is a lower bound.
+        self.invocation.cpu_s = max(cpu, self.invocation.cpu_s or 0.0)
+        self.invocation.peak_rss_bytes = max(rss, self.invocation.peak_rss_bytes or 0)
+
+    def run(self) -> None:
+        while True:
+            self.sample()
+            if self._stop_event.wait(self.interval):
+                return
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+@contextmanager
+def track_process(proc) -> Iterator[None]:
+    """Sample ``proc`` for the tool invocation measured in the current thread.
+
+    Meant as the ``monitor`` of :func:`watchdog.run_command`; does nothing
+    outside of :meth:`MetricsRecorder.measure`.
+    """
+    invocation: Optional[Invocation] = getattr(_current, "invocation", None)
+    if invocation is None:
+        yield
+        return
+    sampler = _TreeSampler(proc.pid, invocation, SAMPLE_INTERVAL)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        invocation.exit_code = proc.returncode
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the ``q``-th percentile (nearest rank) of non-empty ``values``."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class MetricsRecorder:
+    """Collects the :class:`Invocation` records of one audit run."""
+
+    def __init__(self) -> None:
+        self.invocations: List[Invocation] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = TIMINGS_FILE) -> "MetricsRecorder":
+        """Return a recorder holding the invocations saved at ``path``."""
+        recorder = cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            recorder.invocations = [Invocation.from_dict(item) for item in data.get("invocations", [])]
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError, KeyError):
+            pass
+        return recorder
+
+    @contextmanager
+    def measure(self, url: str, tool: str, backend: str) -> Iterator[Invocation]:
+        """Measure the tool run inside the block and record it."""
+        invocation = Invocation(url, tool, backend)
+        _current.invocation = invocation
+        start = time.monotonic()
+        try:
+            yield invocation
+        except ToolTimeout:
+            invocation.status = "timeout"
+            raise
+        except Exception:
+            invocation.status = "error"
+            raise
+        finally:
+            invocation.wall_s = time.monotonic() - start
+            _current.invocation = None
+            with self._lock:
+                self.invocations.append(invocation)
+
+    def summary(self) -> Dict[str, dict]:
+        """Return count, status counts and p50/p95/max of every field per tool."""
+        with self._lock:
+            invocations = list(self.invocations)
+        by_tool: Dict[str, List[Invocation]] = {}
+        for invocation in invocations:
+            by_tool.setdefault(invocation.tool, []).append(invocation)
+        result: Dict[str, dict] = {}
+        for tool, runs in by_tool.items():
+            statuses: Dict[str, int] = {}
+            for run in runs:
+                statuses[run.status] = statuses.get(run.status, 0) + 1
+            stats: Dict[str, object] = {"count": len(runs), "status": statuses}
+            for field in SUMMARY_FIELDS:
+                values = [getattr(run, field) for run in runs if getattr(run, field) is not None]
+                stats[field] = None
+                if values:
+                    stats[field] = {
+                        "p50": percentile(values, 50),
+                        "p95": percentile(values, 95),
+                        "max": max(values),
+                        "sum": sum(values),
+                        "count": len(values),
+                    }
+            result[tool] = stats
+        return result
+
+    def save(self, path: str = TIMINGS_FILE) -> None:
+        with self._lock:
+            invocations = [invocation.as_dict() for invocation in self.invocations]
+        write_json(path, {"summary": self.summary(), "invocations": invocations})
+
+    def print_summary(self) -> None:
+        summary = self.summary()
+        if not summary:
+            return
+        header = f"{'Tool':<11}{'Läufe':>6}{'Fehler':>7}"
+        for field, (unit, _scale) in SUMMARY_FIELDS.items():
+            header += f"  {field.rsplit('_', 1)[0] + ' [' + unit + '] p50/p95/max':>28}"
+        print("\nRessourcenverbrauch der Tools:")
+        print(header)
+        for tool, stats in summary.items():
+            line = f"{tool:<11}{stats['count']:>6}{stats['count'] - stats['status'].get('ok', 0):>7}"
+            for field, (_unit, scale) in SUMMARY_FIELDS.items():
+                values = stats[field]
+                cell = "–" if values is None else "/".join(f"{values[k] / scale:.1f}" for k in ("p50", "p95", "max"))
+                line += f"  {cell:>28}"
+            print(line)
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the summary in the Prometheus text format to ``path``.
+
+        The file is replaced atomically, as the textfile collector requires.
+        """
+        metrics = {
+            "wall_s": ("accessibility_tool_duration_seconds", "Wall-clock time of audit tool runs."),
+            "cpu_s": ("accessibility_tool_cpu_seconds", "CPU time of the process tree of audit tool runs."),
+            "peak_rss_bytes": ("accessibility_tool_peak_rss_bytes", "Peak RSS of the process tree of tool runs."),
+            "output_bytes": ("accessibility_tool_output_bytes", "Size of the stored results of audit tool runs."),
+        }
+        summary = self.summary()
+        lines = [
+            "# HELP accessibility_tool_runs_last_audit Audit tool runs of the last audit by status.",
+            "# TYPE accessibility_tool_runs_last_audit gauge",
+        ]
+        for tool, stats in summary.items():
+            for status, count in sorted(stats["status"].items()):
+                lines.append(f'accessibility_tool_runs_last_audit{{tool="{tool}",status="{status}"}} {count}')
+        for field, (name, description) in metrics.items():
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} summary"]
+            for tool, stats in summary.items():
+                values = stats[field]
+                if values is None:
+                    continue
+                for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("1", "max")):
+                    lines.append(f'{name}{{tool="{tool}",quantile="{quantile}"}} {values[key]}')
+                lines.append(f'{name}_sum{{tool="{tool}"}} {values["sum"]}')
+                lines.append(f'{name}_count{{tool="{tool}"}} {values["count"]}')
+        lines += [
+            "# HELP accessibility_audit_last_run_timestamp_seconds End of the last audit run.",
+            "# TYPE accessibility_audit_last_run_timestamp_seconds gauge",
+            f"accessibility_audit_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+        with atomic_write(path) as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def instrumented_tools(tools: Dict[str, ToolRunner], recorder: MetricsRecorder, backend: str) -> Dict[str, ToolRunner]:
+    """Wrap ``tools`` so that every run is measured by ``recorder``."""
+
+    def _wrap(name: str, runner: ToolRunner) -> ToolRunner:
+        def run(url: str) -> Optional[dict]:
+            with recorder.measure(url, name, backend) as invocation:
+                entry = runner(url)
+                if entry is None:
+                    invocation.status = "empty"
+                else:
+                    invocation.output_bytes = len(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+                return entry
+
+        return run
+
+    return {name: _wrap(name, runner) for name, runner in tools.items()}
@@ -0,0 +1,143 @@
+"""Canonicalisation of crawled URLs before they are audited.
+
+The crawler reports every link target as found, so the same document shows
+up under many spellings: with and without trailing slash, fragment-only
+variants (``#maincontent``), different letter case in the host,
+explicit default ports or query parameters that do not change the content
+(``?lang=de``).  :func:`canonicalize_urls` collapses all of these, and
+optionally follows redirects, so every document is audited only once.  The
+canonical form serves as the key for finding duplicates; the URL that is
+audited keeps its trailing slash and, with redirects, is the final URL, so
+the tools are not sent through a redirect again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ratelimit import get_limiter, parse_retry_after
+
+# Query parameters that are removed from every URL.  Shell-style wildcards
+# are supported.
+DEFAULT_IGNORED_PARAMS = (
+    "lang",
+    "utm_*",
+    "fbclid",
+    "gclid",
+)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(
+    url: str, ignored_params: Sequence[str] = DEFAULT_IGNORED_PARAMS, keep_trailing_slash: bool = False
+) -> str:
+    """Return the canonical form of ``url``.
+
+    Scheme and host are lower-cased, default ports and the fragment are
+    dropped, an empty path becomes ``/``, trailing slashes are removed from
+    all other paths (``/a/`` becomes ``/a``) unless ``keep_trailing_slash``
+    is set, and the query string is stripped of ``ignored_params`` and
+    sorted.  Non-HTTP URLs are returned unchanged.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+    path = (parts.path if keep_trailing_slash else parts.path.rstrip("/")) or "/"
+    params = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(fnmatch(key, pattern) for pattern in ignored_params)
+    ]
+    query = urlencode(sorted(params))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def resolve_redirects(urls: List[str], timeout: float = 10.0, concurrency: int = 16) -> Dict[str, str]:
+    """Return a mapping of each URL to the final URL after following redirects.
+
+    A ``HEAD`` request is tried first; servers that do not support it are
+    asked with ``GET``.  Every request takes a slot from the shared per-host
+    rate limiter.  URLs that cannot be fetched map to themselves.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    limiter = get_limiter()
+
+    def _request(method: str, url: str):
+        with limiter.request(url) as ticket:
+            try:
+                response = session.request(method, url, allow_redirects=True, timeout=timeout, stream=True)
+            except requests.RequestException:
+                ticket.failed = True
+                raise
+            response.close()
+            ticket.status = response.status_code
+            ticket.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            return response
+
+    def _resolve(url: str) -> str:
+        try:
+            response = _request("HEAD", url)
+            if response.status_code in (405, 501):
+                response = _request("GET", url)
+            return response.url
+        except requests.RequestException as exc:
+            print(f"Weiterleitung für {url} konnte nicht aufgelöst werden: {exc}")
+            return url
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return dict(zip(urls, pool.map(_resolve, urls)))
+    finally:
+        session.close()
+
+
+def canonicalize_urls(
+    urls: Iterable[str],
+    ignored_params: Sequence[str] = DEFAULT_IGNORED_PARAMS,
+    follow_redirects: bool = True,
+    timeout: float = 10.0,
+    concurrency: int = 16,
+) -> List[str]:
+    """Remove duplicate spellings of ``urls`` and return the URLs to audit.
+
+    URLs with the same :func:`canonicalize_url` form are duplicates; the
+    first spelling is kept, normalised except for its trailing slash.  With
+    ``follow_redirects`` each of them is replaced by the final URL after
+    redirects, and final URLs are deduplicated the same way.  Non-HTTP links
+    (``mailto:``, ``javascript:`` ...) are dropped because they cannot be
+    audited.  The order of first occurrence is preserved.
+    """
+    spellings: Dict[str, str] = {}
+    for url in urls:
+        if urlsplit(url.strip()).scheme.lower() in DEFAULT_PORTS:
+            key = canonicalize_url(url, ignored_params)
+            if key not in spellings:
+                spellings[key] = canonicalize_url(url, ignored_params, keep_trailing_slash=True)
+    if not follow_redirects or not spellings:
+        return list(spellings.values())
+    final = resolve_redirects(list(spellings.values()), timeout=timeout, concurrency=concurrency)
+    audited: Dict[str, str] = {}
+    for url in spellings.values():
+        audited.setdefault(canonicalize_url(final[url], ignored_params), final[url])
+    return list(audited.values())
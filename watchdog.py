@@ -0,0 +1,165 @@
+"""Wall-clock budgets, process-tree kill and retries for the audit tools.
+
+Every ``npx`` tool run is started in its own process group and gets a
+fixed time budget.  When the budget is exceeded, the whole process tree is
+terminated: the process group of the tool and of every descendant, which
+includes Chrome instances that ``chrome-launcher`` starts detached in a
+group of their own.  Descendants are found with ``psutil`` if it is
+installed and through ``/proc`` otherwise.
+
+:func:`retrying_tools` repeats failed runs with exponential backoff.  When
+all attempts fail, a failure record ``{"url", "error", "tool", "attempts"}``
+is returned and stored with the results instead of the tool output, so every
+page has one entry per tool and the worst-case duration of a run is bounded
+by ``attempts × budget`` plus the backoff delays.
+"""
+
+import os
+import signal
+import subprocess
+import time
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, Sequence
+
+ToolRunner = Callable[[str], Optional[dict]]
+
+# Seconds a terminated process tree gets before it is killed.
+KILL_GRACE = 5.0
+
+
+class ToolError(RuntimeError):
+    """A tool run failed in a way that may succeed when it is repeated."""
+
+
+class ToolTimeout(ToolError):
+    """A tool run exceeded its time budget and was killed."""
+
+
+def descendants(pid: int) -> List[int]:
+    """Return the ids of all processes below ``pid``."""
+    try:
+        import psutil
+    except ModuleNotFoundError:
+        psutil = None
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r", encoding="utf-8", errors="replace") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    found: List[int] = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def kill_process_tree(proc: subprocess.Popen, grace: float = KILL_GRACE) -> None:
+    """Terminate ``proc`` and all its descendants, killing them after ``grace`` seconds."""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(proc.pid)], capture_output=True, timeout=30)
+        proc.wait()
+        return
+    children = descendants(proc.pid)
+    groups = set()
+    for pid in [proc.pid, *children]:
+        try:
+            groups.add(os.getpgid(pid))
+        except OSError:
+            pass
+    groups.discard(os.getpgrp())
+
+    def _signal(sig: int) -> None:
+        for group in groups:
+            try:
+                os.killpg(group, sig)
+            except OSError:
+                pass
+        for pid in children:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass
+
+    _signal(signal.SIGTERM)
+    try:
+        proc.wait(grace)
+    except subprocess.TimeoutExpired:
+        pass
+    _signal(signal.SIGKILL)
+    proc.wait()
+
+
+def run_command(
+    cmd: Sequence[str],
+    timeout: float,
+    monitor: Optional[Callable[[subprocess.Popen], ContextManager]] = None,
+) -> subprocess.CompletedProcess:
+    """Run ``cmd`` like ``subprocess.run(capture_output=True, text=True)`` with a hard time budget.
+
+    Raises :class:`ToolTimeout` after the process tree has been killed.
+    ``monitor`` is entered with the started process and left once it has
+    exited, e.g. to sample its resource usage (see ``tool_metrics``).
+    """
+    if os.name == "nt":
+        options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        options = {"start_new_session": True}
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **options)
+    with monitor(proc) if monitor is not None else nullcontext():
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(proc)
+            proc.communicate()
+            raise ToolTimeout(f"Zeitlimit von {timeout:.0f} s überschritten") from None
+    return subprocess.CompletedProcess(list(cmd), proc.returncode, stdout, stderr)
+
+
+def failure_record(url: str, tool: str, error: str, attempts: int) -> dict:
+    """Return the result entry stored for a tool run that failed for good."""
+    return {"url": url, "tool": tool, "error": error, "attempts": attempts}
+
+
+def retrying_tools(
+    tools: Dict[str, ToolRunner], attempts: int = 3, backoff: float = 2.0, max_delay: float = 60.0
+) -> Dict[str, ToolRunner]:
+    """Wrap ``tools`` so that runs raising :class:`ToolError` are repeated.
+
+    The ``n``-th retry waits ``backoff * 2 ** (n - 1)`` seconds (at most
+    ``max_delay``).  After ``attempts`` failed runs the failure record is
+    returned.
+    """
+
+    def _wrap(name: str, runner: ToolRunner) -> ToolRunner:
+        def run(url: str) -> Optional[dict]:
+            for attempt in range(1, attempts + 1):
+                try:
+                    return runner(url)
+                except ToolError as exc:
+                    if attempt == attempts:
+                        print(f"{name} für {url} endgültig fehlgeschlagen: {exc}")
+                        return failure_record(url, name, str(exc), attempt)
+                    delay = min(max_delay, backoff * 2 ** (attempt - 1))
+                    print(f"{name} für {url} fehlgeschlagen ({exc}), neuer Versuch in {delay:.0f} s …")
+                    time.sleep(delay)
+            return None
+
+        return run
+
+    return {name: _wrap(name, runner) for name, runner in tools.items()}
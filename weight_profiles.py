@@ -0,0 +1,90 @@
+"""Named weight profiles for the accessibility score.
+
+A profile is a JSON file in ``profiles/`` (or any other path) with the
+default severity and type factor and the weights and labels of individual
+issue categories::
+
+    {
+      "description": "...",
+      "default_severity": 1,
+      "default_type_factor": 1.0,
+      "categories": {"images must have alternative text": {"severity": 4, "type_factor": 1.5, "label": "..."}}
+    }
+
+``profiles/default.json`` holds the weights used by ``accessibility1.py``.
+Because scores only depend on the number of findings per page and category,
+any profile can be applied to the counts stored in ``bewertung.sqlite``
+afterwards (see ``rescore.py``).
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from scoring import ScoringEngine
+
+PROFILE_DIR = Path(__file__).with_name("profiles")
+DEFAULT_PROFILE = "default"
+
+
+class WeightProfile:
+    """Category weights of one named profile."""
+
+    def __init__(
+        self,
+        name: str,
+        categories: Dict[str, Dict[str, object]],
+        default_severity: int = 1,
+        default_type_factor: float = 1.0,
+        description: str = "",
+    ) -> None:
+        self.name = name
+        self.categories = categories
+        self.default_severity = default_severity
+        self.default_type_factor = default_type_factor
+        self.description = description
+
+    @classmethod
+    def load(cls, name: str) -> "WeightProfile":
+        """Load the profile ``name`` from ``profiles/`` or from the path ``name``."""
+        path = Path(name)
+        if path.suffix != ".json":
+            path = PROFILE_DIR / f"{name}.json"
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            path.stem,
+            data.get("categories", {}),
+            data.get("default_severity", 1),
+            data.get("default_type_factor", 1.0),
+            data.get("description", ""),
+        )
+
+    def issue_categories(self, canonical_messages: Sequence[str], rules: Sequence = ()) -> Dict[str, Dict[str, object]]:
+        """Return the complete category table for ``canonical_messages``.
+
+        Every canonical message starts with the profile defaults; weights
+        given in the canonicalisation ``rules`` come next and the categories
+        of the profile take precedence.
+        """
+        table: Dict[str, Dict[str, object]] = {
+            msg: {"severity": self.default_severity, "type_factor": self.default_type_factor, "label": msg}
+            for msg in canonical_messages
+        }
+        for rule in rules:
+            if rule.category and rule.canonical in table:
+                table[rule.canonical].update(rule.category)
+        for msg, info in self.categories.items():
+            table[msg] = {**table.get(msg, {}), **info}
+        return table
+
+    def engine(self, canonical_messages: Sequence[str], rules: Sequence = ()) -> ScoringEngine:
+        """Return a scoring engine for this profile."""
+        return ScoringEngine(
+            self.issue_categories(canonical_messages, rules), self.default_severity, self.default_type_factor
+        )
+
+
+def available_profiles(directory: Optional[Path] = None) -> List[str]:
+    """Return the names of the profiles in ``directory`` (default ``profiles/``)."""
+    return sorted(path.stem for path in (directory or PROFILE_DIR).glob("*.json"))